@@ -0,0 +1,351 @@
+"""HTTP service for the article graph, for the CMS and anything else that can't drive Streamlit.
+
+    python api.py --port 8000 --concurrency 16 --store .article_store.sqlite
+
+    POST /articles               {"subject", "target", "length", "content"}   -> 202 {"id", "status", ...}
+                                 {"articles": [brief, ...]}                   -> 202 {"articles": [{"id", ...}, ...]}
+    GET  /articles/{id}          status, finished steps, and the article once done
+    GET  /articles/{id}/events   Server-Sent Events: "status" when the run starts, "node" when a node
+                                 finishes, "token" for Writer / Editor tokens, then "done" or "failed"
+                                 with the full status; reconnects resume from Last-Event-ID
+    GET  /health                 queue sizes and the rate-limit scheduler's state
+
+One process serves every client from one async graph. All the runs share its
+models, so their HTTP connections to Groq are pooled and budgeted by one
+`scheduler.RateLimitScheduler`. At most `concurrency` runs are in flight; the
+rest wait in order, and past `max_pending` a submit is refused with 429. A
+batch of briefs is submitted with one request, and a brief identical to one
+still queued or running joins that run instead of starting another. With
+`--store`, finished articles go to an `article_store.ArticleStore`, and
+`GET /articles/{id}` still finds them after a restart.
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from checkpoints import new_thread_id
+from markdown_formatter import DEFAULT_EDITOR_MODE, EDITOR_MODES
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING = 1000
+# Finished runs kept in memory for polling; older ones are only in the article store
+KEEP_FINISHED = 500
+# Seconds between SSE comments keeping idle connections open through proxies
+KEEPALIVE_SECONDS = 15
+BRIEF_FIELDS = ("subject", "target", "content")
+
+
+def parse_brief(data) -> dict:
+    """The state_input of a request body; raises ValueError with the problem."""
+    if not isinstance(data, dict):
+        raise ValueError("a brief must be a JSON object")
+    missing = [f for f in BRIEF_FIELDS if not isinstance(data.get(f), str) or not data[f].strip()]
+    if missing:
+        raise ValueError(f"missing or empty: {', '.join(missing)}")
+    length = data.get("length", 1200)
+    if isinstance(length, bool) or not isinstance(length, int) or not 100 <= length <= 20000:
+        raise ValueError("length must be an integer between 100 and 20000")
+    return {"subject": data["subject"], "length": length, "target": data["target"], "content": data["content"]}
+
+
+class Run:
+    """One article: its progress events, replayed to every SSE client."""
+
+    def __init__(self, run_id, state_input):
+        self.id = run_id
+        self.input = state_input
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at = None
+        self.steps = []
+        self.events = []   # (event id, kind, data); the id is the SSE id clients resume from
+        self._next_id = 0
+        self.result = None
+        self.error = None
+        self._changed = asyncio.Event()
+
+    def emit(self, kind, data):
+        self.events.append((self._next_id, kind, data))
+        self._next_id += 1
+        # Wake every waiting client; the next wait gets a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self, start=0):
+        """Yield (id, kind, data) from event id `start` on, until the run ends; None on a quiet interval."""
+        index = start
+        while True:
+            first = bisect.bisect_left(self.events, index, key=lambda event: event[0])
+            for event in self.events[first:]:
+                yield event
+                index = event[0] + 1
+            if self.finished_at is not None:
+                return
+            try:
+                await asyncio.wait_for(self._changed.wait(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+
+    def drop_tokens(self):
+        """Forget the token events of a finished run; its status, node and outcome events stay replayable."""
+        self.events = [event for event in self.events if event[1] != "token"]
+
+    def view(self) -> dict:
+        view = {"id": self.id, "status": self.status, "input": self.input, "created_at": self.created_at,
+                "steps": self.steps}
+        if self.result is not None:
+            view["article"] = self.result
+        if self.error is not None:
+            view["error"] = self.error
+        return view
+
+
+class ArticleService:
+    """Runs submitted briefs on the async `agent`, `concurrency` at a time."""
+
+    def __init__(self, agent, concurrency=8, articles=None, max_pending=MAX_PENDING, options=None, scheduler=None):
+        self.agent = agent
+        self.articles = articles
+        self.scheduler = scheduler
+        self.max_pending = max_pending
+        self.options = options or {}
+        self.runs = {}
+        self._by_input = {}   # brief -> id of its queued / running run
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+
+    def pending(self) -> int:
+        return sum(run.finished_at is None for run in self.runs.values())
+
+    def submit(self, briefs: list) -> list:
+        """Queue `briefs` (state_input dicts); returns their runs, reusing identical unfinished ones."""
+        new = [b for b in briefs if self._key(b) not in self._by_input]
+        if self.pending() + len(new) > self.max_pending:
+            raise OverflowError(f"{self.pending()} articles already pending")
+        runs = []
+        for brief in briefs:
+            key = self._key(brief)
+            if key in self._by_input:
+                runs.append(self.runs[self._by_input[key]])
+                continue
+            run = Run(new_thread_id(), brief)
+            self._by_input[key] = run.id
+            self.runs[run.id] = run
+            task = asyncio.get_running_loop().create_task(self._run(run))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            runs.append(run)
+        return runs
+
+    @staticmethod
+    def _key(brief) -> str:
+        return json.dumps(brief, sort_keys=True, ensure_ascii=False)
+
+    async def _run(self, run):
+        from metrics import NodeMetrics
+        from pipeline import astream_run, merge_update, result_summary
+
+        async with self._slots:
+            run.status = "running"
+            run.emit("status", {"status": "running"})
+            metrics = NodeMetrics(run_id=run.id)
+            final = dict(run.input)
+            start = time.perf_counter()
+            try:
+                config = {"callbacks": [metrics], "metadata": {"priority": "default"}}
+                async for kind, node, val in astream_run(self.agent, run.input, config=config):
+                    if kind == "token":
+                        run.emit("token", {"node": node, "text": val})
+                        continue
+                    merge_update(final, val)
+                    run.steps.append(node)
+                    run.emit("node", {"node": node})
+            except Exception as e:
+                logger.exception("Article %s failed", run.id)
+                run.status, run.error = "failed", f"{type(e).__name__}: {e}"
+            else:
+                run.status = "done"
+                run.result = result_summary(final)
+                if self.articles is not None:
+                    self._save(run, final, metrics.records(), time.perf_counter() - start)
+            finally:
+                self._by_input.pop(self._key(run.input), None)
+            run.finished_at = time.time()
+            run.emit(run.status, run.view())
+            # Clients following live already got the tokens; kept finished runs hold the article once
+            run.drop_tokens()
+            self._forget_old()
+
+    def _save(self, run, final, records, elapsed):
+        from article_store import article_record
+
+        try:
+            self.articles.add(article_record(run.id, final, records, self.options, round(elapsed, 3)))
+        except Exception:
+            logger.exception("Article %s not saved", run.id)
+
+    def _forget_old(self):
+        finished = sorted((r for r in self.runs.values() if r.finished_at is not None), key=lambda r: r.finished_at)
+        for run in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del self.runs[run.id]
+
+    def stored(self, run_id):
+        """View of a finished article that is only left in the store, or None."""
+        record = self.articles.get(run_id) if self.articles is not None else None
+        if record is None:
+            return None
+        inputs = {key: record[key] for key in ("subject", "length", "target", "content")}
+        article = {"title": record["title"], "article": record["result"], "rating": record["rating"],
+                   "review": record["review"]}
+        return {"id": run_id, "status": "done", "input": inputs, "created_at": record["created_at"],
+                "steps": [m["node"] for m in record["metrics"]], "article": article}
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def sse(index, kind, data) -> str:
+    return f"id: {index}\nevent: {kind}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def make_app(make_service) -> Starlette:
+    """Starlette app around the `ArticleService` returned by `make_service()` at startup."""
+
+    async def create(request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return JSONResponse({"error": "the body must be JSON"}, status_code=400)
+        batch = isinstance(body, dict) and "articles" in body
+        items = body["articles"] if batch else [body]
+        if not isinstance(items, list) or not items:
+            return JSONResponse({"error": "articles must be a non-empty list"}, status_code=400)
+        try:
+            briefs = [parse_brief(item) for item in items]
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        service = request.app.state.service
+        try:
+            runs = service.submit(briefs)
+        except OverflowError as e:
+            return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": "30"})
+        views = [{"id": run.id, "status": run.status, "url": f"/articles/{run.id}",
+                  "events": f"/articles/{run.id}/events"} for run in runs]
+        return JSONResponse({"articles": views} if batch else views[0], status_code=202)
+
+    async def read(request):
+        service = request.app.state.service
+        run_id = request.path_params["article_id"]
+        run = service.runs.get(run_id)
+        view = run.view() if run is not None else service.stored(run_id)
+        if view is None:
+            return JSONResponse({"error": "unknown article"}, status_code=404)
+        return JSONResponse(view)
+
+    async def events(request):
+        service = request.app.state.service
+        run = service.runs.get(request.path_params["article_id"])
+        if run is None:
+            view = service.stored(request.path_params["article_id"])
+            if view is None:
+                return JSONResponse({"error": "unknown article"}, status_code=404)
+            # Long finished: a stream with only its outcome
+            return StreamingResponse(iter([sse(0, "done", view)]), media_type="text/event-stream")
+        last = request.headers.get("last-event-id", "")
+        start = int(last) + 1 if last.isdigit() else 0
+
+        async def stream():
+            async for event in run.follow(start):
+                yield ": keep-alive\n\n" if event is None else sse(*event)
+
+        return StreamingResponse(stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def health(request):
+        service = request.app.state.service
+        body = {"pending": service.pending(), "runs": len(service.runs)}
+        if service.scheduler is not None:
+            body["scheduler"] = service.scheduler.snapshot()
+        return JSONResponse(body)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.service = make_service()
+        yield
+        await app.state.service.close()
+
+    return Starlette(routes=[
+        Route("/articles", create, methods=["POST"]),
+        Route("/articles/{article_id}", read),
+        Route("/articles/{article_id}/events", events),
+        Route("/health", health),
+    ], lifespan=lifespan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the article graph over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of articles in flight")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING,
+                        help="Queued + running articles before new ones are refused with 429")
+    parser.add_argument("--model", default=None, help="Groq model name")
+    parser.add_argument("--small-model", default=None,
+                        help="Model for the Editor and Reviewer ('' = --model everywhere)")
+    parser.add_argument("--editor-mode", default=DEFAULT_EDITOR_MODE, choices=EDITOR_MODES)
+    parser.add_argument("--topology", default="chain", choices=("chain", "parallel"))
+    parser.add_argument("--cache", default=None, help="SQLite file caching LLM responses across runs")
+    parser.add_argument("--store", default=None, help="SQLite article store finished articles are saved to")
+    parser.add_argument("--content-budget", type=int, default=None,
+                        help="Trim the notes sent to the Organizer/Writer to this many tokens (default: sent whole)")
+    parser.add_argument("--article-budget", type=int, default=None,
+                        help="Trim the draft sent to the Reviewer to this many tokens")
+    args = parser.parse_args()
+
+    def make_service():
+        from guards import GuardPolicy
+        from pipeline import DEFAULT_MODEL, SMALL_MODEL, PipelineConfig, build_graph
+        from prompt_budget import PromptBudget
+        from scheduler import RateLimitScheduler
+
+        cache = None
+        if args.cache:
+            from llm_cache import SQLiteLLMCache
+            cache = SQLiteLLMCache(args.cache)
+        articles = None
+        if args.store:
+            from article_store import ArticleStore
+            articles = ArticleStore(args.store)
+        # One set of models for every request: their httpx clients keep Groq connections open
+        scheduler = RateLimitScheduler(max_concurrency=max(1, args.concurrency) * 2)
+        config = PipelineConfig(
+            model=args.model or DEFAULT_MODEL,
+            small_model=SMALL_MODEL if args.small_model is None else args.small_model,
+            cache=cache, scheduler=scheduler, use_async=True,
+            editor_mode=args.editor_mode, topology=args.topology, guard=GuardPolicy(),
+            budget=PromptBudget(content_tokens=args.content_budget, article_tokens=args.article_budget),
+        )
+        options = {"model": config.model, "editor_mode": args.editor_mode, "topology": args.topology}
+        return ArticleService(build_graph(config), concurrency=max(1, args.concurrency), articles=articles,
+                              max_pending=args.max_pending, options=options, scheduler=scheduler)
+
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run(make_app(make_service), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,21 @@
+import json
+
 import streamlit as st
-from dotenv import load_dotenv
-from langgraph.graph import StateGraph, END
-from pydantic import Field, BaseModel
-from langchain_groq import ChatGroq
+
+from article_store import ArticleStore, slug
+from checkpoints import new_thread_id, open_checkpointer, run_status
+from guards import GuardPolicy
+from jobs import FINISHED, JobQueue, JobStore
+from markdown_formatter import DEFAULT_EDITOR_MODE, EDITOR_MODES
+from llm_cache import SQLiteLLMCache
+from metrics import FIELDS
+from scheduler import RateLimitScheduler
+from nodes import PLAN_ERROR, REVIEW_CRITERIA, parse_rating
+from plan_index import PlanIndex
+from plan_templates import SUBJECTS, TARGETS, PlanTemplates
+from prompt_budget import ARTICLE_TOKENS, CONTENT_TOKENS, PromptBudget
+from revision import RevisionPolicy
+from pipeline import SMALL_MODEL, build_graph, make_router
 
 # Design  
 st.set_page_config(page_title="AI Editorial Agent", page_icon="✍️", layout="wide")
@@ -21,102 +34,127 @@ st.markdown("""
 # THE AGENT LOGIC
 
 @st.cache_resource
-def get_graph():
-    load_dotenv()
-    # Using a reliable model name for Groq
-    llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.6)
-
-    class State(BaseModel):
-        subject: str = Field(description="The subject")
-        length: int = Field(description="Length in chars")
-        target: str = Field(description="Target audience")
-        title: str = Field(description="Controversial title")
-        header: str = Field(description="Header")
-        question: str = Field(description="Attractive question")
-        content: str = Field(description="User content")
-        steps: list[str] = Field(default_factory=list, description="Actionable steps")
-        instructions_for_writer: str = Field(default="", description="Instructions")
-
-    def OrganizerAgent(state: dict) -> dict:
-        # We force the model to ONLY use the tool
-        structured_llm = llm.with_structured_output(State)
-        
-        prompt = f"""You are a Professional Content Strategist.
-        You MUST provide your response by filling the tool/schema provided.
-        
-        User Inputs:
-        - Subject: {state['subject']}
-        - Target: {state['target']}
-        - Max Length: {state['length']} characters
-        - Core Ideas: {state['content']}
-        
-        Fill every field in the schema. Ensure 'instructions_for_writer' is very detailed.
-        """
-        try:
-            results = structured_llm.invoke(prompt)
-            return {"Plan": results}
-        except Exception as e:
-            # Fallback if tool call fails
-            st.error(f"Organizer Error: {e}")
-            return {"Plan": "Error in planning phase."}
-
-    def ArticleWriter(state: dict) -> dict:
-        plan = state.get("Plan")
-        # Ensure we are passing a string to the next prompt
-        plan_details = plan.json() if hasattr(plan, 'json') else str(plan)
-        
-        prompt = f"Write a full article following these specific instructions: {plan_details}"
-        result = llm.invoke(prompt)
-        return {"Article": result.content}
-
-    def Structured(state: dict) -> dict:
-        prompt = "Format this text into clean Markdown with H1, H2, and H3 tags. Keep the tone professional. Remove meta-talk."
-        res = llm.invoke([{"role": "system", "content": prompt}, {"role": "user", "content": state.get("Article", "")}])
-        return {"Result": res.content}
-
-    def Reviewer(state: dict) -> dict:
-        article = state.get("Result", "")
-        prompt = "Review this article. Output exactly in this format: \nRating: X/5\nNote: [Your short critique]"
-        res = llm.invoke(prompt + f"\n\nArticle:\n{article}")
-        return {"rating": res.content}
-
-    # Graph Setup
-    workflow = StateGraph(dict)
-    workflow.add_node("Organizer", OrganizerAgent)
-    workflow.add_node("Writer", ArticleWriter)
-    workflow.add_node("Editor", Structured)
-    workflow.add_node("Reviewer", Reviewer)
-    
-    workflow.set_entry_point("Organizer")
-    workflow.add_edge("Organizer", "Writer")
-    workflow.add_edge("Writer", "Editor")
-    workflow.add_edge("Editor", "Reviewer")
-    workflow.add_edge("Reviewer", END)
-    
-    return workflow.compile()
+def get_cache():
+    # Re-running the same inputs (e.g. while tweaking the slider) skips the Groq calls
+    return SQLiteLLMCache(".article_cache.sqlite", ttl=7 * 24 * 3600, max_bytes=200_000_000)
+
+@st.cache_resource
+def get_scheduler():
+    # Shared by every session: one budget against Groq's rate limits
+    return RateLimitScheduler(max_concurrency=16)
+
+@st.cache_resource
+def get_budget():
+    # With "Trim long notes" on, notes pasted in the text area are capped before they reach each prompt
+    return PromptBudget(content_tokens=CONTENT_TOKENS, article_tokens=ARTICLE_TOKENS)
+
+@st.cache_resource
+def get_plans():
+    # Plans of past briefs, to skip the Organizer for near-duplicates
+    return PlanIndex(".article_plans.sqlite", max_entries=2000)
+
+@st.cache_resource
+def get_templates():
+    # Plan skeletons per topic x audience x length, precomputed with `python plan_templates.py --refresh`
+    return PlanTemplates(".article_templates.sqlite")
+
+@st.cache_resource
+def get_articles():
+    # Every finished article, searchable with `python article_store.py search`
+    return ArticleStore(".article_store.sqlite")
+
+@st.cache_resource
+def get_checkpointer():
+    # Finished steps survive reruns and restarts, keyed by the run's thread id
+    return open_checkpointer()
+
+@st.cache_resource
+def get_graph(editor_mode="llm", topology="chain", writer_mode="single", fast_review=True, auto_revise=False,
+              plan_reuse="record", template_mode=None, llm_cache=True, trim_prompts=False):
+    # Using a reliable model name for Groq; the 8B model formats and reviews
+    small_model = SMALL_MODEL if fast_review else None
+    # llm_cache=False is for re-runs: the same prompt must reach the model again, not the cached answer
+    llm = make_router("llama-3.3-70b-versatile", small_model, temperature=0.6,
+                      cache=get_cache() if llm_cache else False,
+                      scheduler=get_scheduler())
+    return build_graph(llm, editor_mode=editor_mode, topology=topology, writer_mode=writer_mode,
+                       checkpointer=get_checkpointer(), budget=get_budget() if trim_prompts else None,
+                       revision=RevisionPolicy() if auto_revise else None,
+                       plans=get_plans() if plan_reuse else None, plan_reuse=plan_reuse or "record",
+                       templates=get_templates() if template_mode else None, template_mode=template_mode or "fill",
+                       # Bad plans and off-length drafts are redone before the next calls are spent on them
+                       guard=GuardPolicy())
+
+@st.cache_data(max_entries=200, show_spinner=False)
+def load_run(job_id, thread_id, options):
+    # A finished job's checkpoint never changes (resumes and re-runs are new jobs), so
+    # switching between results or touching a widget re-renders without reading the graph again
+    return run_status(get_graph(**options), thread_id)
+
+@st.cache_resource
+def get_jobs():
+    # One worker pool for every session: the graph runs there, never in the script
+    queue = JobQueue(JobStore(), get_graph, workers=4, articles=get_articles())
+    queue.recover()
+    return queue
 
 # UI Interface 
 
-def main():
-    agent = get_graph()
+# Sidebar choice -> graph `plan_reuse` ("record" stores plans so the app can offer them)
+PLAN_REUSE_CHOICES = {"Ask": "record", "Reuse automatically": "auto", "Always plan again": None}
+# Sidebar choice -> graph `template_mode`
+TEMPLATE_CHOICES = {"Off": None, "Fill in specifics": "fill", "Fast (no planning call)": "fast"}
+
+
+def run_key(state_input, options) -> str:
+    return json.dumps([state_input, options], sort_keys=True, ensure_ascii=False)
 
+
+def main():
     with st.sidebar:
         st.title("🚀 Configuration")
         
-        subj_list = ["⚽ Sport", "📈 Economics", "🏛️ Politics", "💊 Health", "🍔 Food", "💻 IT", "❤️ Emotional", "Other"]
+        subj_list = [*SUBJECTS, "Other"]
         sel_subj = st.selectbox("Topic", subj_list)
         final_subj = st.text_input("Enter Topic") if sel_subj == "Other" else sel_subj
         
-        target_list = ["👨‍👩‍👧 Family", "👔 Professional", "📱 Social Media", "🏫 School", "🍻 Casual", "🤓 Enthusiasts"]
+        target_list = list(TARGETS)
         final_target = st.selectbox("Audience", target_list)
         final_len = st.slider("Target Chars", 500, 2000, 1200, 100)
+        # "local" formats the draft without an LLM call; the fallback mode only calls it for badly structured drafts
+        editor_mode = st.selectbox("Editor", EDITOR_MODES, index=EDITOR_MODES.index(DEFAULT_EDITOR_MODE))
+        # Three drafts from the one plan, each reviewed; the best-scored one is kept
+        best_of = st.toggle("Best of 3 drafts", value=False)
+        # Review the draft while the Editor formats it instead of after (best-of-3 reviews every draft already)
+        parallel_review = st.toggle("Parallel review", value=False, disabled=best_of)
+        # Draft every planned step at once instead of the whole article in one call
+        parallel_sections = st.toggle("Parallel sections", value=False, disabled=best_of)
+        # Editor and Reviewer on the 8B model; unusable answers are redone on the 70B one
+        fast_review = st.toggle("Fast model for Editor/Reviewer", value=True)
+        # Low-scoring drafts get a couple of targeted fix passes before they are shown
+        auto_revise = st.toggle("Auto-revise low scores", value=True)
+        # Briefs close to one planned before can skip the Organizer
+        similar_briefs = st.selectbox("Similar briefs", list(PLAN_REUSE_CHOICES))
+        # Start from the precomputed plan skeleton of the topic x audience x length cell
+        plan_templates = st.selectbox("Plan templates", list(TEMPLATE_CHOICES))
+        # Cut very long notes down to their opening and closing sentences in the prompts
+        trim_prompts = st.toggle("Trim long notes", value=False)
         
         st.markdown("---")
         run_btn = st.button("Generate Article")
 
+        cache_stats = get_cache().stats()
+        st.caption(f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses · "
+                   f"saved {cache_stats['saved_tokens']} tokens, {cache_stats['saved_seconds']}s · "
+                   f"prompt budgeting saved {get_budget().saved_tokens()} tokens")
+
+        show_history()
+
     st.title("⚡ AI Editorial Agent")
     content_input = st.text_area("What's the article about? (Your ideas)", height=200, placeholder="Write your core message or facts here...")
 
+    jobs = get_jobs()
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
     if run_btn:
         if not content_input:
             st.error("Please enter some content first!")
@@ -128,46 +166,223 @@ def main():
             "target": final_target,
             "content": content_input
         }
+        options = {"editor_mode": editor_mode, "topology": "parallel" if parallel_review and not best_of else "chain",
+                   "writer_mode": "variants" if best_of else "sections" if parallel_sections else "single",
+                   "fast_review": fast_review,
+                   "auto_revise": auto_revise, "plan_reuse": PLAN_REUSE_CHOICES[similar_briefs],
+                   "template_mode": TEMPLATE_CHOICES[plan_templates], "trim_prompts": trim_prompts}
+        st.session_state["offer"] = st.session_state["regenerate"] = None
+        earlier = earlier_run(run_key(state_input, options))
+        match = get_plans().lookup(state_input) if similar_briefs == "Ask" and not earlier else None
+        if earlier:
+            # Same brief and settings as a finished run of this session: show that one instead of paying again
+            job_id = remember(earlier)
+            st.session_state["regenerate"] = (earlier, state_input, options)
+            st.toast("Same inputs as an earlier run, shown again without generating")
+        elif match:
+            st.session_state["offer"] = (state_input, options, *match)
+        else:
+            job_id = start(state_input, options)
 
-        with st.status("🛠️ Processing...", expanded=True) as status:
-            final_article = ""
-            review_text = ""
-            
-            for output in agent.stream(state_input):
-                for key, val in output.items():
-                    status.write(f"Step {key} complete...")
-                    if key == "Editor":
-                        final_article = val.get("Result")
-                    if key == "Reviewer":
-                        review_text = val.get("rating")
-            
-            status.update(label="✨ Finished!", state="complete", expanded=False)
+    if st.session_state.get("offer"):
+        state_input, options, plan, similarity = st.session_state["offer"]
+        st.info(f"A {similarity:.0%} similar brief was planned before: **{plan.get('title', '')}**")
+        col1, col2 = st.columns(2)
+        key = run_key(state_input, options)
+        if col1.button("♻️ Reuse that plan"):
+            state_input = {**state_input, "Plan": plan, "plan_similarity": similarity}
+        elif not col2.button("🆕 Plan from scratch"):
+            return
+        st.session_state["offer"] = None
+        job_id = start(state_input, options, key)
 
-        st.markdown("---")
-        
-        # Parse Rating
-        score = "N/A"
-        note = "No critique available."
-        if "Rating:" in review_text:
-            try:
-                score = review_text.split("Rating:")[1].split("\n")[0].strip()
-                if "Note:" in review_text:
-                    note = review_text.split("Note:")[1].strip()
-            except:
-                score = "Review complete"
-
-        # Rating & Note UI
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.markdown(f'<div class="rating-card"><h1>{score}</h1><p>Overall Rating</p></div>', unsafe_allow_html=True)
-        with col2:
-            st.markdown(f'<div class="note-card"><b>Editor Note:</b><br>{note}</div>', unsafe_allow_html=True)
-
-        # Article
-        st.subheader("📝 Final Draft")
-        st.markdown(f'<div class="result-container">{final_article}</div>', unsafe_allow_html=True)
-        
-        st.download_button("Download Markdown", final_article, file_name="article.md")
+    regenerate = st.session_state.get("regenerate")
+    if regenerate and regenerate[0] == job_id and st.button("🆕 Generate a new version"):
+        # The shown run was reused; this one pays for a fresh article with the same inputs
+        st.session_state["regenerate"] = None
+        job_id = start(*regenerate[1:])
+
+    job = jobs.store.get(job_id) if job_id else None
+    if job is None:
+        return
+    if job["status"] not in FINISHED:
+        job_progress(job_id)
+        return
+
+    if job["status"] == "failed":
+        st.error(f"Generation failed: {job['error']}")
+    if job["metrics"]:
+        # Where did this article's time and tokens go?
+        with st.expander("⏱️ Last run metrics"):
+            st.dataframe(job["metrics"], hide_index=True, column_order=("node",) + FIELDS)
+
+    # Continue with the graph the run was started with, not the current sidebar
+    thread_id = job["thread_id"]
+    run = load_run(job_id, thread_id, job["options"])
+    # A re-run job's uncached graph is only for that re-run
+    options = {key: value for key, value in job["options"].items() if key != "llm_cache"}
+
+    if run["pending"]:
+        pending = run["pending"]
+        st.warning(f"The last run stopped before {', '.join(pending)}. Finished steps are saved, resume to continue.")
+        if st.button("▶️ Resume"):
+            remember(jobs.submit(thread_id, options, "resume"), thread_id)
+            st.rerun()
+        return
+
+    # Only the cheap downstream calls run again, the draft is reused
+    col1, col2 = st.columns(2)
+    for col, label, node in ((col1, "🔁 Re-run review", "Reviewer"), (col2, "🎨 Re-run editor", "Editor")):
+        if col.button(label):
+            # A re-run wants a new answer: with the cache the same prompt would just return the old one
+            remember(jobs.submit(thread_id, {**options, "llm_cache": False}, "rerun", node=node), thread_id)
+            st.rerun()
+
+    show_result(run["values"])
+
+
+def start(state_input, options, key=None):
+    # Every article gets its own checkpoint thread; the worker pool runs it
+    thread_id = new_thread_id()
+    job_id = get_jobs().submit(thread_id, options, "generate", state_input)
+    history = st.session_state.setdefault("history", {})
+    history[thread_id] = {"key": key or run_key(state_input, options),
+                          "brief": f"{state_input['subject']} · {state_input['target']}"}
+    return remember(job_id, thread_id)
+
+
+def remember(job_id, thread_id=None):
+    # Kept in the URL too, so a refresh (or another browser) finds the job again
+    st.session_state["job_id"] = st.query_params["job"] = job_id
+    if thread_id in st.session_state.get("history", {}):
+        # The history shows a run's latest job: its resume or re-run, not the first attempt
+        st.session_state["history"][thread_id]["job_id"] = job_id
+    return job_id
+
+
+def earlier_run(key):
+    """Latest job of this session with the same inputs and settings that finished an article, or None.
+
+    Failed jobs and runs stopped early (bad plan, pending steps) are not
+    reused: generating again with the same inputs runs them anew.
+    """
+    for thread_id, entry in reversed(st.session_state.get("history", {}).items()):
+        if entry["key"] != key:
+            continue
+        job = get_jobs().store.get(entry["job_id"])
+        if job is None or job["status"] != "done":
+            continue
+        run = load_run(job["id"], thread_id, job["options"])
+        if not run["pending"] and run["values"].get("Result") and run["values"].get("Plan") != PLAN_ERROR:
+            return job["id"]
+    return None
+
+
+def show_history():
+    """Sidebar list of this session's runs; picking one shows it from the cache, no model call."""
+    history = st.session_state.get("history")
+    if not history:
+        return
+    st.markdown("---")
+    st.subheader("🕘 This session")
+    for thread_id, entry in reversed(history.items()):
+        job = get_jobs().store.get(entry["job_id"])
+        label = f"⏳ {entry['brief']}"
+        if job["status"] == "failed":
+            label = f"⚠️ {entry['brief']}"
+        elif job["status"] == "done":
+            values = load_run(job["id"], thread_id, job["options"])["values"]
+            review = values.get("review") or parse_rating(values.get("rating"))
+            score = f" · {review['score']:g}/5" if review else ""
+            label = f"📝 {getattr(values.get('Plan'), 'title', '') or entry['brief']}{score}"
+        if st.button(label, key=f"history-{thread_id}", disabled=entry["job_id"] == st.session_state.get("job_id")):
+            remember(entry["job_id"])
+
+
+def step_summary(record) -> str:
+    # " · 1.2s · 340 tokens" from a step's metrics record; "" before it has any
+    if not record:
+        return ""
+    parts = [f"{record['wall_s']:.1f}s"] if record.get("wall_s") is not None else []
+    tokens = record["prompt_tokens"] + record["completion_tokens"]
+    if tokens:
+        parts.append(f"{tokens} tokens")
+    if record["cache_hits"]:
+        parts.append(f"{record['cache_hits']} cached")
+    return "".join(f" · {part}" for part in parts)
+
+
+@st.fragment(run_every=1.0)
+def job_progress(job_id):
+    """Poll the job and show its steps and live draft until it finishes."""
+    job = get_jobs().store.get(job_id)
+    if job["status"] in FINISHED:
+        st.rerun()
+
+    if job["status"] == "queued":
+        label = f"⏳ Waiting for a worker ({get_jobs().store.position(job_id)} ahead)..."
+    else:
+        label = "🛠️ Processing..."
+    metrics = {record["node"]: record for record in job["metrics"] or []}
+    with st.status(label, expanded=True):
+        for step in job["steps"]:
+            st.write(f"Step {step} complete{step_summary(metrics.get(step))}")
+        if job["current"]:
+            st.write(f"Step {job['current']} streaming{step_summary(metrics.get(job['current']))}...")
+        if metrics:
+            st.dataframe(job["metrics"], hide_index=True, column_order=("node",) + FIELDS)
+    # The Writer / Editor drafts are rendered token by token while they generate
+    if job["draft"]:
+        st.markdown(f'<div class="result-container">\n\n{job["draft"]}▌\n\n</div>', unsafe_allow_html=True)
+
+
+def show_result(values):
+    final_article = values.get("Result") or ""
+    if values.get("Plan") == PLAN_ERROR:
+        st.error("Organizer Error: planning failed, see the server log.")
+    if values.get("plan_similarity"):
+        st.caption(f"♻️ Plan reused from a {values['plan_similarity']:.0%} similar brief")
+    elif values.get("plan_template"):
+        st.caption(f"🧩 Plan built from the {values['Plan'].subject} × {values['Plan'].target} template "
+                   f"({values['plan_template']} mode)")
+    # Runs checkpointed before the structured Reviewer only have the rating text
+    review = values.get("review") or parse_rating(values.get("rating"))
+
+    st.markdown("---")
+
+    score = f"{review['score']:g}/5" if review else "N/A"
+    note = (review or {}).get("note") or "No critique available."
+
+    # Rating & Note UI
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.markdown(f'<div class="rating-card"><h1>{score}</h1><p>Overall Rating</p></div>', unsafe_allow_html=True)
+    with col2:
+        st.markdown(f'<div class="note-card"><b>Editor Note:</b><br>{note}</div>', unsafe_allow_html=True)
+        sub_scores = [f"{c.replace('_', ' ').capitalize()} {review[c]:g}/5" for c in REVIEW_CRITERIA if c in (review or {})]
+        if sub_scores:
+            st.caption(" · ".join(sub_scores))
+        variants = [v for v in values.get("variants") or [] if not v.get("dropped")]
+        if variants:
+            scores = [("N/A" if v["score"] is None else f"{v['score']:g}") + (" ✓" if v["chosen"] else "")
+                      for v in variants]
+            st.caption(f"Best of {len(variants)} drafts · scores {' / '.join(scores)}")
+        draft_checks = [g for g in values.get("guard") or [] if g["node"] == "Writer"]
+        if draft_checks and draft_checks[-1]["action"] == "accept":
+            st.caption(f"⚠️ Draft kept after a rewrite: {', '.join(draft_checks[-1]['problems'])}")
+        elif draft_checks and draft_checks[-1]["action"] == "note":
+            st.caption(f"⚠️ Draft length: {', '.join(draft_checks[-1]['problems'])}")
+        revisions = values.get("revisions") or []
+        if revisions:
+            st.caption(f"Auto-revised {len(revisions)}× (first score {revisions[0]['score']:g}/5, "
+                       f"{sum(r['applied'] for r in revisions)} edits)")
+
+    # Article
+    st.subheader("📝 Final Draft")
+    st.markdown(f'<div class="result-container">{final_article}</div>', unsafe_allow_html=True)
+    
+    title = getattr(values.get("Plan"), "title", "")
+    st.download_button("Download Markdown", final_article, file_name=f"{slug(title)}.md")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,302 @@
+"""Persistent article store: every finished run, searchable, exportable.
+
+Articles used to live only in the browser's download button. `ArticleStore`
+keeps each finished run in SQLite: inputs, plan, draft, final Markdown,
+review, per-node timings and the models used. An FTS5 index over title,
+notes and article serves keyword search; subject / target filters use
+plain indexes. Listings return summaries only (no bodies) and page with a
+keyset cursor, and exports stream in batches, so a store of hundreds of
+thousands of articles is never loaded at once.
+
+    store = ArticleStore()
+    store.add(article_record(thread_id, final_state, metrics.records()))
+    page = store.page(query="inflation", subject="📈 Economics")   # {"items": [...], "next": cursor}
+    store.page(query="inflation", before=page["next"])             # the next page
+    store.page(query="NEAR(rate hike)", raw=True)                  # FTS5 syntax, only when asked for
+    store.export_jsonl("articles.jsonl", after=last_seq)           # incremental: returns (count, last seq)
+
+    python article_store.py search --query "inflation" --subject "📈 Economics"
+    python article_store.py search --query "NEAR(rate hike)" --fts
+    python article_store.py export bundle.zip --after 1200
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import time
+import zipfile
+
+ARTICLES_PATH = ".article_store.sqlite"
+# Columns of a listing; the bodies (notes, plan, draft, article) are only read by `get` and exports
+SUMMARY_FIELDS = ("seq", "id", "created_at", "subject", "target", "length", "title", "score", "model", "elapsed")
+EXPORT_BATCH = 500
+
+_COLUMNS = ("id", "created_at", "subject", "target", "length", "title", "score", "model", "elapsed",
+            "content", "plan", "draft", "result", "rating", "review", "metrics", "options")
+_JSON_COLUMNS = ("plan", "review", "metrics", "options")
+H1_RE = re.compile(r"^#\s+(.+)$", re.M)
+# A keyword with a trailing * still matches as a prefix
+KEYWORD_RE = re.compile(r"(\S+?)(\*?)(?=\s|$)")
+
+
+class BadQuery(ValueError):
+    """A raw FTS5 query SQLite could not parse."""
+
+
+def fts_query(text: str):
+    """Keywords typed by a user as an FTS5 query: each word a quoted phrase, all of them required.
+
+    "covid-19", "U.S. inflation" or "inflation?" are not valid FTS5 syntax;
+    quoted, each word goes through the index tokenizer like the articles did.
+    None when there is no word to search for.
+    """
+    phrases = []
+    for word, star in KEYWORD_RE.findall(text or ""):
+        if re.search(r"\w", word):
+            phrases.append('"' + word.replace('"', '""') + '"' + star)
+    return " ".join(phrases) or None
+
+
+def article_record(article_id, values: dict, metrics=None, options=None, elapsed=None) -> dict:
+    """Store record of a finished run from its final graph state."""
+    plan = values.get("Plan")
+    result = values.get("Result") or ""
+    title = getattr(plan, "title", None)
+    if not title:
+        heading = H1_RE.search(result)
+        title = heading.group(1).strip() if heading else ""
+    models = []
+    for record in metrics or []:
+        models += [m for m in record.get("models", []) if m not in models]
+    return {
+        "id": article_id,
+        "created_at": time.time(),
+        "subject": values.get("subject", ""),
+        "target": values.get("target", ""),
+        "length": int(values.get("length") or 0),
+        "title": title,
+        "score": (values.get("review") or {}).get("score"),
+        "model": ", ".join(models),
+        "elapsed": elapsed,
+        "content": values.get("content", ""),
+        "plan": plan.model_dump() if hasattr(plan, "model_dump") else plan,
+        "draft": values.get("Article", ""),
+        "result": result,
+        "rating": values.get("rating", ""),
+        "review": values.get("review"),
+        "metrics": metrics or [],
+        "options": options or {},
+    }
+
+
+def markdown_file(record: dict) -> str:
+    """The article with its inputs and review as front matter, for the Markdown export."""
+    front = {key: record.get(key) for key in ("id", "subject", "target", "length", "title", "score", "model")}
+    front["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record["created_at"]))
+    lines = [f"{key}: {json.dumps(value, ensure_ascii=False)}" for key, value in front.items()]
+    return "---\n" + "\n".join(lines) + "\n---\n\n" + (record.get("result") or "") + "\n"
+
+
+def slug(text: str, limit=60) -> str:
+    return re.sub(r"[^\w]+", "-", (text or "").lower()).strip("-")[:limit] or "article"
+
+
+class ArticleStore:
+    """SQLite table of finished articles with an FTS5 index over title, notes and article."""
+
+    def __init__(self, path=ARTICLES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS articles (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                created_at REAL NOT NULL,
+                subject TEXT NOT NULL,
+                target TEXT NOT NULL,
+                length INTEGER,
+                title TEXT,
+                score REAL,
+                model TEXT,
+                elapsed REAL,
+                content TEXT,
+                plan TEXT,
+                draft TEXT,
+                result TEXT,
+                rating TEXT,
+                review TEXT,
+                metrics TEXT,
+                options TEXT
+            );
+            CREATE INDEX IF NOT EXISTS articles_subject ON articles(subject, target, seq);
+            CREATE INDEX IF NOT EXISTS articles_target ON articles(target, seq);
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, content, result, content='articles', content_rowid='seq'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, title, content, result) VALUES (new.seq, new.title, new.content, new.result);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, content, result)
+                VALUES ('delete', old.seq, old.title, old.content, old.result);
+            END;"""
+        )
+        self._conn.commit()
+
+    def add(self, record: dict) -> int:
+        """Store `record` (see `article_record`); a re-run of the same id replaces it. Returns its seq."""
+        row = [json.dumps(record.get(c), ensure_ascii=False) if c in _JSON_COLUMNS else record.get(c)
+               for c in _COLUMNS]
+        with self._lock, self._conn:
+            # Delete + insert rather than update: the new seq puts a re-run article back at the head of
+            # listings and into the next incremental export
+            self._conn.execute("DELETE FROM articles WHERE id = ?", (record["id"],))
+            cursor = self._conn.execute(
+                f"INSERT INTO articles ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})", row)
+        return cursor.lastrowid
+
+    def get(self, article_id):
+        """The full record (JSON columns decoded), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM articles WHERE id = ?", (article_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def delete(self, article_id) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM articles WHERE id = ?", (article_id,))
+
+    @staticmethod
+    def _decode(row) -> dict:
+        record = dict(row)
+        for key in _JSON_COLUMNS:
+            if key in record and record[key] is not None:
+                record[key] = json.loads(record[key])
+        return record
+
+    @staticmethod
+    def _where(query=None, subject=None, target=None, raw=False):
+        clauses, params = [], []
+        if query and not raw:
+            query = fts_query(query)
+        if query:
+            clauses.append("a.seq IN (SELECT rowid FROM articles_fts WHERE articles_fts MATCH ?)")
+            params.append(query)
+        if subject:
+            clauses.append("a.subject = ?")
+            params.append(subject)
+        if target:
+            clauses.append("a.target = ?")
+            params.append(target)
+        return clauses, params
+
+    def _fetch(self, sql, params, query):
+        with self._lock:
+            try:
+                return self._conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                # Only a raw query can get here: keywords are always quoted
+                raise BadQuery(f"bad search query {query!r}: {e}") from None
+
+    def page(self, query=None, subject=None, target=None, limit=20, before=None, raw=False) -> dict:
+        """Newest-first summaries matching the filters, `limit` at a time.
+
+        `query` is keywords searched in title, notes and article ("inflation",
+        "U.S. inflation", "infl*"); with `raw` it is an FTS5 query
+        ("NEAR(rate hike)", "rates OR inflation") and a malformed one raises
+        `BadQuery`. Pass the returned `next` as `before` for the following
+        page; it is None on the last page.
+        """
+        clauses, params = self._where(query, subject, target, raw)
+        if before is not None:
+            clauses.append("a.seq < ?")
+            params.append(before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        columns = ", ".join(f"a.{f}" for f in SUMMARY_FIELDS)
+        rows = self._fetch(f"SELECT {columns} FROM articles a {where} ORDER BY a.seq DESC LIMIT ?",
+                           (*params, limit), query)
+        items = [dict(row) for row in rows]
+        return {"items": items, "next": items[-1]["seq"] if len(items) == limit else None}
+
+    def count(self, query=None, subject=None, target=None, raw=False) -> int:
+        clauses, params = self._where(query, subject, target, raw)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._fetch(f"SELECT COUNT(*) FROM articles a {where}", params, query)[0][0]
+
+    def iter_records(self, query=None, subject=None, target=None, after=None, batch=EXPORT_BATCH, raw=False):
+        """Full records oldest first, `batch` rows per query, from seq `after` on."""
+        clauses, params = self._where(query, subject, target, raw)
+        last = after or 0
+        while True:
+            rows = self._fetch(
+                f"SELECT * FROM articles a WHERE {' AND '.join(clauses + ['a.seq > ?'])} ORDER BY a.seq LIMIT ?",
+                (*params, last, batch), query,
+            )
+            for row in rows:
+                yield self._decode(row)
+            if len(rows) < batch:
+                return
+            last = rows[-1]["seq"]
+
+    def export_jsonl(self, path_or_file, **filters) -> tuple:
+        """Append matching records as JSON lines; returns (count, last seq) for the next `after`."""
+        if not hasattr(path_or_file, "write"):
+            with open(path_or_file, "a", encoding="utf-8") as f:
+                return self.export_jsonl(f, **filters)
+        count, last = 0, filters.get("after")
+        for record in self.iter_records(**filters):
+            path_or_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count, last = count + 1, record["seq"]
+        return count, last
+
+    def export_markdown(self, zip_path, **filters) -> tuple:
+        """Write matching articles into a zip of Markdown files; returns (count, last seq)."""
+        count, last = 0, filters.get("after")
+        with zipfile.ZipFile(zip_path, "a", compression=zipfile.ZIP_DEFLATED) as bundle:
+            for record in self.iter_records(**filters):
+                bundle.writestr(f"{record['seq']:07d}-{slug(record['title'])}.md", markdown_file(record))
+                count, last = count + 1, record["seq"]
+        return count, last
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search and export the stored articles")
+    parser.add_argument("--path", default=ARTICLES_PATH, help="SQLite article store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search", help="List matching articles, newest first")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--before", type=int, default=None, help="Cursor printed by the previous page")
+    export = commands.add_parser("export", help="Export matching articles to .jsonl or a .zip of Markdown files")
+    export.add_argument("output", help="File to append to: *.jsonl, or *.zip for Markdown")
+    export.add_argument("--after", type=int, default=None, help="Only articles stored after this seq")
+    for command in (search, export):
+        command.add_argument("--query", default=None, help="Keywords to find in title, notes and article")
+        command.add_argument("--fts", action="store_true", help="Read --query as FTS5 syntax (NEAR, OR, ...)")
+        command.add_argument("--subject", default=None)
+        command.add_argument("--target", default=None)
+    args = parser.parse_args()
+
+    store = ArticleStore(args.path)
+    try:
+        if args.command == "search":
+            page = store.page(args.query, args.subject, args.target, limit=args.limit, before=args.before,
+                              raw=args.fts)
+            for item in page["items"]:
+                print(json.dumps(item, ensure_ascii=False))
+            if page["next"] is not None:
+                print(f"next page: --before {page['next']}")
+            return
+        export_to = store.export_markdown if args.output.endswith(".zip") else store.export_jsonl
+        count, last = export_to(args.output, query=args.query, subject=args.subject, target=args.target,
+                                after=args.after, raw=args.fts)
+    except BadQuery as e:
+        parser.error(str(e))
+    print(f"Exported {count} articles; next time use --after {last}")
+
+
+if __name__ == "__main__":
+    main()
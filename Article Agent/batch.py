@@ -0,0 +1,241 @@
+"""Headless batch runner for the Organizer -> Writer -> Editor -> Reviewer graph.
+
+Reads a JSONL file of `state_input` dicts (subject / length / target / content),
+runs many graph invocations concurrently and streams every finished article to
+an output JSONL file as soon as it is done.
+
+    python batch.py requests.jsonl articles.jsonl --concurrency 8
+
+All runs share one event loop and one LLM client (and so one pooled HTTP
+connection pool); the async nodes await `ainvoke` instead of holding a thread.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from markdown_formatter import DEFAULT_EDITOR_MODE, EDITOR_MODES
+from plan_index import REUSE_THRESHOLD
+from prompt_budget import ARTICLE_TOKENS, CONTENT_TOKENS
+
+REQUIRED_KEYS = ("subject", "length", "target", "content")
+
+
+def load_requests(path):
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            state_input = json.loads(line)
+            missing = [k for k in REQUIRED_KEYS if k not in state_input]
+            if missing:
+                raise ValueError(f"{path}:{line_no}: missing keys {missing}")
+            requests.append(state_input)
+    return requests
+
+
+async def run_one(agent, index, state_input, articles=None, options=None):
+    """Run one request; with an `ArticleStore` as `articles` the finished article is saved there too."""
+    from metrics import NodeMetrics
+    from pipeline import arun, result_summary
+
+    record = {"index": index, "input": state_input}
+    metrics = NodeMetrics(run_id=str(index))
+    start = time.perf_counter()
+    try:
+        config = {"callbacks": [metrics], "metadata": {"priority": "batch"}}
+        final = await arun(agent, state_input, config=config)
+        record.update(result_summary(final))
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed"] = round(time.perf_counter() - start, 3)
+    record["metrics"] = metrics.records()
+    if articles is not None and "error" not in record:
+        from article_store import article_record
+        from checkpoints import new_thread_id
+
+        record["id"] = new_thread_id()
+        articles.add(article_record(record["id"], final, record["metrics"], options, record["elapsed"]))
+    return record
+
+
+def quality_summary(reviews) -> dict:
+    """Mean overall score and sub-scores over the structured reviews of a batch."""
+    from nodes import REVIEW_CRITERIA
+
+    reviews = [r for r in reviews if r]
+    summary = {"reviewed": len(reviews)}
+    for key in ("score",) + REVIEW_CRITERIA:
+        values = [r[key] for r in reviews if r.get(key) is not None]
+        summary[f"mean_{key}"] = round(sum(values) / len(values), 3) if values else None
+    return summary
+
+
+async def run_batch(agent, requests, out_path, concurrency=4, metrics_path=None, articles=None, options=None):
+    """Run every request through the async `agent` with at most `concurrency` in flight.
+
+    Results are appended to `out_path` in completion order, per-node metrics
+    to `metrics_path` (JSON lines) when given, articles to the `articles`
+    store when given. Returns a summary dict with the
+    wall time, throughput and review scores of the whole batch, plus every
+    per-node metric record under "node_metrics".
+    """
+    from metrics import write_jsonl
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index, state_input):
+        async with semaphore:
+            return await run_one(agent, index, state_input, articles, options)
+
+    start = time.perf_counter()
+    done = failed = 0
+    all_metrics, reviews = [], []
+    revised = revision_passes = 0
+    with open(out_path, "w", encoding="utf-8") as out:
+        tasks = [limited(i, state_input) for i, state_input in enumerate(requests)]
+        for task in asyncio.as_completed(tasks):
+            record = await task
+            node_metrics = record.pop("metrics")
+            all_metrics.extend(node_metrics)
+            reviews.append(record.get("review"))
+            # Every pass of the run is in `revisions` (the graph appends them), not only the last one
+            revised += any(r["applied"] for r in record.get("revisions", []))
+            revision_passes += len(record.get("revisions", []))
+            if metrics_path:
+                write_jsonl(node_metrics, metrics_path)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            done += 1
+            failed += "error" in record
+            status = "FAILED" if "error" in record else "ok"
+            print(f"[{done}/{len(requests)}] #{record['index']} {status} in {record['elapsed']}s", file=sys.stderr)
+
+    wall = time.perf_counter() - start
+    return {
+        "node_metrics": all_metrics,
+        "articles": done,
+        "failed": failed,
+        "concurrency": concurrency,
+        "wall_time": round(wall, 3),
+        "articles_per_minute": round(done / wall * 60, 2) if wall else 0.0,
+        "quality": {**quality_summary(reviews), "revised": revised, "revision_passes": revision_passes},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate articles in batch from a JSONL file of inputs.")
+    parser.add_argument("input", help="JSONL file, one state_input dict per line")
+    parser.add_argument("output", help="JSONL file the results are streamed to")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of graph runs in flight")
+    parser.add_argument("--model", default=None, help="Groq model name")
+    parser.add_argument("--small-model", default=None,
+                        help="Model for the Editor and Reviewer, escalating to --model on invalid answers "
+                             "('' = --model everywhere)")
+    parser.add_argument("--editor-mode", default=DEFAULT_EDITOR_MODE, choices=EDITOR_MODES,
+                        help="LLM Editor, rule-based formatter, or formatter with LLM fallback")
+    parser.add_argument("--topology", default="chain", choices=("chain", "parallel"),
+                        help="Run Editor and Reviewer one after the other or side by side")
+    parser.add_argument("--writer-mode", default="single", choices=("single", "sections", "variants"),
+                        help="Write the article in one call, every planned section concurrently, "
+                             "or as several reviewed drafts keeping the best")
+    parser.add_argument("--variants", type=int, default=3, help="Drafts per article with --writer-mode variants")
+    parser.add_argument("--metrics", default=None, help="JSONL file per-node metrics are appended to")
+    parser.add_argument("--prometheus", default=None, help="Write aggregated Prometheus text metrics to this file")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests-per-minute budget for the Groq scheduler")
+    parser.add_argument("--tpm", type=int, default=None, help="Tokens-per-minute budget for the Groq scheduler")
+    parser.add_argument("--cache", default=None, help="SQLite file caching LLM responses across runs")
+    parser.add_argument("--revise-below", type=float, default=None,
+                        help="Send articles scoring under this back for find/replace revisions")
+    parser.add_argument("--max-revisions", type=int, default=2, help="Revision passes per article")
+    parser.add_argument("--plans", default=None,
+                        help="SQLite plan index: reuse the plans of near-duplicate briefs across runs")
+    parser.add_argument("--plan-threshold", type=float, default=REUSE_THRESHOLD,
+                        help="Minimum TF-IDF similarity for reusing a plan from --plans")
+    parser.add_argument("--templates", default=None,
+                        help="SQLite file of plan skeletons (see plan_templates.py) the Organizer starts from")
+    parser.add_argument("--template-mode", default="fill", choices=("fill", "fast"),
+                        help="fill: one short call for the specifics; fast: no Organizer call")
+    parser.add_argument("--no-guard", action="store_true",
+                        help="Skip the local plan / draft checks that redo a failed Organizer or Writer")
+    parser.add_argument("--redo-length", action="store_true",
+                        help="Rewrite drafts far off the target length once (by default they are only flagged)")
+    parser.add_argument("--store", default=None,
+                        help="SQLite article store finished articles are saved to (see article_store.py)")
+    parser.add_argument("--content-budget", type=int, default=None,
+                        help=f"Trim each request's content sent to the Organizer/Writer to this many tokens "
+                             f"(e.g. {CONTENT_TOKENS}; default: sent whole)")
+    parser.add_argument("--article-budget", type=int, default=None,
+                        help=f"Trim the draft sent to the Reviewer to this many tokens (e.g. {ARTICLE_TOKENS})")
+    args = parser.parse_args(argv)
+    if args.writer_mode == "variants" and args.topology == "parallel":
+        parser.error("--writer-mode variants reviews every draft itself; it needs --topology chain")
+
+    requests = load_requests(args.input)
+
+    from pipeline import DEFAULT_MODEL, SMALL_MODEL, build_graph, make_router
+    from prompt_budget import PromptBudget
+    from guards import GuardPolicy
+    from revision import RevisionPolicy
+    from variants import VariantPolicy
+
+    cache = None
+    if args.cache:
+        from llm_cache import SQLiteLLMCache
+        cache = SQLiteLLMCache(args.cache)
+
+    from scheduler import RateLimitScheduler
+
+    # The scheduler sizes LLM concurrency adaptively below the --concurrency graph runs
+    scheduler = RateLimitScheduler(max_concurrency=max(1, args.concurrency) * 2, rpm=args.rpm, tpm=args.tpm)
+    small_model = SMALL_MODEL if args.small_model is None else args.small_model
+    router = make_router(args.model or DEFAULT_MODEL, small_model, cache=cache, scheduler=scheduler)
+    budget = PromptBudget(content_tokens=args.content_budget, article_tokens=args.article_budget)
+    plans = None
+    if args.plans:
+        from plan_index import PlanIndex
+        plans = PlanIndex(args.plans, threshold=args.plan_threshold)
+    templates = None
+    if args.templates:
+        from plan_templates import PlanTemplates
+        templates = PlanTemplates(args.templates)
+    revision = None
+    if args.revise_below is not None:
+        revision = RevisionPolicy(threshold=args.revise_below, max_revisions=args.max_revisions)
+    agent = build_graph(router, use_async=True, editor_mode=args.editor_mode,
+                        topology=args.topology, writer_mode=args.writer_mode, budget=budget,
+                        revision=revision, plans=plans, templates=templates,
+                        template_mode=args.template_mode,
+                        guard=None if args.no_guard else GuardPolicy(redo_length=args.redo_length),
+                        variants=VariantPolicy(n=args.variants))
+    articles = None
+    if args.store:
+        from article_store import ArticleStore
+        articles = ArticleStore(args.store)
+    options = {"model": args.model or DEFAULT_MODEL, "editor_mode": args.editor_mode, "topology": args.topology,
+               "writer_mode": args.writer_mode}
+    summary = asyncio.run(run_batch(agent, requests, args.output, concurrency=max(1, args.concurrency),
+                                    metrics_path=args.metrics, articles=articles, options=options))
+    node_metrics = summary.pop("node_metrics")
+    if args.prometheus:
+        from metrics import prometheus_text
+        with open(args.prometheus, "w", encoding="utf-8") as f:
+            f.write(prometheus_text(node_metrics))
+    summary["scheduler"] = scheduler.snapshot()
+    summary["escalations"] = router.stats()
+    summary["prompt_budget"] = budget.stats()
+    if cache:
+        summary["cache"] = cache.stats()
+    if plans:
+        summary["plans"] = plans.stats()
+    if templates:
+        summary["templates"] = templates.stats()
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
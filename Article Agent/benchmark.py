@@ -0,0 +1,113 @@
+"""Offline throughput / latency benchmark of the article graph.
+
+Runs the compiled graph (the same `pipeline.build_graph` the app and
+Raw_Agent use) against the local `fake_groq` server at several concurrency
+levels and reports p50/p95/p99 per-article latency and articles/minute.
+No API key or network needed, so orchestration regressions show up in CI:
+
+    python benchmark.py --articles 40 --concurrency 1,4,16 --latency 0.2
+    python benchmark.py --json --max-p95 5.0   # exit 1 if p95 regresses
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+
+from fake_groq import FakeGroqServer
+
+SAMPLE_INPUT = {
+    "subject": "📈 Economics",
+    "length": 1200,
+    "target": "👔 Professional",
+    "content": "Why small, fast experiments beat big yearly plans.",
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def run_level(agent, articles, concurrency):
+    from pipeline import arun
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await arun(agent, {**SAMPLE_INPUT, "content": f"{SAMPLE_INPUT['content']} #{i}"})
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(articles)))
+    wall = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "articles": articles,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "articles_per_minute": round(len(latencies) / wall * 60, 1) if wall else 0.0,
+        **{f"p{p}_s": round(percentile(latencies, p), 3) if latencies else None for p in (50, 95, 99)},
+    }
+
+
+def run_benchmark(levels, articles=20, latency=0.2, token_rate=500.0, error_rate=0.0, **graph_options):
+    """Benchmark every concurrency level against a fresh fake server; returns one result dict per level."""
+    from pipeline import build_graph, make_llm
+
+    results = []
+    with FakeGroqServer(latency=latency, token_rate=token_rate, error_rate=error_rate, seed=0) as server:
+        for level in levels:
+            # A fresh client per level: the async HTTP pool is bound to its event loop
+            llm = make_llm(base_url=server.url, api_key="fake", max_retries=2)
+            agent = build_graph(llm, use_async=True, **graph_options)
+            results.append(asyncio.run(run_level(agent, articles, level)))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the article graph against a local fake Groq server.")
+    parser.add_argument("--articles", type=int, default=20, help="Articles per concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake time to first token (s)")
+    parser.add_argument("--token-rate", type=float, default=500.0, help="Fake completion tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake 429/500 responses")
+    parser.add_argument("--editor-mode", default="llm", choices=("llm", "local", "local-then-llm-if-needed"))
+    parser.add_argument("--topology", default="chain", choices=("chain", "parallel"))
+    parser.add_argument("--writer-mode", default="single", choices=("single", "sections"))
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--max-p95", type=float, default=None, help="Exit 1 if any level's p95 exceeds this (s)")
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    results = run_benchmark(levels, articles=args.articles, latency=args.latency, token_rate=args.token_rate,
+                            error_rate=args.error_rate, editor_mode=args.editor_mode,
+                            topology=args.topology, writer_mode=args.writer_mode)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'conc':>5} {'articles':>8} {'errors':>6} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'art/min':>8}")
+        for r in results:
+            print(f"{r['concurrency']:>5} {r['articles']:>8} {r['errors']:>6} {r['p50_s']:>7} "
+                  f"{r['p95_s']:>7} {r['p99_s']:>7} {r['articles_per_minute']:>8}")
+
+    if args.max_p95 is not None and any((r["p95_s"] or math.inf) > args.max_p95 for r in results):
+        print(f"p95 above {args.max_p95}s", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Command-line entry point: generate articles from scripts or cron, no Streamlit needed.
+
+    python cli.py generate --subject "📈 Economics" --target "👔 Professional" --length 1200 --content-file notes.txt
+    python cli.py generate --input requests.jsonl --concurrency 8 > articles.jsonl
+
+Progress goes to stderr: finished nodes and, for a single article, the
+Writer / Editor tokens as they are generated. Stdout only gets JSON: one
+object for a single article, one line per article (in completion order) for
+an `--input` file of state_input dicts (see `batch.py`). The exit status is 1
+when an article failed.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from markdown_formatter import DEFAULT_EDITOR_MODE, EDITOR_MODES
+
+
+def generate_one(agent, state_input, quiet=False, articles=None, options=None) -> dict:
+    """Run one article with `stream_run`, echoing its progress to stderr."""
+    from metrics import NodeMetrics
+    from pipeline import merge_update, result_summary, stream_run
+
+    final = dict(state_input)
+    metrics = NodeMetrics()
+    start = time.perf_counter()
+    streaming = None
+    for kind, node, val in stream_run(agent, state_input, config={"callbacks": [metrics]}):
+        if kind == "token":
+            if not quiet:
+                if node != streaming:
+                    print(f"\n--- {node} ---", file=sys.stderr)
+                    streaming = node
+                sys.stderr.write(val)
+                sys.stderr.flush()
+            continue
+        merge_update(final, val)
+        if streaming:
+            sys.stderr.write("\n")
+            streaming = None
+        print(f"{node} done ⚙️", file=sys.stderr)
+    record = {"input": state_input, **result_summary(final), "elapsed": round(time.perf_counter() - start, 3)}
+    if articles is not None:
+        from article_store import article_record
+        from checkpoints import new_thread_id
+
+        record["id"] = new_thread_id()
+        articles.add(article_record(record["id"], final, metrics.records(), options, record["elapsed"]))
+    return record
+
+
+async def generate_many(agent, requests, concurrency=4, articles=None, options=None) -> int:
+    """Run `requests` with at most `concurrency` in flight, one JSON line each on stdout; returns the failures."""
+    from batch import run_one
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index, state_input):
+        async with semaphore:
+            return await run_one(agent, index, state_input, articles, options)
+
+    done = failed = 0
+    for task in asyncio.as_completed([limited(i, r) for i, r in enumerate(requests)]):
+        record = await task
+        record.pop("metrics")
+        print(json.dumps(record, ensure_ascii=False), flush=True)
+        done += 1
+        failed += "error" in record
+        status = "FAILED" if "error" in record else "ok"
+        print(f"[{done}/{len(requests)}] #{record['index']} {status} in {record['elapsed']}s", file=sys.stderr)
+    return failed
+
+
+def read_content(args) -> str:
+    if args.content is not None:
+        return args.content
+    if args.content_file == "-":
+        return sys.stdin.read()
+    with open(args.content_file, encoding="utf-8") as f:
+        return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py", description="Generate articles from the command line.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    gen = commands.add_parser("generate", help="Generate one article, or every article of an --input file")
+    gen.add_argument("--subject", help="Topic, e.g. '📈 Economics'")
+    gen.add_argument("--target", help="Audience, e.g. '👔 Professional'")
+    gen.add_argument("--length", type=int, default=1200, help="Target length in characters")
+    gen.add_argument("--content", default=None, help="The core ideas, inline")
+    gen.add_argument("--content-file", default=None, help="File with the core ideas ('-' = stdin)")
+    gen.add_argument("--input", default=None, help="JSONL file of state_input dicts to generate instead")
+    gen.add_argument("--concurrency", type=int, default=4, help="Maximum number of articles in flight with --input")
+    gen.add_argument("--model", default=None, help="Groq model name")
+    gen.add_argument("--small-model", default=None,
+                     help="Model for the Editor and Reviewer ('' = --model everywhere)")
+    gen.add_argument("--editor-mode", default=DEFAULT_EDITOR_MODE, choices=EDITOR_MODES,
+                     help="LLM Editor, rule-based formatter, or formatter with LLM fallback")
+    gen.add_argument("--topology", default="chain", choices=("chain", "parallel"),
+                     help="Run Editor and Reviewer one after the other or side by side")
+    gen.add_argument("--writer-mode", default="single", choices=("single", "sections", "variants"),
+                     help="Write the article in one call, every planned section concurrently, "
+                          "or as several reviewed drafts keeping the best")
+    gen.add_argument("--variants", type=int, default=3, help="Drafts per article with --writer-mode variants")
+    gen.add_argument("--cache", default=None, help="SQLite file caching LLM responses across runs")
+    gen.add_argument("--revise-below", type=float, default=None,
+                     help="Send articles scoring under this back for find/replace revisions")
+    gen.add_argument("--content-budget", type=int, default=None,
+                     help="Trim the notes sent to the Organizer/Writer to this many tokens (default: sent whole)")
+    gen.add_argument("--article-budget", type=int, default=None,
+                     help="Trim the draft sent to the Reviewer to this many tokens")
+    gen.add_argument("--no-guard", action="store_true",
+                     help="Skip the local plan / draft checks that redo a failed Organizer or Writer")
+    gen.add_argument("--redo-length", action="store_true",
+                     help="Rewrite drafts far off the target length once (by default they are only flagged)")
+    gen.add_argument("--store", default=None, help="SQLite article store the articles are saved to")
+    gen.add_argument("--quiet", action="store_true", help="Only report finished nodes on stderr, not tokens")
+    args = parser.parse_args(argv)
+    if args.writer_mode == "variants" and args.topology == "parallel":
+        gen.error("--writer-mode variants reviews every draft itself; it needs --topology chain")
+
+    if args.input:
+        from batch import load_requests
+        requests = load_requests(args.input)
+    elif args.subject and args.target and (args.content is not None or args.content_file):
+        requests = None
+        state_input = {"subject": args.subject, "length": args.length, "target": args.target,
+                       "content": read_content(args)}
+    else:
+        parser.error("generate needs --input, or --subject, --target and --content / --content-file")
+
+    # Heavy imports only once the arguments are known to be fine
+    from pipeline import DEFAULT_MODEL, SMALL_MODEL, PipelineConfig, build_graph
+    from guards import GuardPolicy
+    from prompt_budget import PromptBudget
+    from revision import RevisionPolicy
+    from variants import VariantPolicy
+    from scheduler import RateLimitScheduler
+
+    cache = None
+    if args.cache:
+        from llm_cache import SQLiteLLMCache
+        cache = SQLiteLLMCache(args.cache)
+    concurrency = max(1, args.concurrency) if requests else 1
+    config = PipelineConfig(
+        model=args.model or DEFAULT_MODEL,
+        small_model=SMALL_MODEL if args.small_model is None else args.small_model,
+        cache=cache,
+        scheduler=RateLimitScheduler(max_concurrency=concurrency * 2),
+        use_async=requests is not None,
+        editor_mode=args.editor_mode,
+        topology=args.topology,
+        writer_mode=args.writer_mode,
+        revision=RevisionPolicy(threshold=args.revise_below) if args.revise_below is not None else None,
+        guard=None if args.no_guard else GuardPolicy(redo_length=args.redo_length),
+        variants=VariantPolicy(n=args.variants),
+        budget=PromptBudget(content_tokens=args.content_budget, article_tokens=args.article_budget),
+    )
+    agent = build_graph(config)
+    articles = None
+    if args.store:
+        from article_store import ArticleStore
+        articles = ArticleStore(args.store)
+    options = {"model": config.model, "editor_mode": args.editor_mode, "topology": args.topology,
+               "writer_mode": args.writer_mode}
+
+    if requests is not None:
+        failed = asyncio.run(generate_many(agent, requests, concurrency, articles, options))
+        return 1 if failed else 0
+    try:
+        record = generate_one(agent, state_input, quiet=args.quiet, articles=articles, options=options)
+    except Exception as e:
+        print(json.dumps({"input": state_input, "error": f"{type(e).__name__}: {e}"}, ensure_ascii=False))
+        return 1
+    print(json.dumps(record, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
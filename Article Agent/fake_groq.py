@@ -0,0 +1,232 @@
+"""Local stand-in for the Groq chat-completions API, for offline benchmarks.
+
+Speaks the OpenAI-compatible `/openai/v1/chat/completions` endpoint that
+`ChatGroq(base_url=...)` talks to, including SSE streaming and tool calls.
+Structured-output requests (the Organizer's `State` schema, or any other
+tool / json_schema) are answered with a valid object synthesized from the
+JSON schema, so the whole graph runs end to end without network.
+
+    with FakeGroqServer(latency=0.2, token_rate=400, error_rate=0.02) as server:
+        llm = make_llm(base_url=server.url, api_key="fake")
+
+    python fake_groq.py --port 8765 --latency 0.3   # standalone
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ARTICLE_WORDS = (
+    "data shows that communities adapt faster when leaders explain the tradeoffs clearly and early "
+    "while small experiments reveal what actually works for families and professionals alike"
+).split()
+
+
+def fill_schema(schema: dict, defs: dict = None, name: str = "value"):
+    """Build a plausible instance of a JSON schema."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return fill_schema(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, name)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"] or schema[key]
+            return fill_schema(options[0], defs, name)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type", "object")
+    if kind == "object":
+        props = schema.get("properties", {})
+        return {k: fill_schema(v, defs, k) for k, v in props.items()}
+    if kind == "array":
+        return [fill_schema(schema.get("items", {"type": "string"}), defs, f"{name} {i + 1}") for i in range(3)]
+    if kind == "integer":
+        return int(schema.get("minimum", 1000 if "length" in name else 4))
+    if kind == "number":
+        if "maximum" in schema:
+            # e.g. a 0-5 review score
+            return round(schema["maximum"] * 0.84, 1)
+        return float(schema.get("minimum", 1.0))
+    if kind == "boolean":
+        return True
+    return f"Sample {name.replace('_', ' ')}"
+
+
+def fake_article(words: int) -> str:
+    lines = ["Why Small Experiments Win", ""]
+    sections = max(2, words // 80)
+    per_section = max(10, words // sections)
+    for s in range(sections):
+        lines += [f"Section {s + 1}", ""]
+        body = [ARTICLE_WORDS[(s + i) % len(ARTICLE_WORDS)] for i in range(per_section)]
+        lines += [" ".join(body).capitalize() + ".", ""]
+    return "\n".join(lines)
+
+
+class FakeGroqServer:
+    """Threaded fake chat-completions server with configurable latency, token rate and errors.
+
+    latency       seconds before the first token
+    token_rate    completion tokens per second after that
+    error_rate    probability of answering 429 (rate limited) or 500
+    article_words completion length for free-text calls
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, token_rate=500.0, error_rate=0.0,
+                 article_words=300, seed=None):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.article_words = article_words
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # responses
+
+    def completion(self, body: dict):
+        """(content, tool_calls) for a chat-completions request body."""
+        tools = body.get("tools") or []
+        if tools:
+            fn = tools[0]["function"]
+            args = fill_schema(fn.get("parameters", {}))
+            return None, [{"id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+                           "function": {"name": fn["name"], "arguments": json.dumps(args)}}]
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            return json.dumps(fill_schema(response_format["json_schema"].get("schema", {}))), None
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        if "Rating:" in prompt:
+            return "Rating: 4.2/5\nNote: Clear structure, could use one more concrete example.", None
+        return fake_article(self.article_words), None
+
+    def _handler(server):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    return self._json(404, {"error": {"message": "not found"}})
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    roll = server.random.random()
+
+                if roll < server.error_rate:
+                    time.sleep(server.latency / 4)
+                    if roll < server.error_rate / 2:
+                        return self._json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                                          {"retry-after": "1", "x-ratelimit-remaining-requests": "0"})
+                    return self._json(500, {"error": {"message": "Internal error", "type": "server_error"}})
+
+                content, tool_calls = server.completion(body)
+                text = content if content is not None else tool_calls[0]["function"]["arguments"]
+                tokens = text.split(" ")
+                prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                         "total_tokens": prompt_tokens + len(tokens)}
+                base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "created": int(time.time()),
+                        "model": body.get("model", "fake")}
+                limits = {"x-ratelimit-limit-requests": "14400", "x-ratelimit-remaining-requests": "14000",
+                          "x-ratelimit-limit-tokens": "300000", "x-ratelimit-remaining-tokens": "290000",
+                          "x-ratelimit-reset-requests": "6s", "x-ratelimit-reset-tokens": "2s"}
+
+                time.sleep(server.latency)
+                if body.get("stream"):
+                    return self._stream(base, tokens, tool_calls, usage, limits)
+                time.sleep(len(tokens) / server.token_rate)
+                message = {"role": "assistant", "content": content}
+                if tool_calls:
+                    message["tool_calls"] = tool_calls
+                self._json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [{
+                    "index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}]},
+                    limits)
+
+            def _stream(self, base, tokens, tool_calls, usage, limits):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                for k, v in limits.items():
+                    self.send_header(k, v)
+                self.end_headers()
+
+                def send(delta, finish=None, extra=None):
+                    chunk = {**base, "object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **(extra or {})}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+
+                if tool_calls:
+                    send({"role": "assistant", "tool_calls": [{**tool_calls[0], "index": 0}]})
+                    time.sleep(len(tokens) / server.token_rate)
+                else:
+                    send({"role": "assistant", "content": ""})
+                    for i, token in enumerate(tokens):
+                        time.sleep(1 / server.token_rate)
+                        send({"content": token if i == 0 else " " + token})
+                send({}, "tool_calls" if tool_calls else "stop", {"x_groq": {"usage": usage}})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a fake Groq chat-completions server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=500.0, help="Completion tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 429/500")
+    args = parser.parse_args(argv)
+
+    server = FakeGroqServer(port=args.port, latency=args.latency, token_rate=args.token_rate,
+                            error_rate=args.error_rate)
+    print(f"Fake Groq listening on {server.url} (use base_url={server.url})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Local checks between nodes, so a bad plan or draft does not cost the rest of the run.
+
+With a `GuardPolicy` passed to `pipeline.build_graph`, two LLM-free nodes
+sit in the graph:
+
+- `PlanCheck` after the Organizer checks the plan against `nodes.State`
+  (no plan, empty title or instructions, no outline). A bad plan is asked
+  for again; when it is still bad the run stops there instead of paying the
+  Writer, Editor and Reviewer for an article written from nothing.
+- `DraftCheck` after the Writer measures the draft against the `length`
+  target, leaving it untouched (cleaning it up is the Editor's job). An
+  empty draft is rewritten once. A draft off by more than `length_tolerance`
+  is only noted: models overshoot character targets all the time and a
+  rewrite doubles the Writer's cost. With `redo_length` it is rewritten
+  once too, with the measurement in the prompt; after that it goes on as it is.
+
+Every check adds an entry to the `guard` state list:
+
+    agent = build_graph(llm, guard=GuardPolicy(redo_length=True))
+    final["guard"]  # [{"node": "Organizer", "problems": [], "action": "ok"},
+                    #  {"node": "Writer", "problems": ["1980 characters, target 1200"], "action": "retry", ...}, ...]
+"""
+
+import logging
+from dataclasses import dataclass
+
+from langgraph.graph import END
+
+from markdown_formatter import strip_word_counts
+from nodes import PLAN_ERROR, State
+
+logger = logging.getLogger(__name__)
+
+# Plan fields the Writer cannot do without
+PLAN_FIELDS = ("title", "instructions_for_writer")
+EMPTY_DRAFT = "empty draft"
+
+
+@dataclass
+class GuardPolicy:
+    length_tolerance: float = 0.35  # share of `length` a draft may be off by before it is flagged
+    redo_length: bool = False       # rewrite flagged drafts; otherwise the miss is only noted
+    max_retries: int = 1            # re-asks per checked node and run
+
+
+def plan_problems(plan) -> list:
+    if not isinstance(plan, State):
+        return ["no plan"]
+    problems = [f"empty {field}" for field in PLAN_FIELDS if not getattr(plan, field).strip()]
+    if not plan.steps:
+        problems.append("no outline steps")
+    return problems
+
+
+def draft_problems(text: str, length, tolerance: float) -> list:
+    # Word-count notes are not counted against the length; the Editor removes them
+    text = strip_word_counts(text or "").strip()
+    if not text:
+        return [EMPTY_DRAFT]
+    length = int(length or 0)
+    if length and abs(len(text) - length) > tolerance * length:
+        return [f"{len(text)} characters, target {length}"]
+    return []
+
+
+def _retries(state: dict, node: str) -> int:
+    return sum(1 for entry in state.get("guard") or [] if entry["node"] == node and entry["action"] == "retry")
+
+
+def _action(state: dict, node: str, problems: list, policy: "GuardPolicy", give_up: str) -> str:
+    if not problems:
+        return "ok"
+    if _retries(state, node) < policy.max_retries:
+        return "retry"
+    return give_up
+
+
+def _last(state: dict, node: str) -> dict:
+    return [entry for entry in state.get("guard") or [] if entry["node"] == node][-1]
+
+
+def make_guard_nodes(policy: GuardPolicy) -> dict:
+    def PlanCheck(state: dict) -> dict:
+        problems = plan_problems(state.get("Plan"))
+        action = _action(state, "Organizer", problems, policy, give_up="stop")
+        if problems:
+            logger.warning("Plan check: %s -> %s", ", ".join(problems), action)
+        return {"guard": [{"node": "Organizer", "problems": problems, "action": action}]}
+
+    def DraftCheck(state: dict) -> dict:
+        problems = draft_problems(state.get("Article"), state.get("length"), policy.length_tolerance)
+        if problems and problems != [EMPTY_DRAFT] and not policy.redo_length:
+            action = "note"
+        else:
+            action = _action(state, "Writer", problems, policy, give_up="accept")
+        if problems:
+            logger.warning("Draft check: %s -> %s", ", ".join(problems), action)
+        return {"guard": [{"node": "Writer", "problems": problems, "action": action}]}
+
+    return {"PlanCheck": PlanCheck, "DraftCheck": DraftCheck}
+
+
+def after_plan_check(state: dict, then):
+    """Conditional edge after `PlanCheck`: the Organizer again, END, or `then(state)`."""
+    action = _last(state, "Organizer")["action"]
+    if action == "retry":
+        return "Organizer"
+    if action == "stop":
+        return END
+    return then(state)
+
+
+def unless_plan_error(state: dict, then):
+    """Conditional edge after the Organizer when no guard runs: END on PLAN_ERROR, else `then(state)`."""
+    return END if state.get("Plan") == PLAN_ERROR else then(state)
+
+
+def after_draft_check(state: dict, then, redo=None):
+    """Conditional edge after `DraftCheck`: `redo(state)` (default the Writer) again, or `then` (node name(s))."""
+    if _last(state, "Writer")["action"] == "retry":
+        return redo(state) if redo is not None else "Writer"
+    return then
@@ -0,0 +1,229 @@
+"""Background article jobs, so the Streamlit script never runs the graph itself.
+
+The UI submits a job and gets a job id back; a thread pool shared by every
+session runs the graph and writes progress (finished steps, the live draft
+of the streaming node, metrics, errors) to a SQLite job table. Any session
+can poll a job by id, so a browser refresh or a second click neither
+restarts nor blocks a run, and many editors share one deployment.
+
+Article state itself lives in the run's checkpoint thread (see
+`checkpoints.py`); a job only says which run to advance and how:
+
+    queue = JobQueue(JobStore(), get_graph, workers=4)
+    queue.recover()                                   # requeue jobs cut off by a restart
+    job_id = queue.submit(thread_id, options, "generate", state_input)
+    queue.submit(thread_id, options, "rerun", node="Reviewer")
+    queue.store.get(job_id)  # {"status": "running", "steps": ["Organizer"], "current": "Writer", "draft": "...",
+                             #  "metrics": [{"node": "Organizer", "wall_s": 1.2, ...}], ...}
+
+With an `article_store.ArticleStore` as `articles`, every job that finishes
+its run saves the article there under the run's thread id (a re-run replaces
+it).
+
+One process owns a jobs file: `recover()` takes every job still marked
+running for one cut off by a restart, so two processes sharing the file
+would run each other's jobs again. Give each process its own `path`.
+Workers claim a queued job atomically before running it, so a job queued
+twice (say by `recover()` and `submit()`) still runs once.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from article_store import article_record
+from checkpoints import rerun_input, resume_input, run_status, thread_config
+from metrics import NodeMetrics
+from pipeline import stream_run
+
+logger = logging.getLogger(__name__)
+
+JOBS_PATH = ".article_jobs.sqlite"
+ACTIONS = ("generate", "resume", "rerun")
+FINISHED = ("done", "failed")
+# Minimum seconds between two writes of the live draft
+DRAFT_FLUSH_SECONDS = 0.3
+
+_JSON_FIELDS = ("state_input", "options", "steps", "metrics")
+
+
+class JobStore:
+    """SQLite table of jobs: what to run, and how far it got."""
+
+    def __init__(self, path=JOBS_PATH):
+        self.path = path
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                thread_id TEXT NOT NULL,
+                action TEXT NOT NULL,
+                node TEXT,
+                state_input TEXT,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL,
+                steps TEXT NOT NULL DEFAULT '[]',
+                current TEXT,
+                draft TEXT NOT NULL DEFAULT '',
+                metrics TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at)")
+        self._conn.commit()
+
+    def create(self, thread_id, action, options, state_input=None, node=None) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, thread_id, action, node, state_input, options, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)",
+                (job_id, thread_id, action, node, json.dumps(state_input), json.dumps(options or {}), time.time()),
+            )
+            self._conn.commit()
+        return job_id
+
+    def claim(self, job_id) -> bool:
+        """Mark a queued job running; False when it is not queued (any more)."""
+        with self._db_lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def update(self, job_id, **fields):
+        for key in _JSON_FIELDS:
+            if key in fields:
+                fields[key] = json.dumps(fields[key])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._db_lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id):
+        """The job as a dict (JSON columns decoded), or None for an unknown id."""
+        with self._db_lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for key in _JSON_FIELDS:
+            job[key] = json.loads(job[key]) if job[key] is not None else None
+        return job
+
+    def position(self, job_id) -> int:
+        """Queued jobs submitted before `job_id`."""
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' "
+                "AND created_at < (SELECT created_at FROM jobs WHERE id = ?)", (job_id,)
+            ).fetchone()
+        return row[0]
+
+    def unfinished(self) -> list:
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class JobQueue:
+    """Thread pool running the jobs of a `JobStore` against cached graphs.
+
+    `get_graph(**options)` returns the compiled (checkpointed) graph for a
+    job's graph options; the app passes its cached `get_graph`.
+    """
+
+    def __init__(self, store: JobStore, get_graph, workers=4, priority="interactive", articles=None):
+        self.store = store
+        self.get_graph = get_graph
+        self.priority = priority
+        self.articles = articles
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="article-job")
+
+    def submit(self, thread_id, options, action="generate", state_input=None, node=None) -> str:
+        """Queue `action` on the run `thread_id`; returns the job id to poll."""
+        if action not in ACTIONS:
+            raise ValueError(f"action must be one of {ACTIONS}, got {action!r}")
+        job_id = self.store.create(thread_id, action, options, state_input, node)
+        self._pool.submit(self._run, job_id)
+        return job_id
+
+    def recover(self) -> list:
+        """Requeue jobs left queued or running by a previous process; returns their ids."""
+        job_ids = self.store.unfinished()
+        for job_id in job_ids:
+            self.store.update(job_id, status="queued", current=None, draft="")
+            self._pool.submit(self._run, job_id)
+        return job_ids
+
+    def _graph_input(self, agent, job):
+        if job["action"] == "rerun":
+            return rerun_input(job["node"])
+        if job["action"] == "resume" or run_status(agent, job["thread_id"])["values"]:
+            # A generate job cut off by a restart continues from its checkpoint
+            return resume_input()
+        return job["state_input"]
+
+    def _run(self, job_id):
+        if not self.store.claim(job_id):
+            return  # another worker has it, or it finished
+        job = self.store.get(job_id)
+        started = job["started_at"]
+        metrics = NodeMetrics(run_id=job_id)
+        steps, draft, draft_node, flushed = [], "", None, 0.0
+        try:
+            agent = self.get_graph(**job["options"])
+            config = thread_config(job["thread_id"], {
+                "callbacks": [metrics],
+                "metadata": {"priority": self.priority, "graph_options": job["options"]},
+            })
+            for kind, key, val in stream_run(agent, self._graph_input(agent, job), config=config):
+                if kind == "token":
+                    if key != draft_node:
+                        draft, draft_node = "", key
+                    draft += val
+                    if time.perf_counter() - flushed > DRAFT_FLUSH_SECONDS:
+                        self.store.update(job_id, current=key, draft=draft, metrics=metrics.records())
+                        flushed = time.perf_counter()
+                    continue
+                steps.append(key)
+                # Metrics so far, so the page can show each step's time and tokens as it finishes
+                self.store.update(job_id, steps=steps, current=None, draft="", metrics=metrics.records())
+                draft, draft_node = "", None
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            self.store.update(job_id, status="failed", error=f"{type(e).__name__}: {e}", current=None,
+                              draft="", metrics=metrics.records(), finished_at=time.time())
+            return
+        finished = time.time()
+        self.store.update(job_id, status="done", metrics=metrics.records(), finished_at=finished)
+        if self.articles is not None:
+            self._save_article(agent, job, metrics.records(), finished - started)
+
+    def _save_article(self, agent, job, records, elapsed):
+        status = run_status(agent, job["thread_id"])
+        if status["pending"] or not status["values"].get("Result"):
+            return  # stopped early (bad plan...), nothing to keep
+        try:
+            record = article_record(job["thread_id"], status["values"], records, job["options"], round(elapsed, 3))
+            self.articles.add(record)
+        except Exception:
+            # The article is still in its checkpoint; a failed save must not fail the job
+            logger.exception("Job %s: article not saved", job["id"])
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
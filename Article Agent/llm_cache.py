@@ -0,0 +1,297 @@
+"""Content-addressed response cache for the LLM calls made by the graph nodes.
+
+Both backends plug into LangChain's cache hook (`ChatGroq(cache=...)`, see
+`pipeline.make_llm`), so a hit returns the stored generations and the Groq call
+is skipped entirely. Entries are keyed on the model configuration (model name,
+temperature, bound tools, ...) and a whitespace-normalized hash of the messages.
+
+    cache = SQLiteLLMCache(".article_cache.sqlite", ttl=7 * 24 * 3600, max_bytes=200_000_000)
+    llm = make_llm(cache=cache)
+    ...
+    cache.stats()  # {"hits": 3, "misses": 4, "saved_tokens": ..., "saved_seconds": ...}
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.runnables.config import run_in_executor
+
+# (cache key, start) of this thread's / task's last miss, to time the real call that follows it.
+# One call runs at a time per context, so concurrent misses on the same key don't mix, and a
+# failed call leaves nothing behind: the next miss in the context replaces it.
+_CALL_START = contextvars.ContextVar("llm_cache_call_start", default=None)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{llm_string}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+def _model_name(llm_string: str) -> str:
+    # llm_string is "<serialized model json>---<sorted call params>"
+    try:
+        kwargs = json.loads(llm_string.split("---", 1)[0]).get("kwargs", {})
+        return kwargs.get("model_name") or kwargs.get("model") or ""
+    except (ValueError, AttributeError):
+        return ""
+
+
+def _generation_tokens(generations) -> int:
+    total = 0
+    for gen in generations:
+        message = getattr(gen, "message", None)
+        usage = getattr(message, "usage_metadata", None) or {}
+        legacy = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        total += usage.get("total_tokens") or legacy.get("total_tokens") or 0
+    return total
+
+
+def _mark_hit(generations):
+    # Lets callbacks (see metrics.py) tell cached responses from real calls
+    for gen in generations:
+        gen.generation_info = {**(gen.generation_info or {}), "cache_hit": True}
+    return generations
+
+
+class _CacheStats:
+    """Hit/miss counters plus the tokens and seconds the hits saved.
+
+    Backends implement `_get(key)` -> (value, tokens, seconds) or None, and
+    `_put(key, llm_string, return_val, seconds)`. The async methods only run
+    those in an executor; counting and call timing stay in the caller's context.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.saved_tokens = 0
+        self.saved_seconds = 0.0
+
+    def lookup(self, prompt, llm_string):
+        key = cache_key(prompt, llm_string)
+        return self._found(key, self._get(key))
+
+    async def alookup(self, prompt, llm_string):
+        key = cache_key(prompt, llm_string)
+        return self._found(key, await run_in_executor(None, self._get, key))
+
+    def update(self, prompt, llm_string, return_val):
+        key = cache_key(prompt, llm_string)
+        self._put(key, llm_string, return_val, self._call_seconds(key))
+
+    async def aupdate(self, prompt, llm_string, return_val):
+        key = cache_key(prompt, llm_string)
+        await run_in_executor(None, self._put, key, llm_string, return_val, self._call_seconds(key))
+
+    def _found(self, key, row):
+        if row is None:
+            self._record_miss(key)
+            return None
+        value, tokens, seconds = row
+        self._record_hit(tokens, seconds)
+        return _mark_hit(loads(value, allowed_objects="core"))
+
+    def _record_hit(self, tokens, seconds):
+        with self._lock:
+            self.hits += 1
+            self.saved_tokens += tokens
+            self.saved_seconds += seconds
+
+    def _record_miss(self, key):
+        with self._lock:
+            self.misses += 1
+        _CALL_START.set((key, time.perf_counter()))
+
+    def _call_seconds(self, key):
+        pending = _CALL_START.get()
+        if pending is None or pending[0] != key:
+            return 0.0
+        _CALL_START.set(None)
+        return time.perf_counter() - pending[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "saved_tokens": self.saved_tokens,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+class SQLiteLLMCache(_CacheStats, BaseCache):
+    """SQLite-backed cache with TTL expiry and LRU eviction by entry count / payload size."""
+
+    def __init__(self, path=".article_cache.sqlite", ttl=None, max_entries=None, max_bytes=None):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                tokens INTEGER NOT NULL DEFAULT 0,
+                seconds REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+
+    def _get(self, key):
+        now = time.time()
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT value, tokens, seconds, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl is not None and now - row[3] > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row:
+                self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        return row[:3] if row else None
+
+    def _put(self, key, llm_string, return_val, seconds):
+        value = dumps(return_val)
+        now = time.time()
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, _model_name(llm_string), value, len(value), _generation_tokens(return_val),
+                 seconds, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        if self.max_entries is not None:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        if self.max_bytes is not None:
+            # Keep the most recently used entries whose cumulative size fits the budget
+            self._conn.execute(
+                """DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC) AS running FROM llm_cache
+                    ) WHERE running > ?
+                )""",
+                (self.max_bytes,),
+            )
+
+    def clear(self, **kwargs):
+        with self._db_lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._db_lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return {**stats, "entries": entries, "bytes": size}
+
+
+class DiskLLMCache(_CacheStats, BaseCache):
+    """One JSON file per entry under `directory`; the file mtime doubles as the LRU clock."""
+
+    def __init__(self, directory=".article_cache", ttl=None, max_entries=None, max_bytes=None):
+        super().__init__()
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._dir_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            entry = None
+        if entry and self.ttl is not None and time.time() - entry["created_at"] > self.ttl:
+            self._remove(path)
+            entry = None
+        if not entry:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted meanwhile; the entry read is still good
+        return entry["value"], entry.get("tokens", 0), entry.get("seconds", 0.0)
+
+    def _put(self, key, llm_string, return_val, seconds):
+        entry = {
+            "model": _model_name(llm_string),
+            "value": dumps(return_val),
+            "tokens": _generation_tokens(return_val),
+            "seconds": seconds,
+            "created_at": time.time(),
+        }
+        tmp = self._path(key) + f".{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, os.path.join(self.directory, name)))
+        return sorted(entries, reverse=True)  # most recently used first
+
+    def _evict(self):
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        with self._dir_lock:
+            running = 0
+            for count, (mtime, size, path) in enumerate(self._entries(), 1):
+                running += size
+                if ((self.max_entries is not None and count > self.max_entries)
+                        or (self.max_bytes is not None and running > self.max_bytes)):
+                    self._remove(path)
+
+    def clear(self, **kwargs):
+        with self._dir_lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {**super().stats(), "entries": len(entries), "bytes": sum(size for _, size, _ in entries)}
@@ -0,0 +1,221 @@
+"""Rule-based Markdown formatter: the Editor node's rules without the LLM round-trip.
+
+Applies the same rules the Editor prompt spells out:
+- clear, hierarchical headings (one H1 title, H2 sections, H3 sub-sections)
+- bullet points for lists
+- remove word-count notes ("≈120 words") and meta-commentary
+- keep the text itself untouched (no content is added or rewritten)
+
+`needs_llm()` tells the "local-then-llm-if-needed" editor mode when the draft
+has too little structure to recover locally.
+"""
+
+import re
+
+EDITOR_MODES = ("llm", "local", "local-then-llm-if-needed")
+# What the app, cli.py, batch.py and api.py run unless told otherwise
+DEFAULT_EDITOR_MODE = "local-then-llm-if-needed"
+
+# Word-count notes: "(≈120 words)" / "[Word count: 450]" closing a line, "~150 words" on a line of its own,
+# "## Introduction – 200 words" on a heading. Counts inside a sentence are content and stay.
+_COUNT = r"(?:≈|~|approx\.?|approximately|about|around)?\s*\d[\d,]*(?:\s*[-–]\s*\d[\d,]*)?\s*(?:words?|characters?|chars?)"
+_LABEL = r"(?:(?:total\s+)?(?:word|character)\s*count\s*:?\s*)"
+# Up to the end of the line, or to the closing ** of a bold heading
+_LINE_END = r"(?=\s*(?:\*\*|__)?\s*:?\s*$)"
+WORD_COUNT_RE = re.compile(rf"\s*[\(\[]\s*{_LABEL}?{_COUNT}\s*[\)\]]{_LINE_END}", re.IGNORECASE | re.M)
+HEADING_COUNT_RE = re.compile(rf"\s+[-–—]\s*{_COUNT}{_LINE_END}", re.IGNORECASE | re.M)
+WORD_COUNT_LINE_RE = re.compile(
+    rf"^\s*[\(\[]?\s*(?:{_LABEL}[≈~]?\s*\d[\d,]*.*|{_COUNT})\s*[\)\]]?\s*$", re.IGNORECASE)
+
+# Chatty lead-ins / sign-offs the models wrap around the article (first / last lines only)
+META_LINE_RE = re.compile(
+    r"^\s*(?:sure|certainly|of course|absolutely)\s*[!.,]?\s*(?:$|(?:here|below|i['’]d|i'll|i will|i can)\b.*$)"
+    r"|^\s*here(?:'s| is)\b.*\b(?:article|draft|version|text)\b.*:?\s*$"
+    r"|^\s*(?:i hope|let me know|feel free)\b.*$"
+    r"|^\s*\(?note\s*:.*\b(?:words?|characters?|length)\b.*$",
+    re.IGNORECASE,
+)
+
+BULLET_RE = re.compile(r"^(\s*)(?:[•●▪◦‣–—*+]|-(?!-))\s+")
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+TITLE_PREFIX_RE = re.compile(r"^\s*(?:title|headline)\s*:\s*", re.IGNORECASE)
+BOLD_LINE_RE = re.compile(r"^\s*(\*\*|__)(.+?)\1\s*:?\s*$")
+# Lines that are Markdown blocks of their own, never headings: numbered items, quotes, table rows, code
+BLOCK_LINE_RE = re.compile(r"^\s*(?:\d+[.)]\s|>|\||```|~~~)|^(?: {4}|\t)")
+FENCE_RE = re.compile(r"^\s*(?:```|~~~)")
+SENTENCE_END_RE = re.compile(r"[.!?…](?=\s|$)")
+
+MAX_HEADING_CHARS = 90
+MAX_HEADING_WORDS = 12
+# Longer lines are content even when they open with "Sure," or "Here is"
+MAX_META_CHARS = 160
+
+
+def trim_to(text: str, limit: int) -> str:
+    """Cut `text` at the last sentence end before `limit` characters."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    ends = [m.end() for m in SENTENCE_END_RE.finditer(cut)]
+    return cut[:ends[-1]] if ends else cut.rsplit(" ", 1)[0]
+
+
+def _strip_count(line: str) -> str:
+    line = WORD_COUNT_RE.sub("", line)
+    if HEADING_RE.match(line) or BOLD_LINE_RE.match(line):
+        line = HEADING_COUNT_RE.sub("", line)
+    return line.rstrip()
+
+
+def strip_word_counts(text: str) -> str:
+    lines = [line for line in text.splitlines() if not WORD_COUNT_LINE_RE.match(line)]
+    return "\n".join(_strip_count(line) for line in lines)
+
+
+def _is_meta(line: str) -> bool:
+    return len(line.strip()) <= MAX_META_CHARS and bool(META_LINE_RE.match(line))
+
+
+def strip_meta(text: str) -> str:
+    """Drop short chatty lines wrapped around the draft; the same words inside it are content."""
+    lines = text.splitlines()
+    start, end = 0, len(lines)
+    while start < end and (not lines[start].strip() or _is_meta(lines[start])):
+        start += 1
+    while end > start and (not lines[end - 1].strip() or _is_meta(lines[end - 1])):
+        end -= 1
+    # Blank lines at the edges go only when a meta line went with them
+    start = start if any(_is_meta(line) for line in lines[:start]) else 0
+    end = end if any(_is_meta(line) for line in lines[end:]) else len(lines)
+    return "\n".join(lines[start:end])
+
+
+def _is_heading_candidate(line: str, prev_blank: bool, next_blank: bool, question=False) -> bool:
+    # A short standalone line without sentence punctuation, e.g. "Introduction"
+    stripped = line.strip().rstrip(":")
+    if not stripped or not (prev_blank or next_blank):
+        return False
+    if len(stripped) > MAX_HEADING_CHARS or len(stripped.split()) > MAX_HEADING_WORDS:
+        return False
+    if BULLET_RE.match(line) or BLOCK_LINE_RE.match(line):
+        return False
+    # A question on its own line is a hook, unless it is set in bold
+    return stripped[-1] not in (".!,;" if question else ".!,;?")
+
+
+def _title_cased(text: str) -> bool:
+    words = [w for w in text.split() if len(w) > 3 and w[0].isalpha()]
+    return bool(words) and all(w[0].isupper() for w in words)
+
+
+def _is_body(line) -> bool:
+    # A paragraph or list item the heading would introduce
+    if line is None or HEADING_RE.match(line) or BOLD_LINE_RE.match(line):
+        return False
+    if BULLET_RE.match(line) or re.match(r"^\s*\d+[.)]\s", line):
+        return True
+    return bool(SENTENCE_END_RE.search(line)) or len(line.strip()) > MAX_HEADING_CHARS
+
+
+def _has_heading_signal(line: str, prev_blank: bool, following, first=False) -> bool:
+    """A short plain line is only a heading when it opens a block, not because it is short.
+
+    Signals: the draft's first line (its title), a title-cased "Label:" line,
+    or a line starting a block that a paragraph or list follows. "Thanks for
+    reading" at the end, or "The 2024 budget: 200 words" (a colon inside),
+    stay text.
+    """
+    stripped = line.strip()
+    if first:
+        return True
+    if not prev_blank:
+        return False
+    if stripped.endswith(":") and _title_cased(stripped[:-1]):
+        return True
+    if ":" in stripped.rstrip(":"):
+        return False
+    return _is_body(following)
+
+
+def format_markdown(text: str) -> str:
+    """Return `text` as clean, hierarchical Markdown."""
+    text = strip_meta(strip_word_counts(text.replace("\r\n", "\n")))
+    lines = text.split("\n")
+
+    # Next non-blank line after each line, for the "a paragraph follows" heading signal
+    following, upcoming = [None] * len(lines), None
+    for i in range(len(lines) - 1, -1, -1):
+        following[i] = upcoming
+        if lines[i].strip():
+            upcoming = lines[i]
+
+    out = []
+    seen_heading = False
+    in_code = False
+    for i, raw in enumerate(lines):
+        line = raw.rstrip()
+        if FENCE_RE.match(line) or in_code:
+            # Code blocks are kept verbatim
+            in_code = in_code != bool(FENCE_RE.match(line))
+            out.append(line)
+            continue
+        if not line.strip():
+            out.append("")
+            continue
+        prev_blank = i == 0 or not lines[i - 1].strip()
+        next_blank = i == len(lines) - 1 or not lines[i + 1].strip()
+
+        heading = HEADING_RE.match(line)
+        bold = BOLD_LINE_RE.match(line)
+        if heading:
+            level, title = len(heading.group(1)), heading.group(2)
+        elif TITLE_PREFIX_RE.match(line) and not seen_heading:
+            level, title = 1, TITLE_PREFIX_RE.sub("", line).strip()
+        elif bold and _is_heading_candidate(bold.group(2), prev_blank, next_blank, question=True):
+            level, title = 1, bold.group(2).strip()
+        elif (_is_heading_candidate(line, prev_blank, next_blank)
+              and _has_heading_signal(line, prev_blank, following[i], first=not any(out))):
+            # The first one is the title; then "Label:" lines are sub-sections, other short lines sections
+            level = 2 if seen_heading else 1
+            if seen_heading and line.strip().endswith(":"):
+                level = 3
+            title = line.strip().rstrip(":")
+        else:
+            out.append(BULLET_RE.sub(r"\1- ", line))
+            continue
+
+        # Only the first heading of the draft can be the H1; a later one is at least H2
+        if level == 1 and seen_heading:
+            level = 2
+        seen_heading = True
+        out.extend(["", f"{'#' * min(level, 3)} {title}", ""])
+
+    # Collapse blank runs and trim
+    text = re.sub(r"\n{3,}", "\n\n", "\n".join(out)).strip()
+    return text + "\n"
+
+
+def structure_report(markdown: str) -> dict:
+    lines = markdown.splitlines()
+    headings = [line for line in lines if HEADING_RE.match(line)]
+    paragraphs = [p for p in re.split(r"\n\s*\n", markdown) if p.strip() and not HEADING_RE.match(p.strip())]
+    return {
+        "h1": sum(1 for h in headings if h.startswith("# ")),
+        "sections": sum(1 for h in headings if h.startswith("## ")),
+        "paragraphs": len(paragraphs),
+        "longest_paragraph": max((len(p) for p in paragraphs), default=0),
+        "leftover_notes": bool(WORD_COUNT_RE.search(markdown)) or any(HEADING_COUNT_RE.search(h) for h in headings),
+    }
+
+
+def needs_llm(markdown: str) -> bool:
+    """True when the local pass could not recover a usable structure."""
+    report = structure_report(markdown)
+    if len(markdown) < 400:
+        return False
+    return (
+        report["h1"] != 1
+        or report["sections"] < 2
+        or report["longest_paragraph"] > 1500
+        or report["leftover_notes"]
+    )
@@ -0,0 +1,209 @@
+"""Per-node latency, token and cost instrumentation for graph runs.
+
+Attach a `NodeMetrics` collector as a LangChain callback when running the
+graph and it records, for every node: wall time, time to first token, LLM
+calls, prompt/completion tokens (from the Groq usage metadata), retries and
+cache hits.
+
+    metrics = NodeMetrics(run_id="article-42")
+    agent.invoke(state_input, config={"callbacks": [metrics]})
+    metrics.records()             # one dict per node
+    write_jsonl(metrics.records(), "metrics.jsonl")
+    prometheus_text(all_records)  # text exposition format
+"""
+
+import json
+import threading
+import time
+import uuid
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+FIELDS = ("wall_s", "ttft_s", "llm_calls", "prompt_tokens", "completion_tokens", "retries", "cache_hits")
+
+
+def _usage(response):
+    """(prompt, completion) tokens from an LLMResult, newest metadata first."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for gen in generations:
+            message = getattr(gen, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+                continue
+            legacy = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+            prompt += legacy.get("prompt_tokens", 0)
+            completion += legacy.get("completion_tokens", 0)
+    return prompt, completion
+
+
+def _cache_hit(response):
+    # llm_cache marks the generations it returns
+    return any((gen.generation_info or {}).get("cache_hit") for gens in response.generations for gen in gens)
+
+
+class NodeMetrics(BaseCallbackHandler):
+    """Callback handler collecting per-node metrics for one graph run."""
+
+    # Record timestamps on the calling thread, not from an executor
+    run_inline = True
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._nodes = {}         # node -> aggregated metrics
+        self._node_runs = {}     # callback run_id of a node invocation -> (node, start)
+        self._llm_runs = {}      # callback run_id of an LLM call -> (node, start, first token seen)
+
+    def _node(self, name):
+        if name not in self._nodes:
+            self._nodes[name] = {"first_start": None, "spans": [], "ttft_s": None,
+                                 "models": [], **{f: 0 for f in FIELDS if f not in ("wall_s", "ttft_s")}}
+        return self._nodes[name]
+
+    # node boundaries
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Nested runnables inside a node share its metadata; only time the node itself
+        if node and kwargs.get("name") == node:
+            now = time.perf_counter()
+            with self._lock:
+                self._node_runs[run_id] = (node, now)
+                entry = self._node(node)
+                if entry["first_start"] is None:
+                    entry["first_start"] = now
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    def _end_node(self, run_id):
+        now = time.perf_counter()
+        with self._lock:
+            run = self._node_runs.pop(run_id, None)
+            if run:
+                node, start = run
+                self._node(node)["spans"].append((start, now))
+
+    # LLM calls
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node", "?")
+        params = kwargs.get("invocation_params") or {}
+        model = (metadata or {}).get("ls_model_name") or params.get("model_name") or params.get("model")
+        with self._lock:
+            self._llm_runs[run_id] = [node, time.perf_counter(), False]
+            entry = self._node(node)
+            entry["llm_calls"] += 1
+            if model and model not in entry["models"]:
+                entry["models"].append(model)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            run = self._llm_runs.get(run_id)
+            if run and not run[2]:
+                run[2] = True
+                self._first_token(run[0], time.perf_counter() - run[1])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        now = time.perf_counter()
+        prompt, completion = _usage(response)
+        with self._lock:
+            run = self._llm_runs.pop(run_id, None)
+            if not run:
+                return
+            node, start, streamed = run
+            if not streamed:
+                # Without streaming the first token arrives with the response
+                self._first_token(node, now - start)
+            entry = self._node(node)
+            if _cache_hit(response):
+                entry["cache_hits"] += 1
+            else:
+                entry["prompt_tokens"] += prompt
+                entry["completion_tokens"] += completion
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._llm_runs.pop(run_id, None)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        node = (kwargs.get("metadata") or {}).get("langgraph_node")
+        with self._lock:
+            run = self._llm_runs.get(run_id)
+            self._node(run[0] if run else node or "?")["retries"] += 1
+
+    def _first_token(self, node, seconds):
+        entry = self._node(node)
+        if entry["ttft_s"] is None or seconds < entry["ttft_s"]:
+            entry["ttft_s"] = seconds
+
+    # export
+
+    def records(self) -> list:
+        """One dict per node, in execution order."""
+        with self._lock:
+            nodes = sorted(self._nodes.items(), key=lambda kv: kv[1]["first_start"] or float("inf"))
+            records = []
+            for node, entry in nodes:
+                wall = round(_covered(entry["spans"]), 4) if entry["spans"] else None
+                ttft = round(entry["ttft_s"], 4) if entry["ttft_s"] is not None else None
+                records.append({
+                    "run_id": self.run_id, "node": node, "wall_s": wall, "ttft_s": ttft,
+                    **{f: entry[f] for f in FIELDS if f not in ("wall_s", "ttft_s")},
+                    "models": list(entry["models"]),
+                })
+            return records
+
+
+def _covered(spans) -> float:
+    """Seconds covered by (start, end) spans: a node run again adds up, a concurrent fan-out counts once."""
+    total, reached = 0.0, float("-inf")
+    for start, end in sorted(spans):
+        if end > reached:
+            total += end - max(start, reached)
+            reached = end
+    return total
+
+
+def write_jsonl(records, path_or_file):
+    """Append records as JSON lines to a path or an open text file."""
+    if hasattr(path_or_file, "write"):
+        for record in records:
+            path_or_file.write(json.dumps(record) + "\n")
+        return
+    with open(path_or_file, "a", encoding="utf-8") as f:
+        write_jsonl(records, f)
+
+
+def prometheus_text(records, prefix="article_agent") -> str:
+    """Aggregate records from any number of runs into Prometheus text format."""
+    totals = {}
+    for r in records:
+        t = totals.setdefault(r["node"], {f: 0 for f in FIELDS})
+        t["runs"] = t.get("runs", 0) + 1
+        for f in FIELDS:
+            t[f] += r.get(f) or 0
+
+    lines = []
+
+    def metric(name, kind, help_text, field):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for node, t in sorted(totals.items()):
+            lines.append(f'{prefix}_{name}{{node="{node}"}} {t[field]}')
+
+    metric("node_runs_total", "counter", "Node executions.", "runs")
+    metric("node_seconds_total", "counter", "Wall time spent in the node.", "wall_s")
+    metric("node_ttft_seconds_total", "counter", "Sum of time to first token per node execution.", "ttft_s")
+    metric("node_llm_calls_total", "counter", "LLM calls made by the node.", "llm_calls")
+    metric("node_prompt_tokens_total", "counter", "Prompt tokens sent by the node.", "prompt_tokens")
+    metric("node_completion_tokens_total", "counter", "Completion tokens received by the node.", "completion_tokens")
+    metric("node_retries_total", "counter", "LLM call retries in the node.", "retries")
+    metric("node_cache_hits_total", "counter", "LLM calls served from the response cache.", "cache_hits")
+    return "\n".join(lines) + "\n"
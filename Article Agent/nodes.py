@@ -0,0 +1,385 @@
+import logging
+import operator
+import re
+from typing import Annotated, Any, TypedDict
+
+from langchain_core.exceptions import OutputParserException
+from pydantic import Field, BaseModel, ValidationError
+
+from markdown_formatter import format_markdown, needs_llm
+from plan_templates import Specifics, fast_plan, filled_plan
+from prompt_budget import PromptBudget
+from routing import attempts, node_llm
+
+logger = logging.getLogger(__name__)
+
+PLAN_ERROR = "Error in planning phase."
+# The model answered but not with a usable plan
+PLAN_FAILURES = (OutputParserException, ValidationError)
+# Free-text reviews from before the structured Reviewer ("Rating: 4/5\nNote: ...")
+RATING_RE = re.compile(r"Rating:\s*(\d+(?:\.\d+)?)\s*/\s*5(?:.*?Note:\s*(.*))?", re.S)
+REVIEW_CRITERIA = ("clarity", "structure", "audience_fit")
+# "auto": the Organizer reuses near-duplicate plans itself; "record": it only stores
+# its plans, for the caller to offer (see plan_index.py)
+PLAN_REUSE = ("auto", "record")
+# Asks per model (the re-asks quote the validation error) before escalating / giving up
+REVIEW_ASKS = 2
+
+
+class State(BaseModel):
+    subject: str = Field(description="The subject")
+    length: int = Field(description="Length in chars")
+    target: str = Field(description="Target audience")
+    title: str = Field(description="Controversial title")
+    header: str = Field(description="Header")
+    question: str = Field(description="Attractive question")
+    content: str = Field(description="User content")
+    steps: list[str] = Field(default_factory=list, description="Actionable steps")
+    instructions_for_writer: str = Field(default="", description="Instructions")
+
+
+class Review(BaseModel):
+    # Sent as a tool schema with every review: keep names and descriptions short
+    score: float = Field(ge=0, le=5, description="Overall, 0-5")
+    clarity: float = Field(ge=0, le=5, description="0-5")
+    structure: float = Field(ge=0, le=5, description="0-5")
+    audience_fit: float = Field(ge=0, le=5, description="0-5")
+    note: str = Field(description="One short critique sentence")
+
+
+class GraphState(TypedDict, total=False):
+    # user inputs
+    subject: str
+    length: int
+    target: str
+    content: str
+    # node outputs
+    Plan: Any        # State, or PLAN_ERROR when the Organizer failed; a plan dict in the input is reused
+    plan_similarity: float  # set when the plan was reused: similarity of the brief it was made for
+    plan_template: str  # set when the plan came from a skeleton: the template mode, "fill" or "fast"
+    Article: str     # Writer draft
+    Sections: Annotated[list, operator.add]  # (index, text) from the section-parallel writer
+    Result: str      # Editor output (final Markdown)
+    review: dict     # Reviewer output, Review.model_dump(); None when no valid review came back
+    rating: str      # the review as "Rating: X/5\nNote: ..." text
+    revisions: Annotated[list, operator.add]  # one entry per Reviser pass (see revision.py)
+    guard: Annotated[list, operator.add]  # one entry per local plan / draft check (see guards.py)
+    variants: list   # score of every best-of-N draft, the chosen one flagged (see variants.py)
+    rerun: str       # node re-run on its own (see checkpoints.rerun_input); Join clears it
+
+
+# Prompts (shared by the sync and async nodes)
+
+# Each builder takes the graph's `PromptBudget`, which caps the user notes and
+# the draft and tallies the tokens saved against the unbudgeted prompt.
+
+def guard_feedback(state: dict, node: str) -> str:
+    """Why the last guard check sent `node` back, for its retry prompt; "" on a first try."""
+    entries = [entry for entry in state.get("guard") or [] if entry["node"] == node]
+    if entries and entries[-1]["action"] == "retry":
+        return f"\nYour previous answer was rejected ({'; '.join(entries[-1]['problems'])}). Fix that.\n"
+    return ""
+
+
+def organizer_prompt(state: dict, budget: PromptBudget = None) -> str:
+    budget = budget or PromptBudget()
+
+    def prompt(notes):
+        return f"""You are a Professional Content Strategist.
+        You MUST provide your response by filling the tool/schema provided.
+
+        User Inputs:
+        - Subject: {state['subject']}
+        - Target: {state['target']}
+        - Max Length: {state['length']} characters
+        - Core Ideas: {notes}
+
+        Fill every field in the schema. Ensure 'instructions_for_writer' is very detailed.
+        """ + guard_feedback(state, "Organizer")
+
+    budgeted = prompt(budget.content(state["content"]))
+    budget.record("Organizer", budgeted, prompt(state["content"]))
+    return budgeted
+
+
+def template_prompt(state: dict, skeleton: dict, budget: PromptBudget = None) -> str:
+    budget = budget or PromptBudget()
+
+    def prompt(notes):
+        return f"""You are a Professional Content Strategist.
+        The structure of this article is already planned:
+        - Header: {skeleton['header']}
+        - Question: {skeleton['question']}
+        - Outline: {" | ".join(skeleton['steps'])}
+
+        Only write the title, header and question for these user inputs, by filling the tool/schema provided.
+        - Subject: {state['subject']}
+        - Target: {state['target']}
+        - Core Ideas: {notes}
+        """ + guard_feedback(state, "Organizer")
+
+    budgeted = prompt(budget.content(state["content"]))
+    budget.record("Organizer", budgeted, prompt(state["content"]))
+    return budgeted
+
+
+def writer_prompt(state: dict, budget: PromptBudget = None) -> str:
+    budget = budget or PromptBudget()
+    # A failed plan (PLAN_ERROR) ends the run before any writer, see `pipeline.build_graph`
+    plan = state["Plan"]
+    # Only the fields the Writer uses; the notes once, not echoed inside the plan JSON
+    prompt = f"""Write a full article following these specific instructions.
+    Title: {plan.title}
+    Header: {plan.header}
+    Central question: {plan.question}
+    Target audience: {plan.target}
+    Length: about {state.get('length') or plan.length} characters
+    Outline: {" | ".join(plan.steps)}
+    Instructions: {plan.instructions_for_writer}
+    Author's notes: {budget.content(state.get('content') or plan.content)}
+    """ + guard_feedback(state, "Writer")
+    budget.record("Writer", prompt,
+                  f"Write a full article following these specific instructions: {plan.model_dump_json()}")
+    return prompt
+
+
+def editor_messages(state: dict) -> list:
+    prompt = "Format this text into clean Markdown with H1, H2, and H3 tags. Keep the tone professional. Remove meta-talk."
+    return [{"role": "system", "content": prompt}, {"role": "user", "content": state.get("Article", "")}]
+
+
+def reviewer_prompt(state: dict, error: str = None, budget: PromptBudget = None) -> str:
+    budget = budget or PromptBudget()
+    # In the parallel topology the Reviewer reads the raw draft while the Editor formats it
+    article = state.get("Result") or state.get("Article", "")
+    prompt = f"Review this article for a {state.get('target', 'general')} audience. Answer only with the tool."
+    if error:
+        prompt += f"\nYour previous answer was rejected ({error}). Fill every field with valid values."
+    budgeted = prompt + f"\n\nArticle:\n{budget.article(article)}"
+    budget.record("Reviewer", budgeted, prompt + f"\n\nArticle:\n{article}")
+    return budgeted
+
+
+def review_error(output: dict) -> str:
+    """Why a `with_structured_output(Review, include_raw=True)` answer has no review."""
+    error = output.get("parsing_error")
+    if error is None:
+        return "no tool call"
+    if isinstance(error, ValidationError):
+        # Field-level messages only, without pydantic's help URLs
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    return str(error).splitlines()[0]
+
+
+def review_update(review) -> dict:
+    if review is None:
+        return {"review": None, "rating": ""}
+    return {"review": review.model_dump(),
+            "rating": f"Rating: {review.score:g}/5\nNote: {review.note}"}
+
+
+def parse_rating(text: str):
+    """{"score", "note"} from a free-text "Rating: X/5" review, or None."""
+    match = RATING_RE.search(text or "")
+    if not match:
+        return None
+    return {"score": float(match.group(1)), "note": (match.group(2) or "").strip()}
+
+
+def valid_edit(text: str) -> bool:
+    return bool(text) and not needs_llm(text)
+
+
+def known_plan(state: dict, plans=None):
+    """Organizer update for a plan passed with the input or found in `plans`, else None."""
+    plan, similarity = state.get("Plan"), state.get("plan_similarity", 1.0)
+    if not isinstance(plan, dict) and plans is not None:
+        plan, similarity = plans.lookup(state) or (None, None)
+    if not isinstance(plan, dict):
+        return None
+    try:
+        return {"Plan": State(**plan), "plan_similarity": similarity}
+    except ValidationError:
+        # Stored before a schema change
+        logger.warning("Ignoring a reused plan that no longer validates")
+        return None
+
+
+def template_plan(state: dict, skeleton: dict, specifics=None) -> dict:
+    """Organizer update for a plan built from a skeleton, with the model's `Specifics` if any."""
+    if specifics is None:
+        return {"Plan": State(**fast_plan(state, skeleton)), "plan_template": "fast"}
+    return {"Plan": State(**filled_plan(state, skeleton, specifics)), "plan_template": "fill"}
+
+
+def remember_plan(plans, state: dict, plan) -> None:
+    if plans is not None:
+        plans.add(state, plan.model_dump())
+
+
+def local_edit(state: dict, editor_mode: str):
+    """Run the rule-based Editor; returns None when the LLM Editor should run instead."""
+    if editor_mode == "llm":
+        return None
+    formatted = format_markdown(state.get("Article", ""))
+    if editor_mode == "local" or not needs_llm(formatted):
+        return {"Result": formatted}
+    return None
+
+
+def join(state: dict) -> dict:
+    # Barrier for the parallel topology: Editor and Reviewer already wrote
+    # their own keys, nothing left to merge. A re-run branch arrives alone.
+    return {"rerun": None} if state.get("rerun") else {}
+
+
+# Nodes
+#
+# Each node is written once, as a generator of its model calls: it yields
+# (runnable, input) and gets the answer back, or the call's exception thrown
+# in. `run_steps` makes the calls with `invoke`, `arun_steps` awaits `ainvoke`,
+# so the blocking and the async graphs only differ in how they wait.
+
+def run_steps(steps):
+    """Drive a node's step generator with blocking calls; returns the node's update."""
+    result = error = None
+    while True:
+        try:
+            runnable, value = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as done:
+            return done.value
+        try:
+            result, error = runnable.invoke(value), None
+        except Exception as e:
+            result, error = None, e
+
+
+async def arun_steps(steps):
+    """Same as `run_steps`, awaiting `ainvoke`."""
+    result = error = None
+    while True:
+        try:
+            runnable, value = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as done:
+            return done.value
+        try:
+            result, error = await runnable.ainvoke(value), None
+        except Exception as e:
+            result, error = None, e
+
+
+def node_steps(llm, editor_mode="llm", budget: PromptBudget = None, plans=None, plan_reuse="auto",
+               templates=None, template_mode="fill") -> dict:
+    """Step generators of the nodes, keyed by graph node name (see `make_nodes` for the options)."""
+    budget = budget or PromptBudget()
+    lookup_plans = plans if plan_reuse == "auto" else None
+
+    def OrganizerAgent(state: dict):
+        reused = known_plan(state, lookup_plans)
+        if reused:
+            return reused
+        skeleton = templates.get(state) if templates is not None else None
+        if skeleton is not None:
+            specifics = None
+            if template_mode == "fill":
+                try:
+                    structured_llm = node_llm(llm, "Organizer").with_structured_output(Specifics)
+                    specifics = yield structured_llm, template_prompt(state, skeleton, budget)
+                except PLAN_FAILURES:
+                    logger.exception("Organizer Error")
+                if specifics is None:
+                    # The skeleton alone still makes a usable plan
+                    logger.warning("Organizer: no specifics in the answer, planning from the template alone")
+            update = template_plan(state, skeleton, specifics)
+            if specifics is not None:
+                remember_plan(plans, state, update["Plan"])
+            return update
+        for model in attempts(llm, "Organizer"):
+            # We force the model to ONLY use the tool
+            structured_llm = model.with_structured_output(State)
+            try:
+                results = yield structured_llm, organizer_prompt(state, budget)
+            except PLAN_FAILURES:
+                # Fallback if tool call fails. API errors (429 after retries, ...)
+                # propagate so the run fails instead of writing from nothing.
+                logger.exception("Organizer Error")
+                continue
+            if results is not None:
+                remember_plan(plans, state, results)
+                return {"Plan": results}
+            # The model answered in prose instead of calling the tool
+            logger.error("Organizer Error: no plan in the answer")
+        return {"Plan": PLAN_ERROR}
+
+    def ArticleWriter(state: dict):
+        result = yield node_llm(llm, "Writer"), writer_prompt(state, budget)
+        return {"Article": result.content}
+
+    def Structured(state: dict):
+        local = local_edit(state, editor_mode)
+        if local is not None:
+            return local
+        for model in attempts(llm, "Editor"):
+            res = yield model, editor_messages(state)
+            if valid_edit(res.content):
+                break
+        return {"Result": res.content}
+
+    def Reviewer(state: dict):
+        for model in attempts(llm, "Reviewer"):
+            structured_llm = model.with_structured_output(Review, include_raw=True)
+            error = None
+            for _ in range(REVIEW_ASKS):
+                output = yield structured_llm, reviewer_prompt(state, error, budget)
+                if output["parsed"] is not None:
+                    return review_update(output["parsed"])
+                error = review_error(output)
+                logger.warning("Reviewer: invalid review (%s)", error)
+        return review_update(None)
+
+    return {"Organizer": OrganizerAgent, "Writer": ArticleWriter, "Editor": Structured, "Reviewer": Reviewer}
+
+
+def make_nodes(llm, editor_mode="llm", budget: PromptBudget = None, plans=None, plan_reuse="auto",
+               templates=None, template_mode="fill") -> dict:
+    """Blocking nodes, keyed by graph node name.
+
+    `editor_mode` is one of `markdown_formatter.EDITOR_MODES`: "llm" always calls the
+    model, "local" only runs the rule-based formatter and
+    "local-then-llm-if-needed" falls back to the model when the formatted
+    draft still lacks structure.
+
+    `llm` is a chat model or a `routing.ModelRouter`; with a router each node
+    calls its own model and retries once on the escalation model when the
+    answer fails validation. The Reviewer re-asks with the validation error
+    before escalating.
+
+    `budget` is the `prompt_budget.PromptBudget` shared by the prompts.
+
+    `plans` is a `plan_index.PlanIndex` the Organizer stores its plans in and,
+    with `plan_reuse="auto"`, takes near-duplicate plans from instead of
+    calling the model. A plan dict passed in the input is always reused.
+
+    `templates` is a `plan_templates.PlanTemplates`: for a brief whose cell has
+    a skeleton the Organizer only asks for the specifics ("fill") or does not
+    call the model at all ("fast"), see `plan_templates.TEMPLATE_MODES`.
+    """
+    def blocking(steps):
+        def node(state: dict) -> dict:
+            return run_steps(steps(state))
+        return node
+
+    steps = node_steps(llm, editor_mode, budget, plans, plan_reuse, templates, template_mode)
+    return {name: blocking(node) for name, node in steps.items()}
+
+
+def make_async_nodes(llm, editor_mode="llm", budget: PromptBudget = None, plans=None, plan_reuse="auto",
+                     templates=None, template_mode="fill") -> dict:
+    """Same nodes as `make_nodes`, awaiting `ainvoke` so one event loop can drive many runs."""
+    def awaiting(steps):
+        async def node(state: dict) -> dict:
+            return await arun_steps(steps(state))
+        return node
+
+    steps = node_steps(llm, editor_mode, budget, plans, plan_reuse, templates, template_mode)
+    return {name: awaiting(node) for name, node in steps.items()}
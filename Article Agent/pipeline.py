@@ -0,0 +1,361 @@
+"""The article graph, shared by the app, the CLI tools and the workers.
+
+Importing this module is cheap: langgraph, langchain_groq and the node
+modules are only imported when a model or a graph is first built, so tools
+that never build one (argument parsing, job polling, tests) start at once.
+
+    agent = build_graph(PipelineConfig(topology="parallel", editor_mode="local"))
+    agent = build_graph(make_router(), use_async=True)   # same, with a ready model
+"""
+
+import operator
+from dataclasses import dataclass, fields
+from functools import lru_cache, partial
+from typing import Any, get_type_hints
+
+from markdown_formatter import EDITOR_MODES
+from routing import ModelRouter
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+SMALL_MODEL = "llama-3.1-8b-instant"
+# Nodes that do not need the large model; everything else uses `make_router(model=...)`
+SMALL_MODEL_NODES = ("Editor", "Reviewer")
+TOPOLOGIES = ("chain", "parallel")
+WRITER_MODES = ("single", "sections", "variants")
+
+# Nodes whose LLM output is forwarded token by token by `stream_run`
+STREAMED_NODES = ("Writer", "Editor")
+
+
+def make_llm(model=DEFAULT_MODEL, temperature=0.6, cache=None, scheduler=None, **kwargs):
+    """`cache` is an `llm_cache` backend; hits skip the Groq call.
+
+    `scheduler` is a shared `scheduler.RateLimitScheduler`; every API call is
+    then queued, budgeted and retried by it. Extra keyword arguments go to
+    `ChatGroq`, e.g. `base_url` to point at `fake_groq.FakeGroqServer`.
+    """
+    from dotenv import load_dotenv
+    from langchain_groq import ChatGroq
+
+    load_dotenv()
+    if scheduler is not None:
+        from scheduler import ScheduledChatGroq
+
+        return ScheduledChatGroq(model=model, temperature=temperature, cache=cache, scheduler=scheduler,
+                                 max_retries=0, http_client=scheduler.http_client(),
+                                 http_async_client=scheduler.http_async_client(), **kwargs)
+    return ChatGroq(model=model, temperature=temperature, cache=cache, **kwargs)
+
+
+def make_router(model=DEFAULT_MODEL, small_model=SMALL_MODEL, small_nodes=SMALL_MODEL_NODES,
+                escalate=True, **kwargs):
+    """`routing.ModelRouter` running `small_nodes` on `small_model` and the rest on `model`.
+
+    With `escalate` a small-model answer that fails validation is retried on
+    `model`. Keyword arguments (cache, scheduler, base_url, ...) are passed to
+    `make_llm` for both models.
+    """
+    large = make_llm(model, **kwargs)
+    small = make_llm(small_model, **kwargs) if small_model and small_model != model else large
+    return ModelRouter({node: small for node in small_nodes}, default=large,
+                       escalate_to=large if escalate else None)
+
+
+@dataclass
+class PipelineConfig:
+    """Every `build_graph` option as plain data; the models are built from it on use.
+
+    `llm` takes a ready chat model or `ModelRouter` instead of building one
+    from `model` / `small_model` (None: every node on `model`).
+    """
+    model: str = DEFAULT_MODEL
+    small_model: str = SMALL_MODEL
+    temperature: float = 0.6
+    cache: Any = None
+    scheduler: Any = None
+    llm: Any = None
+    use_async: bool = False
+    editor_mode: str = "llm"
+    topology: str = "chain"
+    writer_mode: str = "single"
+    checkpointer: Any = None
+    budget: Any = None
+    revision: Any = None
+    plans: Any = None
+    plan_reuse: str = "auto"
+    templates: Any = None
+    template_mode: str = "fill"
+    guard: Any = None
+    variants: Any = None
+
+    def make_llm(self):
+        if self.llm is not None:
+            return self.llm
+        return make_router(self.model, self.small_model, temperature=self.temperature, cache=self.cache,
+                           scheduler=self.scheduler)
+
+    def graph_options(self) -> dict:
+        """`build_graph` keyword arguments, without `llm`."""
+        model_fields = ("model", "small_model", "temperature", "cache", "scheduler", "llm")
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.name not in model_fields}
+
+
+def build_graph(llm, use_async=False, editor_mode="llm", topology="chain", writer_mode="single",
+                checkpointer=None, budget=None, revision=None, plans=None, plan_reuse="auto",
+                templates=None, template_mode="fill", guard=None, variants=None):
+    """Compile the Organizer -> Writer -> Editor -> Reviewer graph.
+
+    `llm` is one chat model for every node, or a `routing.ModelRouter` (see
+    `make_router`) giving each node its own. It may also be a
+    `PipelineConfig`, which then supplies the model and every other option.
+
+    With `use_async=True` the nodes await `llm.ainvoke`; drive the graph with
+    `astream`/`ainvoke` (see `arun`). `editor_mode` selects the LLM or the
+    rule-based Editor (see `nodes.make_nodes`).
+
+    `topology="parallel"` runs the Editor and the Reviewer side by side on the
+    Writer's draft and joins them, so the run takes max(Editor, Reviewer)
+    instead of their sum. The Reviewer then scores the unformatted draft.
+
+    `writer_mode="sections"` drafts every plan step concurrently and stitches
+    them (see `sections.py`); the single Writer stays as the fallback for
+    plans without steps. `writer_mode="variants"` writes several drafts at
+    different temperatures from the one plan and keeps the best-reviewed
+    one, within the token and time budget of `variants`, a
+    `variants.VariantPolicy` (see `variants.py`). It reviews every draft
+    itself, so it only runs with the chain topology.
+
+    With a `checkpointer` (see `checkpoints.py`) every node's output is saved
+    under the run's thread id, so runs can be resumed or partly re-run.
+
+    `budget` is a `prompt_budget.PromptBudget` capping the notes and draft
+    sent to the nodes; pass one in to read its savings.
+
+    With a `revision.RevisionPolicy`, articles the Reviewer scores too low go
+    to the `Reviser` for find/replace fixes and are reviewed again, within
+    the policy's iteration, time and token limits.
+
+    `plans` is a `plan_index.PlanIndex` of past briefs: with `plan_reuse="auto"`
+    the Organizer reuses the plan of a near-duplicate brief instead of calling
+    the model, with "record" it only stores its plans (see `nodes.PLAN_REUSE`).
+
+    `templates` is a `plan_templates.PlanTemplates` of precomputed plan
+    skeletons; `template_mode` is "fill" (one short Organizer call for the
+    specifics) or "fast" (no call), see `plan_templates.py`.
+
+    With a `guards.GuardPolicy`, local checks after the Organizer and the
+    Writer re-ask a failed node once, or stop the run when there is no
+    usable plan, instead of spending the remaining calls (see `guards.py`).
+    Without one, a failed plan (PLAN_ERROR) still ends the run after the Organizer.
+    """
+    if isinstance(llm, PipelineConfig):
+        return build_graph(llm.make_llm(), **llm.graph_options())
+
+    from langgraph.graph import StateGraph, END
+
+    from guards import after_draft_check, after_plan_check, make_guard_nodes, unless_plan_error
+    from nodes import PLAN_REUSE, GraphState, join, make_nodes, make_async_nodes
+    from plan_templates import TEMPLATE_MODES
+    from revision import after_revision, gate, regate, make_revision_nodes, make_async_revision_nodes
+    from sections import fan_out_sections, make_section_nodes, make_async_section_nodes
+    from variants import VariantPolicy, make_async_variant_nodes, make_variant_nodes
+
+    if editor_mode not in EDITOR_MODES:
+        raise ValueError(f"editor_mode must be one of {EDITOR_MODES}, got {editor_mode!r}")
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"topology must be one of {TOPOLOGIES}, got {topology!r}")
+    if writer_mode not in WRITER_MODES:
+        raise ValueError(f"writer_mode must be one of {WRITER_MODES}, got {writer_mode!r}")
+    if plan_reuse not in PLAN_REUSE:
+        raise ValueError(f"plan_reuse must be one of {PLAN_REUSE}, got {plan_reuse!r}")
+    if template_mode not in TEMPLATE_MODES:
+        raise ValueError(f"template_mode must be one of {TEMPLATE_MODES}, got {template_mode!r}")
+    if writer_mode == "variants" and topology == "parallel":
+        raise ValueError("writer_mode='variants' reviews every draft itself; use topology='chain'")
+    make = make_async_nodes if use_async else make_nodes
+    nodes = make(llm, editor_mode, budget, plans, plan_reuse, templates, template_mode)
+    if writer_mode == "sections":
+        nodes.update(make_async_section_nodes(llm, budget) if use_async else make_section_nodes(llm, budget))
+    if writer_mode == "variants":
+        # Each variant is scored by the graph's own Reviewer
+        make_variants = make_async_variant_nodes if use_async else make_variant_nodes
+        nodes.update(make_variants(llm, nodes["Reviewer"], variants or VariantPolicy(), budget))
+    if revision is not None:
+        nodes.update(make_async_revision_nodes(llm) if use_async else make_revision_nodes(llm))
+    if guard is not None:
+        nodes.update(make_guard_nodes(guard))
+
+    workflow = StateGraph(GraphState)
+    for name, node in nodes.items():
+        workflow.add_node(name, node)
+
+    workflow.set_entry_point("Organizer")
+    if writer_mode == "sections":
+        write, writers = fan_out_sections, ["SectionWriter", "Writer"]
+    else:
+        first = "Variants" if writer_mode == "variants" else "Writer"
+        write, writers = partial(_goto, node=first), [first]
+    if guard is not None:
+        workflow.add_edge("Organizer", "PlanCheck")
+        workflow.add_conditional_edges("PlanCheck", partial(after_plan_check, then=write),
+                                       [*writers, "Organizer", END])
+    else:
+        # Without the guard a failed plan still ends the run before the Writer is called
+        workflow.add_conditional_edges("Organizer", partial(unless_plan_error, then=write), [*writers, END])
+    if writer_mode == "variants":
+        # The chosen draft is already cleaned and reviewed; the Reviewer only re-runs after a revision
+        if guard is not None:
+            workflow.add_edge("Variants", "DraftCheck")
+            workflow.add_conditional_edges("DraftCheck", partial(after_draft_check, then="Editor", redo=write),
+                                           ["Variants", "Editor"])
+        else:
+            workflow.add_edge("Variants", "Editor")
+        if revision is not None:
+            workflow.add_conditional_edges("Editor", partial(gate, policy=revision), ["Reviser", END])
+            workflow.add_conditional_edges("Reviewer", partial(gate, policy=revision), ["Reviser", END])
+            workflow.add_conditional_edges("Reviser", after_revision, ["Reviewer", END])
+        else:
+            workflow.add_edge("Editor", END)
+            workflow.add_edge("Reviewer", END)
+        return workflow.compile(checkpointer=checkpointer)
+    if writer_mode == "sections":
+        workflow.add_edge("SectionWriter", "Stitch")
+        draft_nodes = ["Writer", "Stitch"]
+    else:
+        draft_nodes = ["Writer"]
+
+    # The parallel topology reviews the draft while the Editor formats it
+    downstream = ["Editor", "Reviewer"] if topology == "parallel" else ["Editor"]
+    if guard is not None:
+        for draft_node in draft_nodes:
+            workflow.add_edge(draft_node, "DraftCheck")
+        # A stitched draft is redone section by section
+        workflow.add_conditional_edges("DraftCheck", partial(after_draft_check, then=downstream, redo=write),
+                                       [*writers, *downstream])
+    else:
+        for draft_node in draft_nodes:
+            for node in downstream:
+                workflow.add_edge(draft_node, node)
+
+    if topology == "parallel":
+        workflow.add_node("Join", join)
+        # Join waits for both branches; their outputs land in separate state keys
+        workflow.add_edge(["Editor", "Reviewer"], "Join")
+        # A branch re-run on its own (see `checkpoints.rerun_input`) would wait at the barrier forever
+        workflow.add_conditional_edges("Editor", partial(_join_on_rerun, end=END), ["Join", END])
+        if revision is not None:
+            workflow.add_conditional_edges("Join", partial(gate, policy=revision), ["Reviser", END])
+            # Re-reviews after a revision no longer wait for the Editor
+            workflow.add_conditional_edges("Reviewer", partial(regate, policy=revision), ["Reviser", "Join", END])
+            workflow.add_conditional_edges("Reviser", after_revision, ["Reviewer", END])
+        else:
+            workflow.add_conditional_edges("Reviewer", partial(_join_on_rerun, end=END), ["Join", END])
+            workflow.add_edge("Join", END)
+    else:
+        workflow.add_edge("Editor", "Reviewer")
+        if revision is not None:
+            workflow.add_conditional_edges("Reviewer", partial(gate, policy=revision), ["Reviser", END])
+            workflow.add_conditional_edges("Reviser", after_revision, ["Reviewer", END])
+        else:
+            workflow.add_edge("Reviewer", END)
+
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def _goto(state, node):
+    return node
+
+
+def _join_on_rerun(state, end):
+    return "Join" if state.get("rerun") else end
+
+
+@lru_cache(maxsize=None)
+def _appended_keys() -> frozenset:
+    # GraphState keys whose reducer appends (`Annotated[list, operator.add]`)
+    from nodes import GraphState
+
+    hints = get_type_hints(GraphState, include_extras=True)
+    return frozenset(key for key, hint in hints.items() if operator.add in getattr(hint, "__metadata__", ()))
+
+
+def merge_update(final: dict, update: dict) -> dict:
+    """Apply one node's `update` to `final` the way the graph does: appended keys grow, others are replaced."""
+    for key, val in (update or {}).items():
+        if key in _appended_keys():
+            final[key] = list(final.get(key) or []) + list(val or [])
+        else:
+            final[key] = val
+    return final
+
+
+def result_summary(final: dict) -> dict:
+    """What the CLI, the batch runner and the API return for a finished run's final state."""
+    plan = final.get("Plan")
+    return {
+        "title": getattr(plan, "title", None),
+        "article": final.get("Result", ""),
+        "rating": final.get("rating", ""),
+        "review": final.get("review"),
+        "revisions": final.get("revisions") or [],
+        "guard": final.get("guard") or [],
+        "variants": final.get("variants") or [],
+    }
+
+
+async def arun(agent, state_input, on_update=None, config=None):
+    """Run one article through `agent` with `astream` and return the final state.
+
+    `on_update(node, update)` is called as each node completes. `config` is
+    passed to the graph, e.g. `{"callbacks": [metrics.NodeMetrics()]}`.
+    With a checkpointer, `state_input` may also be a `checkpoints` resume or
+    rerun input; the result then starts from the saved state.
+    """
+    if isinstance(state_input, dict):
+        final = dict(state_input)
+    else:
+        final = dict((await agent.aget_state(config)).values)
+    async for output in agent.astream(state_input, config=config):
+        for key, val in output.items():
+            val = val or {}  # nodes such as Join return no update
+            merge_update(final, val)
+            if on_update:
+                on_update(key, val)
+    return final
+
+
+def _token(chunk, token_nodes):
+    message, metadata = chunk
+    node = metadata.get("langgraph_node")
+    if node in token_nodes and isinstance(message.content, str) and message.content:
+        return node, message.content
+    return None
+
+
+def stream_run(agent, state_input, token_nodes=STREAMED_NODES, config=None):
+    """Run one article and yield progress as it happens.
+
+    Yields `("token", node, text)` for every LLM token generated inside
+    `token_nodes` and `("update", node, output)` when any node completes.
+    `state_input` may be a `checkpoints` resume/rerun input (see `arun`).
+    """
+    for mode, chunk in agent.stream(state_input, config=config, stream_mode=["updates", "messages"]):
+        if mode == "messages":
+            token = _token(chunk, token_nodes)
+            if token:
+                yield "token", *token
+        else:
+            for key, val in chunk.items():
+                yield "update", key, val or {}
+
+
+async def astream_run(agent, state_input, token_nodes=STREAMED_NODES, config=None):
+    """Async twin of `stream_run`."""
+    async for mode, chunk in agent.astream(state_input, config=config, stream_mode=["updates", "messages"]):
+        if mode == "messages":
+            token = _token(chunk, token_nodes)
+            if token:
+                yield "token", *token
+        else:
+            for key, val in chunk.items():
+                yield "update", key, val or {}
@@ -0,0 +1,177 @@
+"""Near-duplicate plan reuse: skip the Organizer for briefs we already planned.
+
+Editors often resubmit the same topic and audience with lightly reworded
+notes, which the exact-match LLM cache misses. `PlanIndex` stores every
+Organizer input with its plan (in SQLite) and finds the closest past brief
+with TF-IDF word vectors and cosine similarity.
+Only briefs with the same subject and target, and a similar length, are
+compared; a match at or above `threshold` is returned with its plan.
+Vectors are sparse (term -> weight dicts) and document frequencies are kept
+up to date on every add and delete, so a lookup only costs the terms of its
+candidates, however many entries the index holds.
+
+    plans = PlanIndex(".article_plans.sqlite", max_entries=2000)
+    agent = build_graph(llm, plans=plans)            # Organizer reuses matches itself
+    agent = build_graph(llm, plans=plans, plan_reuse="record")
+    plans.lookup(state_input)                         # (plan, similarity) to offer, or None
+"""
+
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+PLANS_PATH = ".article_plans.sqlite"
+# Past briefs whose target length differs by more than this share are not compared
+LENGTH_TOLERANCE = 0.25
+# Minimum similarity for a reuse. Briefs reworded in a quarter of their words score about 0.7-0.9;
+# other briefs of the same subject and audience stay below 0.45, even ones sharing a phrase
+REUSE_THRESHOLD = 0.6
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def terms(text: str) -> list:
+    # Unigrams only: with bigrams every swapped word also costs the two pairs around it
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def tf_weights(text: str) -> dict:
+    """Sublinear term frequencies of `text`: term -> 1 + log(count)."""
+    return {term: 1 + math.log(count) for term, count in Counter(terms(text)).items()}
+
+
+class PlanIndex:
+    """SQLite-persisted plans of past briefs with an in-memory TF-IDF index.
+
+    `ttl` (seconds) and `max_entries` (least recently used go first) bound
+    the index; `stats()` counts hits and misses.
+    """
+
+    def __init__(self, path=PLANS_PATH, threshold=REUSE_THRESHOLD, ttl=None, max_entries=2000):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS plans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                subject TEXT NOT NULL,
+                target TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                plan TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        self._entries = [
+            self._entry(r[0], r[1], r[2], r[3], tf_weights(r[4]), json.loads(r[5]), r[6], r[7])
+            for r in self._conn.execute(
+                "SELECT id, subject, target, length, content, plan, created_at, accessed_at FROM plans")
+        ]
+        self._df = Counter(term for entry in self._entries for term in entry["weights"])
+        self._version = 0  # bumped whenever `_df` changes; entry norms are cached per version
+
+    # index
+
+    @staticmethod
+    def _entry(entry_id, subject, target, length, weights, plan, created_at, accessed_at):
+        return {"id": entry_id, "subject": subject, "target": target, "length": length, "weights": weights,
+                "plan": plan, "created_at": created_at, "accessed_at": accessed_at, "norm": (-1, 0.0)}
+
+    def _idf(self, term):
+        # Unseen query terms weigh as much as a term one brief has, not more: a reworded
+        # brief brings new words, and boosting them would push it below the threshold
+        return math.log((1 + len(self._entries)) / (1 + max(self._df[term], 1))) + 1
+
+    def _norm(self, entry):
+        version, norm = entry["norm"]
+        if version != self._version:
+            norm = math.sqrt(sum((w * self._idf(t)) ** 2 for t, w in entry["weights"].items()))
+            entry["norm"] = (self._version, norm)
+        return norm
+
+    def _similarity(self, query: dict, query_norm: float, entry) -> float:
+        weights, norm = entry["weights"], self._norm(entry)
+        if not norm or not query_norm:
+            return 0.0
+        dot = sum(q * weights[t] * self._idf(t) for t, q in query.items() if t in weights)
+        return dot / (norm * query_norm)
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+        cutoff = time.time() - self.ttl
+        expired = [e["id"] for e in self._entries if e["created_at"] < cutoff]
+        if expired:
+            self._delete(expired)
+
+    def _delete(self, ids):
+        ids = set(ids)
+        for entry in self._entries:
+            if entry["id"] in ids:
+                self._df.subtract(entry["weights"].keys())
+        self._df += Counter()  # drops the terms no entry has any more
+        self._entries = [e for e in self._entries if e["id"] not in ids]
+        self._conn.executemany("DELETE FROM plans WHERE id = ?", [(i,) for i in ids])
+        self._conn.commit()
+        self._version += 1
+
+    # public
+
+    def lookup(self, state: dict):
+        """(plan dict, similarity) of the closest past brief at or above `threshold`, or None."""
+        with self._lock:
+            self._expire()
+            length = int(state.get("length") or 0)
+            candidates = [
+                i for i, e in enumerate(self._entries)
+                if e["subject"] == state.get("subject") and e["target"] == state.get("target")
+                and abs(e["length"] - length) <= LENGTH_TOLERANCE * max(length, 1)
+            ]
+            if not candidates:
+                self.misses += 1
+                return None
+            query = {t: w * self._idf(t) for t, w in tf_weights(state.get("content", "")).items()}
+            query_norm = math.sqrt(sum(q * q for q in query.values()))
+            score, entry = max(((self._similarity(query, query_norm, self._entries[i]), self._entries[i])
+                                for i in candidates), key=lambda pair: pair[0])
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            entry["accessed_at"] = time.time()
+            self._conn.execute("UPDATE plans SET accessed_at = ? WHERE id = ?", (entry["accessed_at"], entry["id"]))
+            self._conn.commit()
+            self.hits += 1
+            return entry["plan"], round(score, 4)
+
+    def add(self, state: dict, plan: dict):
+        """Store the plan made for `state`, evicting the least recently used beyond `max_entries`."""
+        now = time.time()
+        row = (state.get("subject", ""), state.get("target", ""), int(state.get("length") or 0),
+               state.get("content", ""), json.dumps(plan, ensure_ascii=False), now, now)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO plans (subject, target, length, content, plan, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            self._conn.commit()
+            entry = self._entry(cursor.lastrowid, row[0], row[1], row[2], tf_weights(row[3]), plan, now, now)
+            self._entries.append(entry)
+            self._df.update(entry["weights"].keys())
+            self._version += 1
+            if self.max_entries and len(self._entries) > self.max_entries:
+                by_age = sorted(self._entries, key=lambda e: e["accessed_at"])
+                self._delete(e["id"] for e in by_age[:len(self._entries) - self.max_entries])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,188 @@
+"""Plan skeletons per (subject, target, length bucket): a cheaper Organizer.
+
+The app's topics and audiences make a small, fixed grid, yet the Organizer
+worked out structure and tone guidance from scratch on every run, and
+everything downstream waits for it. `PlanTemplates` keeps one precomputed
+skeleton per cell (header, hook question, outline, instructions for the
+writer) in SQLite; `refresh()` (re)generates them. With templates passed to
+`pipeline.build_graph`, the Organizer of a brief whose cell has a skeleton:
+
+- "fill": asks the model only for the specifics of this brief (title,
+  header, question) on top of the skeleton, a much shorter answer;
+- "fast": builds the plan from the skeleton alone, without a model call.
+
+Cells without a skeleton ("Other" topics...) get the full Organizer call.
+
+    templates = PlanTemplates()
+    templates.refresh(llm)                        # every SUBJECTS x TARGETS x LENGTH_BUCKETS cell
+    agent = build_graph(llm, templates=templates, template_mode="fill")
+
+    python plan_templates.py --refresh --max-age 604800
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, Field, ValidationError
+
+from markdown_formatter import SENTENCE_END_RE, trim_to
+from routing import node_llm
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_PATH = ".article_templates.sqlite"
+TEMPLATE_MODES = ("fill", "fast")
+# The app's topics and audiences ("Other" topics have no template)
+SUBJECTS = ("⚽ Sport", "📈 Economics", "🏛️ Politics", "💊 Health", "🍔 Food", "💻 IT", "❤️ Emotional")
+TARGETS = ("👨‍👩‍👧 Family", "👔 Professional", "📱 Social Media", "🏫 School", "🍻 Casual", "🤓 Enthusiasts")
+# bucket -> (longest length in it, length its skeleton is planned for)
+LENGTH_BUCKETS = {"short": (900, 700), "medium": (1500, 1200), "long": (None, 1800)}
+# At most this many characters of the notes' first sentence make the title in "fast" mode
+FAST_TITLE_CHARS = 90
+
+
+class Skeleton(BaseModel):
+    header: str = Field(description="Generic header for this topic and audience")
+    question: str = Field(description="Generic attractive question")
+    steps: list[str] = Field(description="Outline, one entry per section")
+    instructions_for_writer: str = Field(description="Detailed structure, tone and style instructions")
+
+
+class Specifics(BaseModel):
+    # The only fields the model writes in "fill" mode
+    title: str = Field(description="Controversial title")
+    header: str = Field(description="Header")
+    question: str = Field(description="Attractive question")
+
+
+def length_bucket(length) -> str:
+    for bucket, (longest, _) in LENGTH_BUCKETS.items():
+        if longest is None or int(length or 0) <= longest:
+            return bucket
+
+
+def skeleton_prompt(subject: str, target: str, length: int) -> str:
+    return f"""You are a Professional Content Strategist.
+    Prepare a reusable plan skeleton for every article about {subject} written for a {target} audience,
+    about {length} characters long. It must not depend on a specific story: give the outline of sections,
+    a generic header and hook question, and very detailed instructions on structure, tone and style.
+    You MUST provide your response by filling the tool/schema provided.
+    """
+
+
+def fast_plan(state: dict, skeleton: dict) -> dict:
+    """Plan fields for `state` from the skeleton alone; the notes' first sentence gives the title."""
+    first = SENTENCE_END_RE.split(state.get("content", "").strip(), 1)[0]
+    title = trim_to(first, FAST_TITLE_CHARS).strip() or state.get("subject", "")
+    return {**skeleton, "subject": state["subject"], "target": state["target"], "length": state["length"],
+            "content": state.get("content", ""), "title": title}
+
+
+def filled_plan(state: dict, skeleton: dict, specifics: Specifics) -> dict:
+    return {**fast_plan(state, skeleton), **specifics.model_dump()}
+
+
+class PlanTemplates:
+    """SQLite-persisted skeletons, one per (subject, target, length bucket) cell."""
+
+    def __init__(self, path=TEMPLATES_PATH):
+        self.path = path
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS templates (
+                subject TEXT NOT NULL,
+                target TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                skeleton TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (subject, target, bucket)
+            )"""
+        )
+        self._conn.commit()
+        self._cells = {
+            (r[0], r[1], r[2]): {"skeleton": json.loads(r[3]), "created_at": r[4]}
+            for r in self._conn.execute("SELECT subject, target, bucket, skeleton, created_at FROM templates")
+        }
+
+    def get(self, state: dict):
+        """Skeleton dict for the cell of `state`, or None."""
+        key = (state.get("subject"), state.get("target"), length_bucket(state.get("length")))
+        with self._lock:
+            cell = self._cells.get(key)
+            if cell is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return cell["skeleton"]
+
+    def put(self, subject, target, bucket, skeleton: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO templates (subject, target, bucket, skeleton, created_at) VALUES (?, ?, ?, ?, ?)",
+                (subject, target, bucket, json.dumps(skeleton, ensure_ascii=False), now))
+            self._conn.commit()
+            self._cells[(subject, target, bucket)] = {"skeleton": skeleton, "created_at": now}
+
+    def stale(self, cells, max_age=None) -> list:
+        """The `cells` without a skeleton, or with one older than `max_age` seconds."""
+        cutoff = time.time() - max_age if max_age is not None else None
+        with self._lock:
+            return [cell for cell in cells
+                    if cell not in self._cells or (cutoff is not None and self._cells[cell]["created_at"] < cutoff)]
+
+    def refresh(self, llm, cells=None, max_age=None) -> int:
+        """Generate the skeletons of stale `cells` (default: the whole grid); returns how many were stored.
+
+        `llm` is a chat model or a `routing.ModelRouter` (its Organizer model is used).
+        A cell whose answer is unusable keeps its old skeleton, if any.
+        """
+        if cells is None:
+            cells = [(s, t, b) for s in SUBJECTS for t in TARGETS for b in LENGTH_BUCKETS]
+        structured_llm = node_llm(llm, "Organizer").with_structured_output(Skeleton)
+        stored = 0
+        for subject, target, bucket in self.stale(cells, max_age):
+            try:
+                skeleton = structured_llm.invoke(skeleton_prompt(subject, target, LENGTH_BUCKETS[bucket][1]))
+            except (OutputParserException, ValidationError):
+                logger.exception("Template %s / %s / %s: no usable skeleton", subject, target, bucket)
+                continue
+            if skeleton is None:
+                logger.error("Template %s / %s / %s: no skeleton in the answer", subject, target, bucket)
+                continue
+            self.put(subject, target, bucket, skeleton.model_dump())
+            stored += 1
+        return stored
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"cells": len(self._cells), "hits": self.hits, "misses": self.misses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the plan skeletons of the subject x target grid")
+    parser.add_argument("--path", default=TEMPLATES_PATH, help="SQLite file the skeletons are stored in")
+    parser.add_argument("--refresh", action="store_true", help="Generate missing (and, with --max-age, old) skeletons")
+    parser.add_argument("--max-age", type=float, default=None, help="Regenerate skeletons older than this (seconds)")
+    parser.add_argument("--model", default=None, help="Groq model name")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    templates = PlanTemplates(args.path)
+    if args.refresh:
+        from pipeline import DEFAULT_MODEL, make_llm
+        stored = templates.refresh(make_llm(args.model or DEFAULT_MODEL), max_age=args.max_age)
+        print(f"Stored {stored} skeletons")
+    print(json.dumps(templates.stats()))
+
+
+if __name__ == "__main__":
+    main()
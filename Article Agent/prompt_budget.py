@@ -0,0 +1,84 @@
+"""Prompt assembly budgets: send each node only what it needs, in bounded size.
+
+Without it the Writer got the whole `Plan` as JSON (echoed user notes,
+subject, length...) and long notes pasted into the app were paid for at
+every stage. A `PromptBudget` tallies per node how many tokens the prompts
+cost. Given limits, it also caps the user notes sent to the Organizer and
+the Writer and the draft sent to the Reviewer, cutting oversized text down
+to its opening and closing sentences, and counts what that saved (also
+logged). Without limits nothing is cut: trimming the user's notes is opt-in.
+
+    budget = PromptBudget(content_tokens=CONTENT_TOKENS, article_tokens=ARTICLE_TOKENS)
+    agent = build_graph(llm, budget=budget)
+    budget.stats()  # {"Writer": {"prompts": 1, "sent_tokens": 310, "saved_tokens": 420}, ...}
+"""
+
+import logging
+import threading
+
+from markdown_formatter import SENTENCE_END_RE, trim_to
+
+logger = logging.getLogger(__name__)
+
+# Suggested caps: tokens of user notes sent to the Organizer / Writer, and of draft sent to the Reviewer
+CONTENT_TOKENS = 800
+ARTICLE_TOKENS = 2000
+# Share of a trimmed text kept from its start; the rest comes from its end
+HEAD_SHARE = 0.7
+ELISION = "\n[...]\n"
+
+
+def count_tokens(text) -> int:
+    # ~4 characters per token for English with the Llama tokenizers; no tokenizer download needed
+    return len(str(text)) // 4 + 1
+
+
+def fit(text: str, tokens: int) -> str:
+    """`text` cut to about `tokens`, keeping whole sentences from its start and end."""
+    text = text or ""
+    if not tokens or len(text) <= tokens * 4:
+        return text
+    limit = tokens * 4
+    head = trim_to(text, int(limit * HEAD_SHARE))
+    tail = text[len(text) - (limit - len(head)):]
+    # Start the tail on a sentence boundary
+    end = SENTENCE_END_RE.search(tail)
+    if end and end.end() < len(tail):
+        tail = tail[end.end():]
+    return head.rstrip() + ELISION + tail.strip()
+
+
+class PromptBudget:
+    """Token budgets for the node prompts (None: no limit), plus a per-node tally of the savings."""
+
+    def __init__(self, content_tokens=None, article_tokens=None):
+        self.content_tokens = content_tokens
+        self.article_tokens = article_tokens
+        self._lock = threading.Lock()
+        self._nodes = {}
+
+    def content(self, text: str) -> str:
+        return fit(text, self.content_tokens)
+
+    def article(self, text: str) -> str:
+        return fit(text, self.article_tokens)
+
+    def record(self, node: str, prompt, unbudgeted) -> None:
+        """Tally a prompt against what it would have cost without budgeting."""
+        sent, full = count_tokens(prompt), count_tokens(unbudgeted)
+        saved = max(0, full - sent)
+        with self._lock:
+            entry = self._nodes.setdefault(node, {"prompts": 0, "sent_tokens": 0, "saved_tokens": 0})
+            entry["prompts"] += 1
+            entry["sent_tokens"] += sent
+            entry["saved_tokens"] += saved
+        if saved:
+            logger.info("%s prompt: ~%d tokens, ~%d saved by budgeting", node, sent, saved)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {node: dict(entry) for node, entry in self._nodes.items()}
+
+    def saved_tokens(self) -> int:
+        with self._lock:
+            return sum(entry["saved_tokens"] for entry in self._nodes.values())
@@ -0,0 +1,128 @@
+"""Quality-gated revision loop: low-scoring articles get fixed before they ship.
+
+With a `RevisionPolicy` passed to `pipeline.build_graph`, a conditional edge
+after the review sends articles scoring under `threshold` to the `Reviser`,
+which gets the critique and answers with a few find/replace edits instead of
+rewriting the whole article. The edits are applied locally and the article
+goes back to the Reviewer. The loop stops at `max_revisions`, when a revision
+changed nothing, or when the revisions of the run have used up
+`max_seconds` / `max_tokens`, so it cannot blow up tail latency.
+
+    agent = build_graph(llm, revision=RevisionPolicy(threshold=3.5, max_revisions=2))
+    final["revisions"]  # one entry per pass: score before, edits applied, seconds, tokens
+"""
+
+import time
+from dataclasses import dataclass
+
+from langgraph.graph import END
+from pydantic import BaseModel, Field
+
+from prompt_budget import count_tokens
+from routing import node_llm
+
+# At most this many edits per pass, to keep the answer (and the diff) small
+MAX_EDITS = 8
+
+
+@dataclass
+class RevisionPolicy:
+    threshold: float = 3.5       # revise while the review score is below this
+    max_revisions: int = 2
+    max_seconds: float = 60.0    # total time the Reviser may spend on one run
+    max_tokens: int = 6000       # total prompt + completion tokens for the Reviser on one run
+
+
+class Edit(BaseModel):
+    find: str = Field(description="Exact passage copied from the article")
+    replace: str = Field(description="Its replacement")
+
+
+class Revision(BaseModel):
+    edits: list[Edit] = Field(default_factory=list, description=f"At most {MAX_EDITS} edits")
+
+
+def revision_prompt(article: str, review: dict) -> str:
+    scores = ", ".join(f"{k} {v:g}/5" for k, v in review.items() if k != "note" and isinstance(v, (int, float)))
+    return f"""An editor reviewed the article below: {scores}.
+    Critique: {review.get('note', '')}
+
+    Fix what the critique points at with at most {MAX_EDITS} small find/replace edits.
+    Each `find` must be copied exactly from the article; do not rewrite untouched passages.
+
+    Article:
+    {article}
+    """
+
+
+def apply_edits(text: str, edits) -> tuple:
+    """(revised text, number of edits applied); edits whose `find` is missing are skipped."""
+    applied = 0
+    for edit in edits[:MAX_EDITS]:
+        if edit.find and edit.find in text and edit.find != edit.replace:
+            text = text.replace(edit.find, edit.replace, 1)
+            applied += 1
+    return text, applied
+
+
+def gate(state: dict, policy: RevisionPolicy):
+    """Conditional edge after the review: "Reviser" or END."""
+    review = state.get("review")
+    if not review or review.get("score", 0) >= policy.threshold:
+        return END
+    log = state.get("revisions") or []
+    if len(log) >= policy.max_revisions or (log and not log[-1]["applied"]):
+        return END
+    if sum(r["seconds"] for r in log) >= policy.max_seconds or sum(r["tokens"] for r in log) >= policy.max_tokens:
+        return END
+    return "Reviser"
+
+
+def regate(state: dict, policy: RevisionPolicy):
+    """`gate` for the Reviewer of the parallel topology, where Join gates the first review."""
+    if state.get("rerun"):
+        # Re-run on its own (see `checkpoints.rerun_input`): Join gates it like a first review
+        return "Join"
+    return gate(state, policy) if state.get("revisions") else END
+
+
+def after_revision(state: dict):
+    # Nothing changed, nothing to re-review
+    return "Reviewer" if state["revisions"][-1]["applied"] else END
+
+
+def _tokens(output: dict, prompt: str) -> int:
+    usage = getattr(output.get("raw"), "usage_metadata", None)
+    if usage:
+        return usage.get("total_tokens", 0)
+    return count_tokens(prompt) + count_tokens(output.get("parsed") or "")
+
+
+def _revised(state: dict, output: dict, prompt: str, start: float) -> dict:
+    article = state.get("Result") or state.get("Article", "")
+    revision = output.get("parsed")
+    edits = revision.edits if revision else []
+    text, applied = apply_edits(article, edits)
+    entry = {"score": state["review"]["score"], "edits": len(edits), "applied": applied,
+             "seconds": round(time.perf_counter() - start, 3), "tokens": _tokens(output, prompt)}
+    return {"Result": text, "revisions": [entry]}
+
+
+def make_revision_nodes(llm) -> dict:
+    def Reviser(state: dict) -> dict:
+        start = time.perf_counter()
+        prompt = revision_prompt(state.get("Result") or state.get("Article", ""), state["review"])
+        structured_llm = node_llm(llm, "Reviser").with_structured_output(Revision, include_raw=True)
+        return _revised(state, structured_llm.invoke(prompt), prompt, start)
+
+    return {"Reviser": Reviser}
+
+
+def make_async_revision_nodes(llm) -> dict:
+    async def Reviser(state: dict) -> dict:
+        start = time.perf_counter()
+        prompt = revision_prompt(state.get("Result") or state.get("Article", ""), state["review"])
+        structured_llm = node_llm(llm, "Reviser").with_structured_output(Revision, include_raw=True)
+        return _revised(state, await structured_llm.ainvoke(prompt), prompt, start)
+
+    return {"Reviser": Reviser}
@@ -0,0 +1,66 @@
+"""Per-node model routing: a small, fast model where a big one is wasted.
+
+The Reviewer's scores and the Editor's reformatting do not need a
+70B model, the Writer does. A `ModelRouter` holds one chat model per node
+(plus a default) and is passed to `pipeline.build_graph` in place of a
+single LLM; the nodes pick their model with `node_llm`.
+
+When a routed model's answer fails the node's validation (no parsable plan,
+no valid review, a draft still without structure) the node retries once
+on the router's `escalate_to` model, usually the large default.
+
+    router = pipeline.make_router()   # 8B for Editor/Reviewer, 70B elsewhere
+    agent = pipeline.build_graph(router)
+    router.stats()                    # {"Reviewer": 1} escalations per node
+"""
+
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRouter:
+    """Chat model per graph node, with optional escalation to a larger one."""
+
+    def __init__(self, models: dict, default, escalate_to=None):
+        self.models = dict(models)
+        self.default = default
+        self.escalate_to = escalate_to
+        self._lock = threading.Lock()
+        self._escalations = Counter()
+
+    def for_node(self, node):
+        return self.models.get(node, self.default)
+
+    def escalation(self, node):
+        """Model to retry `node` on after a failed validation, or None."""
+        if self.escalate_to is None or self.for_node(node) is self.escalate_to:
+            return None
+        with self._lock:
+            self._escalations[node] += 1
+        return self.escalate_to
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._escalations)
+
+
+def node_llm(llm, node):
+    """The model `node` should call; plain LLMs are used for every node."""
+    return llm.for_node(node) if isinstance(llm, ModelRouter) else llm
+
+
+def attempts(llm, node):
+    """Models to try for `node` in order: its own, then the escalation model.
+
+    The escalation is only looked up (and counted) when the caller asks for
+    a second attempt.
+    """
+    yield node_llm(llm, node)
+    if isinstance(llm, ModelRouter):
+        bigger = llm.escalation(node)
+        if bigger is not None:
+            logger.info("%s: answer failed validation, escalating to the larger model", node)
+            yield bigger
@@ -0,0 +1,417 @@
+"""Rate-limit-aware scheduler in front of every Groq call.
+
+One `RateLimitScheduler` is shared by all LLM clients of a process. It
+
+- reads Groq's `x-ratelimit-*` / `retry-after` response headers (through
+  httpx event hooks on the clients it hands out) and holds calls while the
+  request or token budget is exhausted,
+- optionally enforces local requests/tokens-per-minute budgets,
+- admits queued calls by priority ("interactive" UI runs before "batch"),
+- retries 429 / 5xx / connection errors with jittered exponential backoff,
+- adapts its concurrency limit: additive increase after a run of successes,
+  multiplicative decrease on every 429.
+
+    scheduler = RateLimitScheduler(max_concurrency=16, tpm=250_000)
+    llm = make_llm(scheduler=scheduler)
+    agent.invoke(state_input, config={"metadata": {"priority": "interactive"}})
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any
+
+import groq
+import httpx
+from langchain_core.runnables.config import var_child_runnable_config
+from langchain_groq import ChatGroq
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"interactive": 0, "default": 5, "batch": 10}
+
+RETRYABLE = (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value) -> float:
+    """Groq reset headers look like "6s", "1m2.5s" or "120ms"; retry-after is plain seconds."""
+    if value is None:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(n) * units[u] for n, u in _DURATION_RE.findall(value))
+
+
+def estimate_tokens(messages) -> int:
+    chars = sum(len(str(getattr(m, "content", m))) for m in messages)
+    return chars // 4 + 1
+
+
+class RateLimitScheduler:
+    def __init__(self, max_concurrency=8, min_concurrency=1, initial_concurrency=None, rpm=None, tpm=None,
+                 max_retries=5, base_delay=0.5, max_delay=30.0, expected_output_tokens=800):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = initial_concurrency or max(min_concurrency, max_concurrency // 2)
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.expected_output_tokens = expected_output_tokens
+
+        self._cond = threading.Condition()
+        self._async_waiters = {}            # ticket -> (loop, asyncio.Event) of aacquire calls
+        self._queue = []                    # heap of (priority, seq)
+        self._seq = itertools.count()
+        self.in_flight = 0
+        self._successes = 0
+        self._window = deque()              # (time, tokens) of admitted calls in the last minute
+        self._blocked_until = 0.0           # from 429 retry-after / exhausted header budgets
+        self._remaining_requests = None     # header budgets, trusted until _remaining_expires
+        self._remaining_tokens = None
+        self._remaining_expires = 0.0
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "errors": 0, "cancelled": 0}
+
+    # admission
+
+    def _budget_ok(self, tokens, now):
+        if now < self._blocked_until:
+            return False
+        if now >= self._remaining_expires:
+            # The server-side window has reset since the last response
+            self._remaining_requests = self._remaining_tokens = None
+        while self._window and now - self._window[0][0] > 60:
+            self._window.popleft()
+        if self.rpm is not None and len(self._window) >= self.rpm:
+            return False
+        if self.tpm is not None and sum(t for _, t in self._window) + tokens > self.tpm and self._window:
+            return False
+        if self._remaining_requests is not None and self._remaining_requests <= 0:
+            return False
+        if self._remaining_tokens is not None and self._remaining_tokens < tokens:
+            return False
+        return True
+
+    def _refill_wait(self, now):
+        # caller holds self._cond. Seconds until a time-based budget may reopen; None when
+        # only a release or a response can unblock the queue (they notify the waiters)
+        deadlines = [self._blocked_until, self._remaining_expires]
+        if self._window and (self.rpm is not None or self.tpm is not None):
+            deadlines.append(self._window[0][0] + 60)
+        waits = [deadline - now for deadline in deadlines if deadline >= now]
+        return min(waits) + 0.001 if waits else None
+
+    def _notify(self):
+        # caller holds self._cond. Wakes the blocking waiters and the event loops of the async ones
+        self._cond.notify_all()
+        for loop, event in self._async_waiters.values():
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Its loop was closed without cancelling the waiter
+                pass
+
+    def _try_admit(self, ticket, tokens):
+        # caller holds self._cond
+        now = time.monotonic()
+        if self._queue[0] != ticket or self.in_flight >= self.limit or not self._budget_ok(tokens, now):
+            return False
+        heapq.heappop(self._queue)
+        self.in_flight += 1
+        self._window.append((now, tokens))
+        if self._remaining_requests is not None:
+            self._remaining_requests -= 1
+        if self._remaining_tokens is not None:
+            self._remaining_tokens -= tokens
+        self._notify()
+        return True
+
+    def _enqueue(self, priority):
+        ticket = (PRIORITIES.get(priority, PRIORITIES["default"]), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _withdraw(self, ticket):
+        # A waiter that gives up (cancelled task, interrupt) must not stay at the head of the queue
+        with self._cond:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+            self._notify()
+
+    def acquire(self, tokens, priority="default"):
+        ticket = self._enqueue(priority)
+        try:
+            with self._cond:
+                while not self._try_admit(ticket, tokens):
+                    # Releases and responses notify; budgets that refill with time set the timeout
+                    self._cond.wait(timeout=self._refill_wait(time.monotonic()))
+        except BaseException:
+            self._withdraw(ticket)
+            raise
+
+    async def aacquire(self, tokens, priority="default"):
+        ticket = self._enqueue(priority)
+        event = asyncio.Event()
+        try:
+            with self._cond:
+                self._async_waiters[ticket] = (asyncio.get_running_loop(), event)
+            while True:
+                with self._cond:
+                    # Cleared under the lock, so a notify after the check is not lost
+                    event.clear()
+                    if self._try_admit(ticket, tokens):
+                        return
+                    timeout = self._refill_wait(time.monotonic())
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._withdraw(ticket)
+            raise
+        finally:
+            with self._cond:
+                self._async_waiters.pop(ticket, None)
+
+    def release(self, ok=True, rate_limited=False, cancelled=False):
+        with self._cond:
+            self.in_flight -= 1
+            self.stats["calls"] += 1
+            if cancelled:
+                # Says nothing about the API: no error, no change to the limit
+                self.stats["cancelled"] += 1
+            elif rate_limited:
+                self.stats["rate_limited"] += 1
+                self._successes = 0
+                self.limit = max(self.min_concurrency, self.limit // 2)
+            elif ok:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_concurrency:
+                    self._successes = 0
+                    self.limit += 1
+            else:
+                self.stats["errors"] += 1
+            self._notify()
+
+    # rate-limit headers
+
+    def observe_headers(self, headers):
+        now = time.monotonic()
+        with self._cond:
+            if "x-ratelimit-remaining-requests" in headers:
+                self._remaining_requests = int(float(headers["x-ratelimit-remaining-requests"]))
+            if "x-ratelimit-remaining-tokens" in headers:
+                self._remaining_tokens = int(float(headers["x-ratelimit-remaining-tokens"]))
+            resets = [parse_duration(headers.get(h)) for h in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+                      if h in headers]
+            if resets:
+                self._remaining_expires = now + max(1.0, max(resets))
+            if self._remaining_requests is not None and self._remaining_requests <= 0:
+                self._blocked_until = max(self._blocked_until, now + parse_duration(headers.get("x-ratelimit-reset-requests")))
+            if self._remaining_tokens is not None and self._remaining_tokens < self.expected_output_tokens:
+                self._blocked_until = max(self._blocked_until, now + parse_duration(headers.get("x-ratelimit-reset-tokens")))
+            if "retry-after" in headers:
+                self._blocked_until = max(self._blocked_until, now + parse_duration(headers["retry-after"]))
+            self._notify()
+
+    def _on_response(self, response):
+        self.observe_headers(response.headers)
+
+    async def _aon_response(self, response):
+        self.observe_headers(response.headers)
+
+    def http_client(self, **kwargs):
+        return httpx.Client(event_hooks={"response": [self._on_response]}, **kwargs)
+
+    def http_async_client(self, **kwargs):
+        return httpx.AsyncClient(event_hooks={"response": [self._aon_response]}, **kwargs)
+
+    # retries
+
+    def backoff(self, attempt, error=None):
+        """Full-jitter exponential backoff, never shorter than the server's retry-after."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        response = getattr(error, "response", None)
+        if response is not None and "retry-after" in response.headers:
+            delay = max(delay, parse_duration(response.headers["retry-after"]))
+        return delay
+
+    def _should_retry(self, error, attempt):
+        return isinstance(error, RETRYABLE) and attempt < self.max_retries
+
+    def call(self, fn, tokens, priority="default", run_manager=None):
+        for attempt in itertools.count():
+            self.acquire(tokens, priority)
+            try:
+                result = fn()
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    self.release(cancelled=True)
+                    raise
+                self.release(ok=False, rate_limited=isinstance(e, groq.RateLimitError))
+                if not self._should_retry(e, attempt):
+                    raise
+                retry_state = self._retrying(e, attempt)
+                if run_manager:
+                    run_manager.on_retry(retry_state)
+                time.sleep(self.backoff(attempt, e))
+                continue
+            self.release()
+            return result
+
+    async def acall(self, fn, tokens, priority="default", run_manager=None):
+        for attempt in itertools.count():
+            await self.aacquire(tokens, priority)
+            try:
+                result = await fn()
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    # Cancelled (e.g. a variant past its deadline): free the slot
+                    self.release(cancelled=True)
+                    raise
+                self.release(ok=False, rate_limited=isinstance(e, groq.RateLimitError))
+                if not self._should_retry(e, attempt):
+                    raise
+                retry_state = self._retrying(e, attempt)
+                if run_manager:
+                    await run_manager.on_retry(retry_state)
+                await asyncio.sleep(self.backoff(attempt, e))
+                continue
+            self.release()
+            return result
+
+    def stream(self, start, tokens, priority="default", run_manager=None):
+        """Like `call` for a chunk iterator: retried until the first chunk arrives,
+        and the slot is held until the stream is exhausted."""
+        for attempt in itertools.count():
+            self.acquire(tokens, priority)
+            try:
+                chunks = start()
+                first = next(chunks, None)
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    self.release(cancelled=True)
+                    raise
+                self.release(ok=False, rate_limited=isinstance(e, groq.RateLimitError))
+                if not self._should_retry(e, attempt):
+                    raise
+                retry_state = self._retrying(e, attempt)
+                if run_manager:
+                    run_manager.on_retry(retry_state)
+                time.sleep(self.backoff(attempt, e))
+                continue
+            try:
+                if first is not None:
+                    yield first
+                    yield from chunks
+            except BaseException as e:
+                # A consumer that stops reading (GeneratorExit) says nothing about the API
+                self.release(ok=False, cancelled=not isinstance(e, Exception))
+                raise
+            self.release()
+            return
+
+    async def astream(self, start, tokens, priority="default", run_manager=None):
+        for attempt in itertools.count():
+            await self.aacquire(tokens, priority)
+            try:
+                chunks = start()
+                first = await anext(chunks, None)
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    self.release(cancelled=True)
+                    raise
+                self.release(ok=False, rate_limited=isinstance(e, groq.RateLimitError))
+                if not self._should_retry(e, attempt):
+                    raise
+                retry_state = self._retrying(e, attempt)
+                if run_manager:
+                    await run_manager.on_retry(retry_state)
+                await asyncio.sleep(self.backoff(attempt, e))
+                continue
+            try:
+                if first is not None:
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+            except BaseException as e:
+                # Closed (GeneratorExit) or cancelled by the consumer, see `stream`
+                self.release(ok=False, cancelled=not isinstance(e, Exception))
+                raise
+            self.release()
+            return
+
+    def _retrying(self, error, attempt):
+        with self._cond:
+            self.stats["retries"] += 1
+        logger.warning("Groq call failed (%s), retry %d/%d", type(error).__name__, attempt + 1, self.max_retries)
+        # Passed to on_retry callbacks; metrics.NodeMetrics counts it as a retry
+        return _RetryState(attempt + 1, error)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {**self.stats, "limit": self.limit, "in_flight": self.in_flight, "queued": len(self._queue)}
+
+
+class _RetryState:
+    # Minimal stand-in for tenacity's RetryCallState passed to on_retry callbacks
+    def __init__(self, attempt_number, error):
+        self.attempt_number = attempt_number
+        self.error = error
+
+
+def _priority(run_manager):
+    # Streamed calls get no run_manager; fall back to the config of the running runnable
+    metadata = getattr(run_manager, "metadata", None) or (var_child_runnable_config.get() or {}).get("metadata") or {}
+    return metadata.get("priority", "default")
+
+
+class ScheduledChatGroq(ChatGroq):
+    """ChatGroq whose API calls all go through a shared `RateLimitScheduler`.
+
+    The Groq SDK's own retries are disabled; the scheduler owns them.
+    """
+
+    scheduler: Any = None
+
+    def _tokens(self, messages):
+        return estimate_tokens(messages) + self.scheduler.expected_output_tokens
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        def call():
+            return super(ScheduledChatGroq, self)._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        return self.scheduler.call(call, self._tokens(messages), _priority(run_manager), run_manager)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        def call():
+            return super(ScheduledChatGroq, self)._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        return await self.scheduler.acall(call, self._tokens(messages), _priority(run_manager), run_manager)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        def start():
+            return super(ScheduledChatGroq, self)._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        yield from self.scheduler.stream(start, self._tokens(messages), _priority(run_manager), run_manager)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        def start():
+            return super(ScheduledChatGroq, self)._astream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        async for chunk in self.scheduler.astream(start, self._tokens(messages), _priority(run_manager), run_manager):
+            yield chunk
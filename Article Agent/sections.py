@@ -0,0 +1,96 @@
+"""Section-parallel writer: draft every planned step at once, then stitch.
+
+With `writer_mode="sections"` the Organizer's `steps` are mapped onto
+concurrent `SectionWriter` runs (one LangGraph `Send` per step) that share
+the plan's `instructions_for_writer`. `Stitch` joins them in plan order and
+keeps the result within the requested `length`, so the Writer phase takes
+about as long as the slowest section instead of the whole article.
+
+Every section gets the author's notes within the graph's `PromptBudget`,
+and a draft sent back by the `DraftCheck` guard is redone section by
+section with the guard's feedback.
+"""
+
+from langgraph.types import Send
+
+from markdown_formatter import trim_to
+from nodes import guard_feedback
+from prompt_budget import PromptBudget
+from routing import node_llm
+
+# A stitched article may overshoot `length` by this much before sections are trimmed
+LENGTH_SLACK = 1.15
+
+
+def fan_out_sections(state: dict):
+    """Conditional edge after the Organizer (or a draft retry): one Send per plan step.
+
+    Falls back to the single-call Writer when the plan has no steps.
+    """
+    plan = state.get("Plan")
+    steps = getattr(plan, "steps", None)
+    if not steps:
+        return "Writer"
+    chars = max(150, int(state.get("length") or 1200) // len(steps))
+    shared = {"Plan": plan, "count": len(steps), "chars": chars,
+              "content": state.get("content"), "guard": state.get("guard") or []}
+    return [Send("SectionWriter", {**shared, "index": i, "step": step}) for i, step in enumerate(steps)]
+
+
+def section_prompt(task: dict, budget: PromptBudget = None) -> str:
+    budget = budget or PromptBudget()
+    plan = task["Plan"]
+
+    def prompt(notes):
+        return f"""You are writing ONE section of an article; other writers handle the rest in parallel.
+
+    Article title: {plan.title}
+    Header: {plan.header}
+    Central question: {plan.question}
+    Target audience: {plan.target}
+    Shared instructions for all writers: {plan.instructions_for_writer}
+    Author's notes: {notes}
+
+    Full outline: {" | ".join(plan.steps)}
+    Your section ({task['index'] + 1} of {task['count']}): {task['step']}
+
+    Write only this section, starting with a "## " heading. About {task['chars']} characters.
+    No introduction to the whole article unless this is section 1, no conclusion unless it is the last one.
+    """ + guard_feedback(task, "Writer")
+
+    notes = task.get("content") or plan.content
+    budgeted = prompt(budget.content(notes))
+    budget.record("SectionWriter", budgeted, prompt(notes))
+    return budgeted
+
+
+def stitch(state: dict) -> dict:
+    plan = state.get("Plan")
+    # `Sections` keeps appending across draft retries: the last pass has one entry per step
+    count = len(getattr(plan, "steps", None) or [])
+    sections = [text for _, text in sorted(state.get("Sections", [])[-count:], key=lambda entry: entry[0])]
+    length = int(state.get("length") or 0)
+    body_length = sum(len(s) for s in sections)
+    if length and body_length > length * LENGTH_SLACK:
+        # Shrink every section by the same ratio so each keeps its share
+        ratio = length / body_length
+        sections = [trim_to(s, int(len(s) * ratio)) for s in sections]
+    article = "\n\n".join(s.strip() for s in sections if s.strip())
+    # A title over no sections is no draft (the draft check redoes it)
+    return {"Article": f"# {plan.title}\n\n{article}" if article and getattr(plan, "title", "") else article}
+
+
+def make_section_nodes(llm, budget: PromptBudget = None) -> dict:
+    def SectionWriter(task: dict) -> dict:
+        result = node_llm(llm, "SectionWriter").invoke(section_prompt(task, budget))
+        return {"Sections": [(task["index"], result.content)]}
+
+    return {"SectionWriter": SectionWriter, "Stitch": stitch}
+
+
+def make_async_section_nodes(llm, budget: PromptBudget = None) -> dict:
+    async def SectionWriter(task: dict) -> dict:
+        result = await node_llm(llm, "SectionWriter").ainvoke(section_prompt(task, budget))
+        return {"Sections": [(task["index"], result.content)]}
+
+    return {"SectionWriter": SectionWriter, "Stitch": stitch}
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+# The app modules are flat scripts in the parent folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def groq_env(monkeypatch):
+    """A `FakeGroqServer` the models built by the front ends (cli.py, batch.py) talk to."""
+    from fake_groq import FakeGroqServer
+
+    # They build their own ChatGroq clients, which read the endpoint from the environment
+    with FakeGroqServer(latency=0.01, token_rate=5000) as server:
+        monkeypatch.setenv("GROQ_API_BASE", server.url)
+        monkeypatch.setenv("GROQ_API_KEY", "fake")
+        yield server
+
+
+@pytest.fixture
+def two_pass_graph():
+    """Stand-in for Reviewer -> Reviser -> Reviewer: two revision passes, only the first changes the text."""
+    from langgraph.graph import END, START, StateGraph
+
+    from nodes import GraphState
+
+    def Reviser1(state):
+        return {"revisions": [{"score": 2.0, "applied": 1}], "Result": "# Fixed"}
+
+    def Reviser2(state):
+        return {"revisions": [{"score": 3.0, "applied": 0}], "review": {"score": 4.0}}
+
+    graph = StateGraph(GraphState)
+    graph.add_node("Reviser1", Reviser1)
+    graph.add_node("Reviser2", Reviser2)
+    graph.add_edge(START, "Reviser1")
+    graph.add_edge("Reviser1", "Reviser2")
+    graph.add_edge("Reviser2", END)
+    return graph.compile()
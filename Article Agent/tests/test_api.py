@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from api import ArticleService, Run, parse_brief
+
+BRIEF = {"subject": "s", "target": "t", "length": 900, "content": "c"}
+
+
+def test_api_result_keeps_every_revision_pass(two_pass_graph):
+    async def main():
+        service = ArticleService(two_pass_graph)
+        run, = service.submit([BRIEF])
+        await asyncio.gather(*service._tasks)
+        return run
+
+    run = asyncio.run(main())
+    view = run.view()
+    assert view["status"] == "done"
+    assert view["article"]["article"] == "# Fixed"
+    assert [r["applied"] for r in view["article"]["revisions"]] == [1, 0]
+    assert [kind for _, kind, _ in run.events] == ["status", "node", "node", "done"]
+
+
+def test_finished_runs_drop_their_tokens_but_keep_event_ids():
+    async def main():
+        run = Run("a", BRIEF)
+        run.emit("status", {"status": "running"})
+        for text in "abc":
+            run.emit("token", {"node": "Writer", "text": text})
+        run.emit("node", {"node": "Writer"})
+        run.finished_at = 1.0
+        run.emit("done", {})
+        run.drop_tokens()
+        # A client resuming after the second token still gets what came next, with its original ids
+        return [(event_id, kind) async for event_id, kind, _ in run.follow(start=3)]
+
+    assert asyncio.run(main()) == [(4, "node"), (5, "done")]
+
+
+@pytest.mark.parametrize("length", [True, False, "900", 50, 1.5])
+def test_parse_brief_rejects_bad_lengths(length):
+    with pytest.raises(ValueError):
+        parse_brief({**BRIEF, "length": length})
@@ -0,0 +1,39 @@
+import pytest
+
+from article_store import ArticleStore, BadQuery, fts_query
+
+
+def store_with(tmp_path, *articles):
+    store = ArticleStore(str(tmp_path / "articles.sqlite"))
+    for i, text in enumerate(articles):
+        store.add({"id": f"a{i}", "created_at": float(i), "subject": "s", "target": "t", "title": f"Title {i}",
+                   "content": "", "result": text})
+    return store
+
+
+def test_fts_query_quotes_keywords():
+    assert fts_query("U.S. inflation") == '"U.S." "inflation"'
+    assert fts_query('infl* "rate') == '"infl"* """rate"'
+    assert fts_query(" ? - ") is None
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("covid-19", ["a0"]),
+    ("U.S. inflation", ["a1"]),
+    ("inflation?", ["a1"]),
+    ("infl*", ["a1"]),
+    ("NEAR", []),
+])
+def test_keyword_queries_do_not_crash(tmp_path, query, expected):
+    store = store_with(tmp_path, "Covid-19 cases fell.", "U.S. inflation rose again.")
+    assert [item["id"] for item in store.page(query)["items"]] == expected
+    assert store.count(query) == len(expected)
+
+
+def test_raw_queries_are_opt_in_and_reported(tmp_path):
+    store = store_with(tmp_path, "Rates and a hike.", "Inflation rose.")
+    assert [item["id"] for item in store.page("NEAR(rates hike)", raw=True)["items"]] == ["a0"]
+    with pytest.raises(BadQuery):
+        store.page("covid-19", raw=True)
+    with pytest.raises(BadQuery):
+        list(store.iter_records(query="inflation?", raw=True))
@@ -0,0 +1,27 @@
+import asyncio
+import json
+
+import batch
+from article_store import ArticleStore
+from batch import run_batch
+from markdown_formatter import DEFAULT_EDITOR_MODE
+
+
+def test_batch_keeps_every_revision_pass(tmp_path, two_pass_graph):
+    out = tmp_path / "out.jsonl"
+    brief = {"subject": "s", "target": "t", "length": 900, "content": "c"}
+    summary = asyncio.run(run_batch(two_pass_graph, [brief, brief], out))
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [len(r["revisions"]) for r in records] == [2, 2]
+    assert summary["quality"]["revised"] == 2
+    assert summary["quality"]["revision_passes"] == 4
+
+
+def test_batch_main_uses_the_shared_editor_default(groq_env, tmp_path):
+    requests, out, store = tmp_path / "requests.jsonl", tmp_path / "out.jsonl", tmp_path / "articles.sqlite"
+    brief = {"subject": "⚽ Sport", "target": "👨‍👩‍👧 Family", "length": 1200, "content": "Kids love football."}
+    requests.write_text(json.dumps(brief), encoding="utf-8")
+    batch.main([str(requests), str(out), "--store", str(store)])
+    record = json.loads(out.read_text(encoding="utf-8"))
+    assert record["article"] and "error" not in record
+    assert ArticleStore(str(store)).get(record["id"])["options"]["editor_mode"] == DEFAULT_EDITOR_MODE
@@ -0,0 +1,60 @@
+import io
+import json
+
+import pytest
+
+import cli
+from article_store import ArticleStore
+from markdown_formatter import DEFAULT_EDITOR_MODE
+
+BRIEF = {"subject": "⚽ Sport", "target": "👨‍👩‍👧 Family", "length": 1200, "content": "Kids love football."}
+
+
+def test_generate_one_article_as_json(groq_env, tmp_path, capsys):
+    store = tmp_path / "articles.sqlite"
+    argv = ["generate", "--subject", BRIEF["subject"], "--target", BRIEF["target"], "--content", BRIEF["content"],
+            "--store", str(store)]
+    assert cli.main(argv) == 0
+    out, err = capsys.readouterr()
+    record = json.loads(out)
+    assert record["input"] == BRIEF
+    assert record["article"].startswith("# ") and record["review"]["score"] == 4.2
+    assert "Writer done" in err and "--- Writer ---" in err
+    stored = ArticleStore(str(store)).get(record["id"])
+    assert stored["options"]["editor_mode"] == DEFAULT_EDITOR_MODE
+
+
+def test_generate_an_input_file_one_line_per_article(groq_env, tmp_path, capsys):
+    requests = tmp_path / "requests.jsonl"
+    requests.write_text("\n".join(json.dumps({**BRIEF, "length": length}) for length in (800, 1200)), encoding="utf-8")
+    assert cli.main(["generate", "--input", str(requests), "--concurrency", "2", "--editor-mode", "local"]) == 0
+    out, err = capsys.readouterr()
+    records = [json.loads(line) for line in out.splitlines()]
+    assert sorted(record["index"] for record in records) == [0, 1]
+    assert all(record["article"] and "error" not in record for record in records)
+    assert "[2/2]" in err
+
+
+def test_quiet_only_reports_finished_nodes(groq_env, capsys):
+    argv = ["generate", "--subject", BRIEF["subject"], "--target", BRIEF["target"], "--content", BRIEF["content"],
+            "--editor-mode", "local", "--quiet"]
+    assert cli.main(argv) == 0
+    err = capsys.readouterr().err
+    assert "Reviewer done" in err and "---" not in err
+
+
+def test_generate_needs_a_brief_or_an_input_file(capsys):
+    with pytest.raises(SystemExit) as exit:
+        cli.main(["generate", "--subject", BRIEF["subject"]])
+    assert exit.value.code == 2
+    assert "generate needs --input" in capsys.readouterr().err
+
+
+def test_notes_come_from_a_file_or_stdin(tmp_path, monkeypatch):
+    notes = tmp_path / "notes.txt"
+    notes.write_text("From a file.", encoding="utf-8")
+    parse = cli.argparse.Namespace
+    assert cli.read_content(parse(content=None, content_file=str(notes))) == "From a file."
+    monkeypatch.setattr(cli.sys, "stdin", io.StringIO("From stdin."))
+    assert cli.read_content(parse(content=None, content_file="-")) == "From stdin."
+    assert cli.read_content(parse(content="Inline.", content_file=str(notes))) == "Inline."
@@ -0,0 +1,86 @@
+from langgraph.graph import END
+
+from fake_groq import FakeGroqServer
+from guards import (EMPTY_DRAFT, GuardPolicy, after_draft_check, after_plan_check, draft_problems, make_guard_nodes,
+                    plan_problems, unless_plan_error)
+from nodes import PLAN_ERROR, State
+from pipeline import build_graph, make_router
+
+BRIEF = {"subject": "⚽ Sport", "target": "👨‍👩‍👧 Family", "length": 1200, "content": "Kids love football."}
+
+
+def plan(**fields):
+    values = {"subject": "⚽ Sport", "length": 1200, "target": "👨‍👩‍👧 Family", "title": "Football", "header": "Why",
+              "question": "Why?", "content": "Kids love football.", "steps": ["One", "Two"],
+              "instructions_for_writer": "Be concrete"}
+    return State(**{**values, **fields})
+
+
+def check(node, state, policy=None):
+    return make_guard_nodes(policy or GuardPolicy())[node](state)["guard"][0]
+
+
+def test_plan_problems():
+    assert plan_problems(plan()) == []
+    assert plan_problems(PLAN_ERROR) == ["no plan"]
+    assert plan_problems(plan(title=" ", steps=[])) == ["empty title", "no outline steps"]
+
+
+def test_draft_problems_ignore_word_count_notes():
+    assert draft_problems("x" * 1200, 1200, 0.35) == []
+    assert draft_problems("x" * 2155, 1200, 0.35) == ["2155 characters, target 1200"]
+    assert draft_problems("x" * 1200 + "\n(Word count: 300)", 1200, 0.0) == []
+    assert draft_problems("  ", 1200, 0.35) == [EMPTY_DRAFT]
+    assert draft_problems("short", None, 0.35) == []
+
+
+def test_plan_check_retries_once_then_stops():
+    first = check("PlanCheck", {"Plan": PLAN_ERROR})
+    assert first["action"] == "retry"
+    assert after_plan_check({"guard": [first]}, then=lambda state: "Writer") == "Organizer"
+    second = check("PlanCheck", {"Plan": PLAN_ERROR, "guard": [first]})
+    assert second["action"] == "stop"
+    assert after_plan_check({"guard": [first, second]}, then=lambda state: "Writer") == END
+    ok = check("PlanCheck", {"Plan": plan()})
+    assert after_plan_check({"guard": [ok]}, then=lambda state: "Writer") == "Writer"
+
+
+def test_off_length_draft_is_only_noted_by_default():
+    entry = check("DraftCheck", {"Article": "x" * 2155, "length": 1200})
+    assert entry == {"node": "Writer", "problems": ["2155 characters, target 1200"], "action": "note"}
+    assert after_draft_check({"guard": [entry]}, then=["Editor"]) == ["Editor"]
+
+
+def test_off_length_draft_is_redone_once_when_asked():
+    policy = GuardPolicy(redo_length=True)
+    first = check("DraftCheck", {"Article": "x" * 2155, "length": 1200}, policy)
+    assert first["action"] == "retry"
+    assert after_draft_check({"guard": [first]}, then="Editor") == "Writer"
+    second = check("DraftCheck", {"Article": "x" * 2155, "length": 1200, "guard": [first]}, policy)
+    assert second["action"] == "accept"
+    assert after_draft_check({"guard": [first, second]}, then="Editor") == "Editor"
+
+
+def test_empty_draft_is_always_redone():
+    assert check("DraftCheck", {"Article": "", "length": 1200})["action"] == "retry"
+
+
+def test_unless_plan_error():
+    assert unless_plan_error({"Plan": PLAN_ERROR}, then=lambda state: "Writer") == END
+    assert unless_plan_error({"Plan": plan()}, then=lambda state: "Writer") == "Writer"
+
+
+def writer_calls(guard):
+    with FakeGroqServer(latency=0.01, token_rate=5000, article_words=300) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        final = build_graph(llm, editor_mode="local", guard=guard).invoke(BRIEF)
+        return final, server.requests
+
+
+def test_default_guard_does_not_pay_for_a_second_draft():
+    final, requests = writer_calls(GuardPolicy())
+    draft_check = [entry for entry in final["guard"] if entry["node"] == "Writer"]
+    assert [entry["action"] for entry in draft_check] == ["note"]
+    # Organizer, Writer, Reviewer
+    assert requests == 3
+    assert writer_calls(GuardPolicy(redo_length=True))[1] == 4
@@ -0,0 +1,136 @@
+import copy
+
+import pytest
+
+from article_store import ArticleStore
+from checkpoints import new_thread_id, open_checkpointer, run_status
+from fake_groq import FakeGroqServer
+from jobs import JobQueue, JobStore
+from pipeline import build_graph, make_router
+
+BRIEF = {"subject": "⚽ Sport", "target": "👨‍👩‍👧 Family", "length": 1200, "content": "Kids love football."}
+
+
+@pytest.fixture
+def graphs(tmp_path):
+    """`get_graph` for a JobQueue: checkpointed graphs against a fake server, and the options asked for."""
+    with FakeGroqServer(latency=0.01, token_rate=5000) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        checkpointer = open_checkpointer(str(tmp_path / "checkpoints.sqlite"))
+        asked = []
+
+        def get_graph(**options):
+            asked.append(options)
+            if options.get("broken"):
+                raise RuntimeError("no graph")
+            return build_graph(llm, editor_mode="local", checkpointer=checkpointer)
+
+        get_graph.asked = asked
+        yield get_graph
+
+
+def run(queue, *args, **kwargs):
+    job_id = queue.submit(*args, **kwargs)
+    queue.shutdown()
+    return queue.store.get(job_id)
+
+
+def test_generate_job_records_steps_and_saves_the_article(tmp_path, graphs):
+    articles = ArticleStore(str(tmp_path / "articles.sqlite"))
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite")), graphs, workers=1, articles=articles)
+    thread_id = new_thread_id()
+    job = run(queue, thread_id, {"topology": "chain"}, "generate", BRIEF)
+    assert job["status"] == "done" and job["error"] is None
+    assert job["steps"] == ["Organizer", "Writer", "Editor", "Reviewer"]
+    assert {record["node"] for record in job["metrics"]} >= {"Writer", "Reviewer"}
+    assert job["draft"] == "" and job["current"] is None
+    assert graphs.asked == [{"topology": "chain"}]
+    assert articles.get(thread_id)["result"].startswith("# ")
+
+
+def test_rerun_job_only_repeats_the_node(tmp_path, graphs):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    thread_id = new_thread_id()
+    run(JobQueue(store, graphs, workers=1), thread_id, {}, "generate", BRIEF)
+    job = run(JobQueue(store, graphs, workers=1), thread_id, {}, "rerun", node="Reviewer")
+    assert job["status"] == "done" and job["steps"] == ["Reviewer"]
+    with pytest.raises(ValueError):
+        JobQueue(store, graphs).submit(thread_id, {}, "publish")
+
+
+def test_failures_are_recorded_on_the_job(tmp_path, graphs):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    job = run(JobQueue(store, graphs, workers=1), new_thread_id(), {"broken": True}, "generate", BRIEF)
+    assert job["status"] == "failed" and job["error"] == "RuntimeError: no graph"
+    assert job["finished_at"] >= job["started_at"]
+    # A run with no checkpoint to resume from fails too, it does not start over
+    job = run(JobQueue(store, graphs, workers=1), new_thread_id(), {}, "rerun", node="Writer")
+    assert job["status"] == "failed" and job["error"].startswith("ValueError")
+
+
+def test_recover_requeues_jobs_cut_off_by_a_restart(tmp_path, graphs):
+    path = str(tmp_path / "jobs.sqlite")
+    store = JobStore(path)
+    queued = store.create(new_thread_id(), "generate", {}, BRIEF)
+    running = store.create(new_thread_id(), "generate", {}, BRIEF)
+    store.update(running, status="running", current="Writer", draft="Half a dr")
+    done = store.create(new_thread_id(), "generate", {}, BRIEF)
+    store.update(done, status="done")
+    assert store.position(running) == 1
+
+    queue = JobQueue(JobStore(path), graphs, workers=2)
+    assert queue.recover() == [queued, running]
+    queue.shutdown()
+    assert [queue.store.get(job_id)["status"] for job_id in (queued, running, done)] == ["done"] * 3
+    assert queue.store.unfinished() == []
+
+
+def test_recovered_generate_job_continues_from_its_checkpoint(tmp_path, graphs):
+    path = str(tmp_path / "jobs.sqlite")
+    thread_id = new_thread_id()
+    # The previous process got as far as the Writer
+    agent = graphs()
+    for update in agent.stream(BRIEF, {"configurable": {"thread_id": thread_id}}):
+        if "Writer" in update:
+            break
+    job_id = JobStore(path).create(thread_id, "generate", {}, BRIEF)
+    queue = JobQueue(JobStore(path), graphs, workers=1)
+    queue.recover()
+    queue.shutdown()
+    assert queue.store.get(job_id)["steps"] == ["Editor", "Reviewer"]
+    assert run_status(agent, thread_id)["pending"] == ()
+
+
+def test_a_job_queued_twice_runs_once(tmp_path, graphs):
+    path = str(tmp_path / "jobs.sqlite")
+    store = JobStore(path)
+    job_id = store.create(new_thread_id(), "generate", {}, BRIEF)
+    queue = JobQueue(JobStore(path), graphs, workers=2)
+    queue.recover()
+    queue._pool.submit(queue._run, job_id)
+    queue.shutdown()
+    assert len(graphs.asked) == 1
+    assert store.claim(job_id) is False
+
+
+class UpdateLog(JobStore):
+    # Every update written to the job table, as the page polling it would see them
+    def __init__(self, path):
+        super().__init__(path)
+        self.updates = []
+
+    def update(self, job_id, **fields):
+        self.updates.append(copy.deepcopy(fields))
+        super().update(job_id, **fields)
+
+
+def test_metrics_are_written_as_each_step_finishes(tmp_path, graphs):
+    store = UpdateLog(str(tmp_path / "jobs.sqlite"))
+    run(JobQueue(store, graphs, workers=1), new_thread_id(), {}, "generate", BRIEF)
+    step_updates = [update for update in store.updates if "steps" in update]
+    assert [update["steps"][-1] for update in step_updates] == ["Organizer", "Writer", "Editor", "Reviewer"]
+    for update in step_updates:
+        # Every finished step already has its own metrics while the run goes on
+        assert [record["node"] for record in update["metrics"]][:len(update["steps"])] == update["steps"]
+    organizer = step_updates[0]["metrics"][0]
+    assert organizer["wall_s"] > 0 and organizer["llm_calls"] == 1
@@ -0,0 +1,125 @@
+import asyncio
+import contextvars
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+import llm_cache
+from llm_cache import DiskLLMCache, SQLiteLLMCache
+
+LLM = "model-a"
+
+
+@pytest.fixture(params=["sqlite", "disk"])
+def make_cache(request, tmp_path):
+    def make(**limits):
+        if request.param == "sqlite":
+            return SQLiteLLMCache(str(tmp_path / "cache.sqlite"), **limits)
+        return DiskLLMCache(str(tmp_path / "cache"), **limits)
+    return make
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Wall clock for TTL / LRU order, perf counter for call timing; both moved by hand
+    now = {"time": 1000.0, "perf": 0.0}
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now["time"])
+    monkeypatch.setattr(llm_cache.time, "perf_counter", lambda: now["perf"])
+    return now
+
+
+def answer(text="Rating: 4/5"):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_hits_ignore_whitespace_but_not_the_model(make_cache):
+    cache = make_cache()
+    assert cache.lookup("Review  this\narticle", LLM) is None
+    cache.update("Review  this\narticle", LLM, answer())
+    hit = cache.lookup(" Review this article ", LLM)
+    assert hit[0].message.content == "Rating: 4/5"
+    assert hit[0].generation_info["cache_hit"]
+    assert cache.lookup("Review this article", "model-b") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+def test_entries_expire_after_ttl(make_cache, clock):
+    cache = make_cache(ttl=60)
+    cache.update("p", LLM, answer())
+    clock["time"] += 30
+    assert cache.lookup("p", LLM) is not None
+    clock["time"] += 31
+    assert cache.lookup("p", LLM) is None
+
+
+def test_lru_eviction_by_count(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    for prompt in ("a", "b"):
+        cache.update(prompt, LLM, answer())
+        later(clock)
+    assert cache.lookup("a", LLM) is not None  # "a" used last, so "b" goes
+    later(clock)
+    cache.update("c", LLM, answer())
+    assert cache.lookup("b", LLM) is None
+    assert cache.lookup("a", LLM) is not None and cache.lookup("c", LLM) is not None
+
+
+def test_lru_eviction_by_bytes(make_cache, clock):
+    probe = make_cache()
+    probe.update("size", LLM, answer("x" * 200))
+    one = probe.stats()["bytes"]
+    probe.clear()
+    cache = make_cache(max_bytes=int(one * 1.5))
+    cache.update("a", LLM, answer("x" * 200))
+    later(clock)
+    cache.update("b", LLM, answer("x" * 200))
+    assert cache.lookup("a", LLM) is None
+    assert cache.lookup("b", LLM) is not None
+
+
+def later(clock):
+    # Advances both LRU clocks: time.time() for the SQLite rows, file mtimes for the disk cache
+    clock["time"] += 1
+    time.sleep(0.02)
+
+
+def test_concurrent_misses_on_one_key_are_timed_separately(clock):
+    cache = SQLiteLLMCache(":memory:")
+    key = llm_cache.cache_key("same prompt", LLM)
+    # Two threads / tasks: each runs in its own context
+    first, second = contextvars.copy_context(), contextvars.copy_context()
+    first.run(cache.lookup, "same prompt", LLM)
+    clock["perf"] = 1.0
+    second.run(cache.lookup, "same prompt", LLM)
+    clock["perf"] = 2.0
+    assert first.run(cache._call_seconds, key) == 2.0
+    clock["perf"] = 6.0
+    assert second.run(cache._call_seconds, key) == 5.0
+
+
+def test_a_failed_call_leaves_no_timing_behind(clock):
+    cache = SQLiteLLMCache(":memory:")
+    clock["perf"] = 5.0
+    cache.lookup("fails", LLM)  # the call after this miss raises: no update
+    clock["perf"] = 10.0
+    cache.lookup("next", LLM)
+    clock["perf"] = 12.0
+    cache.update("next", LLM, answer())
+    clock["perf"] = 50.0
+    cache.update("fails", LLM, answer())  # a late update for the failed key is not timed
+    assert cache._conn.execute("SELECT seconds FROM llm_cache ORDER BY seconds").fetchall() == [(0.0,), (2.0,)]
+
+
+def test_async_lookup_and_update_time_the_call(clock):
+    cache = SQLiteLLMCache(":memory:")
+
+    async def call():
+        assert await cache.alookup("p", LLM) is None
+        clock["perf"] = 3.0
+        await cache.aupdate("p", LLM, answer())
+        return await cache.alookup("p", LLM)
+
+    assert asyncio.run(call())[0].message.content == "Rating: 4/5"
+    assert cache.stats()["saved_seconds"] == 3.0
@@ -0,0 +1,84 @@
+from markdown_formatter import format_markdown, needs_llm, strip_meta, strip_word_counts
+
+
+def test_strip_meta_keeps_content_that_opens_like_a_lead_in():
+    assert strip_meta("Sure, the economy grew by 3% last year.") == "Sure, the economy grew by 3% last year."
+    text = "Intro.\n\nHere is the article's main point: inflation hit families hardest.\n\nEnd."
+    assert strip_meta(text) == text
+
+
+def test_strip_meta_drops_short_lead_ins_and_sign_offs():
+    text = "Sure! Here is the article:\n\n# Growth\n\nBody.\n\nI hope this helps!"
+    assert strip_meta(text) == "# Growth\n\nBody."
+
+
+def test_strip_meta_keeps_long_edge_lines():
+    line = "Of course, " + "the data tells a more careful story than the headlines " * 4
+    assert strip_meta(line + "\n\nBody.").startswith(line)
+
+
+def test_numbered_items_quotes_and_tables_are_not_headings():
+    text = ("Title: Growth\n\nIntro text here.\n\n1. Pick one metric\n\n> \"Measure what matters\"\n\n"
+            "| Option | Cost |\n|---|---|\n| A | 1 |\n")
+    out = format_markdown(text)
+    assert "1. Pick one metric" in out.splitlines()
+    assert '> "Measure what matters"' in out.splitlines()
+    assert "| Option | Cost |" in out.splitlines()
+    assert out.count("\n## ") == 0
+
+
+def test_questions_on_their_own_line_stay_text_unless_bold():
+    out = format_markdown("# Growth\n\nIntro.\n\nWhat should you do?\n\nBody.\n\n**Why now?**\n\nMore.")
+    assert "What should you do?" in out.splitlines()
+    assert "## Why now?" in out.splitlines()
+
+
+def test_code_blocks_are_kept_verbatim():
+    code = "```\nExample\n\n- x\n* y\n```"
+    out = format_markdown(f"# Growth\n\nIntro.\n\n{code}\n\nBody.")
+    assert code in out
+
+
+def test_plain_sections_still_become_headings():
+    out = format_markdown("Growth in 2024\n\nIntro paragraph.\n\nWhat changed\n\nBody.\n\nKey numbers:\n\n• one\n• two")
+    lines = out.splitlines()
+    assert lines[0] == "# Growth in 2024"
+    assert "## What changed" in lines
+    assert "### Key numbers" in lines
+    assert "- one" in lines
+
+
+def test_needs_llm_for_a_wall_of_text():
+    assert needs_llm(format_markdown("word " * 400))
+
+
+def test_counts_inside_prose_are_kept():
+    text = "Tweets are capped at (280 characters) and posts at ~500 words."
+    assert strip_word_counts(text) == text
+    assert strip_word_counts("Keep it short: about 300 words is plenty.") == "Keep it short: about 300 words is plenty."
+    assert strip_word_counts("Word count matters for SEO.") == "Word count matters for SEO."
+
+
+def test_word_count_notes_are_removed():
+    text = "Body text. (≈120 words)\n[Word count: 450]\n~150 words\n## Introduction – 200 words\n**Outlook (80 words)**"
+    assert strip_word_counts(text) == "Body text.\n## Introduction\n**Outlook**"
+
+
+def test_h1_only_before_any_other_heading():
+    out = format_markdown("## Intro\n\nFirst paragraph.\n\nConclusion\n\nLast paragraph.\n\n# Outlook\n\nMore text.")
+    lines = out.splitlines()
+    assert [line for line in lines if line.startswith("#")] == ["## Intro", "## Conclusion", "## Outlook"]
+
+
+def test_short_lines_without_a_heading_signal_stay_text():
+    out = format_markdown("# Growth\n\nIntro paragraph.\n\nThanks for reading")
+    assert out.splitlines()[-1] == "Thanks for reading"
+    out = format_markdown("# Growth\n\nIntro paragraph.\n\nThe 2024 budget: 200 words\n\nBody paragraph.")
+    assert "The 2024 budget: 200 words" in out.splitlines()
+    out = format_markdown("# Growth\n\nIntro paragraph.\n\nSee the table\nbelow for details")
+    assert "See the table" in out.splitlines()
+
+
+def test_title_cased_labels_are_sub_headings():
+    out = format_markdown("# Growth\n\nIntro paragraph.\n\nWhat Changed:\n\nBody paragraph.")
+    assert "### What Changed" in out.splitlines()
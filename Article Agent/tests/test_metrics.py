@@ -0,0 +1,42 @@
+import itertools
+import uuid
+
+import metrics
+from metrics import NodeMetrics
+
+
+def run_node(collector, node, start, end, clock):
+    run_id = uuid.uuid4()
+    clock[0] = start
+    collector.on_chain_start({}, {}, run_id=run_id, metadata={"langgraph_node": node}, name=node)
+    clock[0] = end
+    collector.on_chain_end({}, run_id=run_id)
+
+
+def wall(collector):
+    return {r["node"]: r["wall_s"] for r in collector.records()}
+
+
+def test_repeated_node_sums_its_runs(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: clock[0])
+    collector = NodeMetrics()
+    # Reviewer -> Reviser -> Reviewer: the Reviser's time in between is not the Reviewer's
+    run_node(collector, "Reviewer", 0.0, 1.0, clock)
+    run_node(collector, "Reviser", 1.0, 6.0, clock)
+    run_node(collector, "Reviewer", 6.0, 7.5, clock)
+    assert wall(collector) == {"Reviewer": 2.5, "Reviser": 5.0}
+
+
+def test_concurrent_fan_out_counts_its_span(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: clock[0])
+    collector = NodeMetrics()
+    ids = [uuid.uuid4() for _ in range(3)]
+    for run_id in ids:
+        collector.on_chain_start({}, {}, run_id=run_id, metadata={"langgraph_node": "SectionWriter"},
+                                 name="SectionWriter")
+    for run_id, end in zip(ids, itertools.count(2.0)):
+        clock[0] = end
+        collector.on_chain_end({}, run_id=run_id)
+    assert wall(collector) == {"SectionWriter": 4.0}
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from nodes import arun_steps, run_steps
+
+
+class Echo:
+    """Runnable stand-in: answers with its input, or raises it when it is an exception."""
+
+    def invoke(self, value):
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    async def ainvoke(self, value):
+        return self.invoke(value)
+
+
+def steps():
+    first = yield Echo(), "a"
+    try:
+        yield Echo(), ValueError("bad answer")
+    except ValueError as e:
+        second = str(e)
+    return {"answers": [first, second]}
+
+
+def failing_steps():
+    yield Echo(), KeyError("api down")
+    return {}
+
+
+def test_sync_and_async_nodes_share_one_body():
+    expected = {"answers": ["a", "bad answer"]}
+    assert run_steps(steps()) == expected
+    assert asyncio.run(arun_steps(steps())) == expected
+
+
+def test_uncaught_call_errors_propagate():
+    with pytest.raises(KeyError):
+        run_steps(failing_steps())
+    with pytest.raises(KeyError):
+        asyncio.run(arun_steps(failing_steps()))
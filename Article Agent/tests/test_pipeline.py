@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from fake_groq import FakeGroqServer
+from guards import GuardPolicy
+from nodes import PLAN_ERROR
+from pipeline import arun, build_graph, make_router, merge_update
+
+BRIEF = {"subject": "⚽ Sport", "target": "👨‍👩‍👧 Family", "length": 1200, "content": "Kids love football."}
+
+
+def test_merge_update_appends_reducer_keys():
+    final = merge_update({"guard": [1], "Article": "a"}, {"guard": [2], "Article": "b"})
+    assert final == {"guard": [1, 2], "Article": "b"}
+
+
+def test_async_result_keeps_every_guard_entry():
+    with FakeGroqServer(latency=0.01, token_rate=5000) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        # The fake draft overshoots the length, so the Writer runs twice
+        options = {"editor_mode": "local", "guard": GuardPolicy(redo_length=True)}
+        sync_final = build_graph(llm, **options).invoke(BRIEF)
+        async_final = asyncio.run(arun(build_graph(llm, use_async=True, **options), BRIEF))
+    assert len(sync_final["guard"]) >= 3
+    assert async_final["guard"] == sync_final["guard"]
+
+
+class ProsePlanServer(FakeGroqServer):
+    # The Organizer answers in prose instead of calling the plan tool
+    def completion(self, body):
+        if body.get("tools"):
+            return "Here is a plan: write about football.", None
+        return super().completion(body)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_failed_plan_ends_the_run_without_guard(use_async):
+    with ProsePlanServer(latency=0.01, token_rate=5000) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        agent = build_graph(llm, use_async=use_async, editor_mode="local")
+        final = asyncio.run(arun(agent, BRIEF)) if use_async else agent.invoke(BRIEF)
+        organizer_requests = server.requests
+    assert final["Plan"] == PLAN_ERROR
+    assert "Article" not in final and "Result" not in final
+    assert organizer_requests <= 2  # the Organizer and its escalation, nothing after
@@ -0,0 +1,54 @@
+from plan_index import PlanIndex
+
+BRIEFS = [
+    "Explain how rising interest rates affect first time home buyers, mortgage payments, rent prices and what "
+    "families can do to prepare their budgets for the next two years",
+    "Small businesses are adopting AI tools for customer support and bookkeeping, saving hours each week but "
+    "raising questions about data privacy and jobs",
+    "Kids love football. Parents worry about concussions.",
+]
+
+
+def brief(content, length=1200):
+    return {"subject": "📈 Economics", "target": "👨‍👩‍👧 Family", "length": length, "content": content}
+
+
+def index(tmp_path):
+    plans = PlanIndex(str(tmp_path / "plans.sqlite"))
+    for i, content in enumerate(BRIEFS):
+        plans.add(brief(content), {"title": f"plan {i}"})
+    return plans
+
+
+def test_reworded_briefs_reuse_their_plan(tmp_path):
+    plans = index(tmp_path)
+    reworded = [
+        "Explain how higher interest rates affect first time home buyers, monthly mortgage costs, rent prices "
+        "and what families should do to prepare their budgets for the coming two years",
+        "Small firms are adopting AI tools for customer service and accounting, saving hours every week but "
+        "raising questions about data privacy and jobs",
+        "Kids love soccer. Parents worry about concussions.",
+    ]
+    for i, content in enumerate(reworded):
+        plan, similarity = plans.lookup(brief(content))
+        assert plan == {"title": f"plan {i}"}
+        assert similarity >= plans.threshold
+
+
+def test_unrelated_briefs_miss(tmp_path):
+    plans = index(tmp_path)
+    assert plans.lookup(brief("Explain how rising interest rates affect savers, bond prices and pension funds")) is None
+    assert plans.lookup(brief("Why sleep matters for teenagers and how screens before bed change their mood")) is None
+    # Same notes, different audience or a very different length: not compared at all
+    assert plans.lookup({**brief(BRIEFS[2]), "target": "👔 Professional"}) is None
+    assert plans.lookup(brief(BRIEFS[2], length=3000)) is None
+    assert plans.stats() == {"entries": 3, "hits": 0, "misses": 4}
+
+
+def test_index_survives_a_restart_and_evicts_old_entries(tmp_path):
+    index(tmp_path)
+    plans = PlanIndex(str(tmp_path / "plans.sqlite"), max_entries=3)
+    assert plans.lookup(brief(BRIEFS[0]))[1] == 1.0
+    plans.add(brief("Remote work changed city centers and office vacancies are high"), {"title": "plan 3"})
+    assert plans.stats()["entries"] == 3
+    assert plans.lookup(brief(BRIEFS[0])) is not None  # just used, so not the one evicted
@@ -0,0 +1,117 @@
+import pytest
+
+from fake_groq import FakeGroqServer
+from pipeline import build_graph, make_router
+from plan_templates import LENGTH_BUCKETS, PlanTemplates, Specifics, fast_plan, filled_plan, length_bucket
+
+BRIEF = {"subject": "⚽ Sport", "target": "👨‍👩‍👧 Family", "length": 1200,
+         "content": "Kids love football more than any screen. Parents worry about concussions."}
+SKELETON = {"header": "The game", "question": "Why play?", "steps": ["Rules", "Safety", "Fun"],
+            "instructions_for_writer": "Warm, concrete, short paragraphs"}
+
+
+class ToolLog(FakeGroqServer):
+    # Logs the tool (schema) every structured call asks for; with `prose` those calls get no tool call
+    def __init__(self, prose=False, **kwargs):
+        super().__init__(**kwargs)
+        self.prose = prose
+        self.tools = []
+
+    def completion(self, body):
+        if body.get("tools"):
+            self.tools.append(body["tools"][0]["function"]["name"])
+            if self.prose:
+                return "Here is a skeleton: write about sport.", None
+        return super().completion(body)
+
+
+def templates(tmp_path):
+    store = PlanTemplates(str(tmp_path / "templates.sqlite"))
+    store.put("⚽ Sport", "👨‍👩‍👧 Family", "medium", SKELETON)
+    return store
+
+
+def test_length_buckets():
+    assert [length_bucket(length) for length in (500, 900, 901, 1500, 1501, 5000)] == \
+        ["short", "short", "medium", "medium", "long", "long"]
+    assert length_bucket(None) == "short"
+    assert list(LENGTH_BUCKETS) == ["short", "medium", "long"]
+
+
+def test_skeletons_are_matched_by_cell_and_survive_a_restart(tmp_path):
+    store = templates(tmp_path)
+    assert store.get(BRIEF) == SKELETON
+    assert store.get({**BRIEF, "length": 1400}) == SKELETON
+    assert store.get({**BRIEF, "length": 700}) is None
+    assert store.get({**BRIEF, "target": "👔 Professional"}) is None
+    assert store.get({**BRIEF, "subject": "Gardening"}) is None
+    assert store.stats() == {"cells": 1, "hits": 2, "misses": 3}
+    assert PlanTemplates(str(tmp_path / "templates.sqlite")).get(BRIEF) == SKELETON
+
+
+def test_stale_cells(tmp_path, monkeypatch):
+    store = templates(tmp_path)
+    cells = [("⚽ Sport", "👨‍👩‍👧 Family", "medium"), ("⚽ Sport", "👨‍👩‍👧 Family", "long")]
+    assert store.stale(cells) == cells[1:]
+    assert store.stale(cells, max_age=3600) == cells[1:]
+    monkeypatch.setattr("plan_templates.time.time", lambda: store._cells[cells[0]]["created_at"] + 7200)
+    assert store.stale(cells, max_age=3600) == cells
+
+
+def test_fast_plan_takes_the_title_from_the_first_sentence():
+    plan = fast_plan(BRIEF, SKELETON)
+    assert plan["title"] == "Kids love football more than any screen"
+    assert plan["steps"] == SKELETON["steps"] and plan["instructions_for_writer"] == SKELETON["instructions_for_writer"]
+    assert (plan["subject"], plan["target"], plan["length"], plan["content"]) == \
+        (BRIEF["subject"], BRIEF["target"], 1200, BRIEF["content"])
+    long_sentence = "Football " * 40
+    assert len(fast_plan({**BRIEF, "content": long_sentence}, SKELETON)["title"]) <= 90
+    assert fast_plan({**BRIEF, "content": ""}, SKELETON)["title"] == BRIEF["subject"]
+
+
+def test_filled_plan_only_takes_the_specifics_from_the_model():
+    specifics = Specifics(title="Let them play", header="Why football", question="What do kids learn?")
+    plan = filled_plan(BRIEF, SKELETON, specifics)
+    assert (plan["title"], plan["header"], plan["question"]) == ("Let them play", "Why football", "What do kids learn?")
+    assert plan["steps"] == SKELETON["steps"]
+
+
+def test_refresh_stores_the_stale_cells_only(tmp_path):
+    store = templates(tmp_path)
+    cells = [("⚽ Sport", "👨‍👩‍👧 Family", "medium"), ("💻 IT", "🏫 School", "short")]
+    with ToolLog(latency=0.01, token_rate=5000) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        assert store.refresh(llm, cells) == 1
+        assert server.tools == ["Skeleton"]
+    assert store.get({"subject": "💻 IT", "target": "🏫 School", "length": 800})["steps"]
+    assert store.get(BRIEF) == SKELETON
+
+
+def test_refresh_keeps_the_old_skeleton_on_an_unusable_answer(tmp_path):
+    store = templates(tmp_path)
+    with ToolLog(prose=True, latency=0.01, token_rate=5000) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        assert store.refresh(llm, [("⚽ Sport", "👨‍👩‍👧 Family", "medium")], max_age=0) == 0
+    assert store.get(BRIEF) == SKELETON
+
+
+@pytest.mark.parametrize("mode, tools", [("fast", ["Review"]), ("fill", ["Specifics", "Review"])])
+def test_organizer_plans_from_the_skeleton(tmp_path, mode, tools):
+    with ToolLog(latency=0.01, token_rate=5000) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        agent = build_graph(llm, editor_mode="local", templates=templates(tmp_path), template_mode=mode)
+        final = agent.invoke(BRIEF)
+    assert server.tools == tools
+    assert final["plan_template"] == mode
+    assert final["Plan"].steps == SKELETON["steps"]
+    if mode == "fast":
+        assert final["Plan"].title == "Kids love football more than any screen"
+
+
+def test_cells_without_a_skeleton_get_the_full_organizer(tmp_path):
+    with ToolLog(latency=0.01, token_rate=5000) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        agent = build_graph(llm, editor_mode="local", templates=templates(tmp_path), template_mode="fast")
+        final = agent.invoke({**BRIEF, "subject": "Gardening"})
+    assert server.tools == ["State", "Review"]
+    assert "plan_template" not in final
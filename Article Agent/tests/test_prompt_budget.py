@@ -0,0 +1,58 @@
+from nodes import State, organizer_prompt, reviewer_prompt, writer_prompt
+from prompt_budget import ELISION, PromptBudget, count_tokens, fit
+
+NOTES = " ".join(f"Sentence number {i} says something about rates." for i in range(200))
+
+
+def brief(content=NOTES):
+    return {"subject": "📈 Economics", "target": "👔 Professional", "length": 1200, "content": content}
+
+
+def plan():
+    return State(subject="📈 Economics", length=1200, target="👔 Professional", title="Rates", header="Why",
+                 question="What now?", content=NOTES, steps=["One", "Two"], instructions_for_writer="Be brief")
+
+
+def test_fit_keeps_whole_sentences_from_both_ends():
+    trimmed = fit(NOTES, 100)
+    head, tail = trimmed.split(ELISION)
+    assert len(trimmed) <= 100 * 4 + len(ELISION)
+    assert head.startswith("Sentence number 0 ") and head.endswith(".")
+    assert tail.startswith("Sentence number ") and tail.endswith("Sentence number 199 says something about rates.")
+    assert len(head) > len(tail)
+
+
+def test_fit_leaves_short_text_and_no_limit_alone():
+    assert fit("Short notes.", 100) == "Short notes."
+    assert fit(NOTES, None) == NOTES
+    assert fit(NOTES, 0) == NOTES
+
+
+def test_no_budget_sends_the_notes_whole():
+    assert NOTES in organizer_prompt(brief())
+    assert NOTES in writer_prompt({**brief(), "Plan": plan()})
+    budget = PromptBudget()
+    assert NOTES in organizer_prompt(brief(), budget)
+    assert budget.saved_tokens() == 0
+    assert budget.stats()["Organizer"]["prompts"] == 1
+
+
+def test_limits_trim_and_account_per_node():
+    budget = PromptBudget(content_tokens=100, article_tokens=50)
+    organizer = organizer_prompt(brief(), budget)
+    reviewer = reviewer_prompt({"target": "👔 Professional", "Article": NOTES}, budget=budget)
+    assert NOTES not in organizer and ELISION in organizer
+    assert ELISION in reviewer
+    stats = budget.stats()
+    assert stats["Organizer"]["sent_tokens"] == count_tokens(organizer)
+    assert stats["Organizer"]["saved_tokens"] == count_tokens(organizer_prompt(brief())) - count_tokens(organizer)
+    assert stats["Reviewer"]["prompts"] == 1 and stats["Reviewer"]["saved_tokens"] > 0
+    assert budget.saved_tokens() == stats["Organizer"]["saved_tokens"] + stats["Reviewer"]["saved_tokens"]
+
+
+def test_writer_prompt_counts_what_the_plan_json_would_have_cost():
+    budget = PromptBudget()
+    prompt = writer_prompt({**brief("Short notes."), "Plan": plan()}, budget)
+    assert "Outline: One | Two" in prompt and "Short notes." in prompt
+    # The plan JSON echoed the notes; the prompt sends them once
+    assert budget.stats()["Writer"]["saved_tokens"] > 0
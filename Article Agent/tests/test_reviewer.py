@@ -0,0 +1,65 @@
+import json
+
+from fake_groq import FakeGroqServer
+from nodes import make_nodes, parse_rating
+from pipeline import DEFAULT_MODEL, SMALL_MODEL, make_router
+
+DRAFT = {"target": "👨‍👩‍👧 Family", "Article": "# Football\n\nKids love football.\n"}
+
+
+class ReviewServer(FakeGroqServer):
+    # Reviews from the models in `bad` are out of range; every Reviewer prompt is logged with its model
+    def __init__(self, bad=(), **kwargs):
+        super().__init__(**kwargs)
+        self.bad = set(bad)
+        self.reviews = []
+
+    def completion(self, body):
+        content, tool_calls = super().completion(body)
+        self.reviews.append((body["model"], body["messages"][-1]["content"]))
+        if body["model"] in self.bad:
+            args = json.loads(tool_calls[0]["function"]["arguments"])
+            tool_calls[0]["function"]["arguments"] = json.dumps({**args, "score": 9})
+        return content, tool_calls
+
+
+def review(server):
+    router = make_router(base_url=server.url, api_key="fake")
+    return make_nodes(router)["Reviewer"](DRAFT), router
+
+
+def test_valid_review_is_stored_with_its_rating_text():
+    with ReviewServer(latency=0.01, token_rate=5000) as server:
+        update, router = review(server)
+    assert update["review"]["score"] == 4.2
+    assert update["rating"].startswith("Rating: 4.2/5\nNote: ")
+    assert [model for model, _ in server.reviews] == [SMALL_MODEL]
+    assert router.stats() == {}
+
+
+def test_invalid_review_is_asked_again_quoting_the_validation_error():
+    with ReviewServer(bad=[SMALL_MODEL], latency=0.01, token_rate=5000) as server:
+        update, router = review(server)
+    first, again, escalated = server.reviews
+    assert "rejected" not in first[1]
+    assert again[0] == SMALL_MODEL
+    assert "Your previous answer was rejected (score: Input should be less than or equal to 5)" in again[1]
+    # Only after the re-ask fails does the large model get the (fresh) prompt
+    assert escalated[0] == DEFAULT_MODEL and "rejected" not in escalated[1]
+    assert router.stats() == {"Reviewer": 1}
+    assert update["review"]["score"] == 4.2
+
+
+def test_no_valid_review_from_any_model_leaves_review_empty():
+    with ReviewServer(bad=[SMALL_MODEL, DEFAULT_MODEL], latency=0.01, token_rate=5000) as server:
+        update, _ = review(server)
+    assert [model for model, _ in server.reviews] == [SMALL_MODEL, SMALL_MODEL, DEFAULT_MODEL, DEFAULT_MODEL]
+    assert update == {"review": None, "rating": ""}
+
+
+def test_parse_rating_reads_legacy_rating_text():
+    # Checkpoints from before structured reviews only have the "rating" text
+    assert parse_rating("Rating: 4.2/5\nNote: Clear structure.") == {"score": 4.2, "note": "Clear structure."}
+    assert parse_rating("Rating: 3 / 5") == {"score": 3.0, "note": ""}
+    assert parse_rating("Looks good to me") is None
+    assert parse_rating(None) is None
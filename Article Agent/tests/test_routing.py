@@ -0,0 +1,81 @@
+import pytest
+
+from fake_groq import FakeGroqServer
+from pipeline import DEFAULT_MODEL, SMALL_MODEL, build_graph, make_router
+from routing import ModelRouter, attempts, node_llm
+
+BRIEF = {"subject": "⚽ Sport", "target": "👨‍👩‍👧 Family", "length": 1200, "content": "Kids love football."}
+
+
+FORMATTED = "# Title\n\n## One\n\nFirst part of the article.\n\n## Two\n\nSecond part of the article.\n"
+
+
+class SmallModelServer(FakeGroqServer):
+    # Formatted Editor answers, unless `bad`: then the 8B model's Editor / Reviewer answers are
+    # unusable. Every call is logged as (model, kind)
+    def __init__(self, bad=True, **kwargs):
+        super().__init__(**kwargs)
+        self.bad = bad
+        self.calls = []
+
+    def completion(self, body):
+        content, tool_calls = super().completion(body)
+        small = self.bad and body.get("model") == SMALL_MODEL
+        if tool_calls:
+            kind = tool_calls[0]["function"]["name"]
+            if small and kind == "Review":
+                tool_calls[0]["function"]["arguments"] = '{"score": 9}'
+        else:
+            kind = "Editor" if "Format this text" in str(body.get("messages")) else "Writer"
+            if kind == "Editor":
+                content = "An unformatted wall of text without any headings. " * 20 if small else FORMATTED
+        self.calls.append((body.get("model"), kind))
+        return content, tool_calls
+
+
+def test_for_node_falls_back_to_the_default():
+    router = ModelRouter({"Editor": "small"}, default="large")
+    assert router.for_node("Editor") == "small"
+    assert router.for_node("Writer") == "large"
+    assert node_llm(router, "Writer") == "large"
+    assert node_llm("plain", "Writer") == "plain"
+
+
+def test_escalation_is_counted_only_when_asked_for():
+    router = ModelRouter({"Editor": "small"}, default="large", escalate_to="large")
+    models = attempts(router, "Editor")
+    assert next(models) == "small"
+    assert router.stats() == {}
+    assert next(models) == "large"
+    assert router.stats() == {"Editor": 1}
+    with pytest.raises(StopIteration):
+        next(models)
+
+
+def test_no_escalation_from_the_escalation_model_or_without_one():
+    router = ModelRouter({"Editor": "small"}, default="large", escalate_to="large")
+    assert list(attempts(router, "Writer")) == ["large"]
+    assert list(attempts(ModelRouter({"Editor": "small"}, default="large"), "Editor")) == ["small"]
+    assert list(attempts("plain", "Editor")) == ["plain"]
+    assert router.stats() == {}
+
+
+def test_bad_small_model_answers_escalate_once_each():
+    with SmallModelServer(latency=0.01, token_rate=5000) as server:
+        router = make_router(base_url=server.url, api_key="fake")
+        final = build_graph(router, editor_mode="llm").invoke(BRIEF)
+    assert router.stats() == {"Editor": 1, "Reviewer": 1}
+    assert server.calls.count((SMALL_MODEL, "Editor")) == 1
+    assert server.calls.count((DEFAULT_MODEL, "Editor")) == 1
+    assert server.calls.count((DEFAULT_MODEL, "Review")) == 1
+    assert final["Result"] == FORMATTED
+    assert final["review"]["score"] == 4.2
+
+
+def test_good_small_model_answers_are_kept():
+    with SmallModelServer(bad=False, latency=0.01, token_rate=5000) as server:
+        router = make_router(base_url=server.url, api_key="fake")
+        final = build_graph(router, editor_mode="llm").invoke(BRIEF)
+    assert router.stats() == {}
+    assert (SMALL_MODEL, "Editor") in server.calls and (SMALL_MODEL, "Review") in server.calls
+    assert final["Result"] == FORMATTED and final["review"]["score"] == 4.2
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scheduler import RateLimitScheduler
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = RateLimitScheduler(max_concurrency=1, initial_concurrency=1)
+        await scheduler.aacquire(10)
+        waiter = asyncio.ensure_future(scheduler.aacquire(10))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release()
+        # Would wait forever behind the dead ticket
+        await asyncio.wait_for(scheduler.aacquire(10), 1)
+        return scheduler.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["queued"] == 0
+    assert snapshot["in_flight"] == 1
+
+
+def test_cancelled_call_frees_its_slot():
+    async def scenario():
+        scheduler = RateLimitScheduler(max_concurrency=1, initial_concurrency=1)
+        call = asyncio.ensure_future(scheduler.acall(lambda: asyncio.sleep(10), 10))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert await asyncio.wait_for(scheduler.acall(lambda: asyncio.sleep(0, "ok"), 10), 1) == "ok"
+        return scheduler.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["in_flight"] == 0
+    assert snapshot["cancelled"] == 1
+    assert snapshot["errors"] == 0
+
+
+def test_cancelled_stream_frees_its_slot():
+    async def chunks():
+        await asyncio.sleep(10)
+        yield "never"
+
+    async def scenario():
+        scheduler = RateLimitScheduler(max_concurrency=1, initial_concurrency=1)
+
+        async def consume():
+            return [chunk async for chunk in scheduler.astream(chunks, 10)]
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return scheduler.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["in_flight"] == 0
+    assert snapshot["queued"] == 0
+
+
+def counting(scheduler):
+    # Counts admission checks: a waiter that polls checks many times while nothing changes
+    checks = []
+    try_admit = scheduler._try_admit
+
+    def counted(ticket, tokens):
+        checks.append(ticket)
+        return try_admit(ticket, tokens)
+
+    scheduler._try_admit = counted
+    return checks
+
+
+def test_async_waiter_sleeps_until_a_release():
+    async def scenario():
+        scheduler = RateLimitScheduler(max_concurrency=1, initial_concurrency=1)
+        await scheduler.aacquire(10)
+        checks = counting(scheduler)
+        waiter = asyncio.ensure_future(scheduler.aacquire(10))
+        await asyncio.sleep(0.3)
+        idle_checks = len(checks)
+        scheduler.release()
+        await asyncio.wait_for(waiter, 1)
+        return idle_checks
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_blocking_waiter_sleeps_until_a_release():
+    scheduler = RateLimitScheduler(max_concurrency=1, initial_concurrency=1)
+    scheduler.acquire(10)
+    checks = counting(scheduler)
+    waiter = threading.Thread(target=scheduler.acquire, args=(10,))
+    waiter.start()
+    time.sleep(0.3)
+    idle_checks = len(checks)
+    scheduler.release()
+    waiter.join(1)
+    assert not waiter.is_alive()
+    assert idle_checks == 1
+
+
+def test_waiters_wake_up_when_a_retry_after_runs_out():
+    async def scenario():
+        scheduler = RateLimitScheduler(max_concurrency=4)
+        scheduler.observe_headers({"retry-after": "0.2"})
+        checks = counting(scheduler)
+        start = time.monotonic()
+        await asyncio.wait_for(scheduler.aacquire(10), 1)
+        return time.monotonic() - start, len(checks)
+
+    waited, checks = asyncio.run(scenario())
+    assert 0.19 <= waited < 0.5
+    assert checks == 2
+
+    scheduler = RateLimitScheduler(max_concurrency=4)
+    scheduler.observe_headers({"retry-after": "0.2"})
+    start = time.monotonic()
+    scheduler.acquire(10)
+    assert 0.19 <= time.monotonic() - start < 0.5
+
+
+def test_stream_closed_by_its_consumer_is_not_an_error():
+    scheduler = RateLimitScheduler(max_concurrency=4, initial_concurrency=2)
+    stream = scheduler.stream(lambda: iter(["a", "b", "c"]), 10)
+    assert next(stream) == "a"
+    stream.close()
+
+    async def ascenario():
+        async def chunks():
+            for chunk in "abc":
+                yield chunk
+
+        astream = scheduler.astream(chunks, 10)
+        assert await anext(astream) == "a"
+        await astream.aclose()
+
+    asyncio.run(ascenario())
+    snapshot = scheduler.snapshot()
+    assert snapshot["errors"] == 0 and snapshot["cancelled"] == 2
+    assert snapshot["in_flight"] == 0 and snapshot["limit"] == 2
+
+
+def test_failed_stream_is_an_error():
+    def chunks():
+        yield "a"
+        raise ValueError("connection dropped")
+
+    scheduler = RateLimitScheduler(max_concurrency=4)
+    with pytest.raises(ValueError):
+        list(scheduler.stream(chunks, 10))
+    assert scheduler.snapshot()["errors"] == 1
@@ -0,0 +1,90 @@
+from langgraph.types import Send
+
+from fake_groq import FakeGroqServer
+from guards import GuardPolicy
+from nodes import State
+from pipeline import build_graph, make_router
+from prompt_budget import ELISION, PromptBudget
+from sections import fan_out_sections, section_prompt, stitch
+
+BRIEF = {"subject": "⚽ Sport", "target": "👨‍👩‍👧 Family", "length": 1200, "content": "Kids love football."}
+
+
+def plan(steps=("Rules", "Safety", "Fun")):
+    return State(subject="⚽ Sport", length=1200, target="👨‍👩‍👧 Family", title="Football", header="Why",
+                 question="Why?", content="Kids love football.", steps=list(steps),
+                 instructions_for_writer="Be concrete")
+
+
+def test_one_send_per_step_in_plan_order():
+    sends = fan_out_sections({**BRIEF, "Plan": plan()})
+    assert all(isinstance(send, Send) and send.node == "SectionWriter" for send in sends)
+    assert [(send.arg["index"], send.arg["step"]) for send in sends] == [(0, "Rules"), (1, "Safety"), (2, "Fun")]
+    assert {send.arg["chars"] for send in sends} == {400}
+    assert fan_out_sections({**BRIEF, "Plan": plan(steps=())}) == "Writer"
+
+
+def test_stitch_joins_sections_in_plan_order():
+    # Sections arrive in completion order
+    state = {"Plan": plan(), "length": 1200, "Sections": [(2, "## Fun"), (0, "## Rules"), (1, "## Safety")]}
+    assert stitch(state)["Article"] == "# Football\n\n## Rules\n\n## Safety\n\n## Fun"
+
+
+def test_stitch_only_uses_the_last_pass():
+    first = [(0, "## Rules v1"), (1, "## Safety v1"), (2, "## Fun v1")]
+    state = {"Plan": plan(), "length": 1200, "Sections": first + [(1, "## Safety"), (2, "## Fun"), (0, "## Rules")]}
+    assert stitch(state)["Article"] == "# Football\n\n## Rules\n\n## Safety\n\n## Fun"
+
+
+def test_stitch_trims_every_section_by_the_same_ratio():
+    sentence = "Kids run around the pitch. "
+    long, short = "## Long\n\n" + sentence * 60, "## Short\n\n" + sentence * 20
+    state = {"Plan": plan(steps=("Long", "Short")), "length": 1000, "Sections": [(0, long), (1, short)]}
+    article = stitch(state)["Article"]
+    kept_long, kept_short = article.split("\n\n## Short")
+    assert len(article) <= 1000 * 1.15
+    assert kept_long.count("Kids") > 2 * kept_short.count("Kids") > 0
+    # Within the slack nothing is cut
+    assert stitch({**state, "length": len(long) + len(short)})["Article"].count("Kids") == 80
+
+
+def test_section_prompt_gets_the_notes_within_budget_and_the_guard_feedback():
+    task = fan_out_sections({**BRIEF, "content": "Note. " * 500, "Plan": plan(),
+                             "guard": [{"node": "Writer", "problems": ["empty draft"], "action": "retry"}]})[0].arg
+    budget = PromptBudget(content_tokens=50)
+    prompt = section_prompt(task, budget)
+    assert ELISION in prompt
+    assert "Your previous answer was rejected (empty draft)" in prompt
+    assert budget.stats()["SectionWriter"]["saved_tokens"] > 0
+    assert "Note. " * 500 in section_prompt(task)
+
+
+class EmptyFirstServer(FakeGroqServer):
+    # The first pass of sections comes back empty, so the draft check sends them back
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prompts = []
+
+    def completion(self, body):
+        content, tool_calls = super().completion(body)
+        prompt = str(body["messages"][-1]["content"])
+        if "ONE section" in prompt:
+            self.prompts.append(prompt)
+            if "rejected" not in prompt:
+                content = ""
+        return content, tool_calls
+
+
+def test_draft_retry_redoes_the_sections_with_feedback():
+    with EmptyFirstServer(latency=0.01, token_rate=5000, article_words=40) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        budget = PromptBudget()
+        agent = build_graph(llm, editor_mode="local", writer_mode="sections", guard=GuardPolicy(), budget=budget)
+        final = agent.invoke(BRIEF)
+    steps = len(final["Plan"].steps)
+    assert len(server.prompts) == 2 * steps
+    assert all("rejected (empty draft)" in prompt for prompt in server.prompts[steps:])
+    assert all("Kids love football." in prompt for prompt in server.prompts)
+    assert len(final["Sections"]) == 2 * steps and final["Article"].startswith("# ")
+    assert [entry["action"] for entry in final["guard"] if entry["node"] == "Writer"] == ["retry", "ok"]
+    assert budget.stats()["SectionWriter"]["prompts"] == 2 * steps
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from fake_groq import FakeGroqServer
+from guards import GuardPolicy
+from pipeline import arun, build_graph, make_router
+from scheduler import RateLimitScheduler
+from variants import VariantPolicy
+
+BRIEF = {"subject": "⚽ Sport", "target": "👨‍👩‍👧 Family", "length": 1200, "content": "Kids love football."}
+
+
+def variants_graph(server, scheduler, use_async):
+    llm = make_router(scheduler=scheduler, base_url=server.url, api_key="fake")
+    return build_graph(llm, use_async=use_async, editor_mode="local", writer_mode="variants",
+                       variants=VariantPolicy(n=3, max_seconds=0.5))
+
+
+def wait_idle(scheduler, seconds=5):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        snapshot = scheduler.snapshot()
+        if snapshot["in_flight"] == 0 and snapshot["queued"] == 0:
+            return snapshot
+        time.sleep(0.05)
+    return scheduler.snapshot()
+
+
+def test_async_variants_past_the_deadline_do_not_block_the_scheduler():
+    scheduler = RateLimitScheduler(max_concurrency=2, initial_concurrency=1)
+    with FakeGroqServer(latency=0.3, token_rate=400) as server:
+        agent = variants_graph(server, scheduler, use_async=True)
+        final = asyncio.run(asyncio.wait_for(arun(agent, BRIEF), 30))
+        snapshot = wait_idle(scheduler)
+    assert final["Result"]
+    assert any(v.get("dropped") for v in final["variants"])
+    assert snapshot["in_flight"] == 0 and snapshot["queued"] == 0
+
+
+def test_sync_variants_past_the_deadline_stop_spending():
+    scheduler = RateLimitScheduler(max_concurrency=2, initial_concurrency=1)
+    with FakeGroqServer(latency=0.3, token_rate=400) as server:
+        agent = variants_graph(server, scheduler, use_async=False)
+        final = agent.invoke(BRIEF)
+        snapshot = wait_idle(scheduler)
+        time.sleep(0.5)  # a dropped variant that kept going would review its draft now
+        requests = server.requests
+    assert final["Result"]
+    dropped = [v for v in final["variants"] if v.get("dropped")]
+    assert dropped
+    assert snapshot["in_flight"] == 0 and snapshot["queued"] == 0
+    # Without the hang-up every variant would be written and reviewed after the Organizer
+    assert requests < 1 + 2 * len(final["variants"])
+
+
+class SlowHotServer(FakeGroqServer):
+    # Drafts at the lowest temperature come back at once, hotter ones a second later
+    def completion(self, body):
+        if not body.get("tools") and body.get("temperature", 0) > 0.5:
+            time.sleep(1)
+        return super().completion(body)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_variants_stop_once_the_real_usage_reaches_the_budget(use_async):
+    # 2000-word drafts cost far more than the estimate for a 1200-character article
+    with SlowHotServer(latency=0.01, token_rate=100000, article_words=2000) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        agent = build_graph(llm, use_async=use_async, editor_mode="local", writer_mode="variants",
+                            variants=VariantPolicy(n=3, max_tokens=5000))
+        start = time.monotonic()
+        final = asyncio.run(arun(agent, BRIEF)) if use_async else agent.invoke(BRIEF)
+        elapsed = time.monotonic() - start
+    scored = [v for v in final["variants"] if not v.get("dropped")]
+    assert len(final["variants"]) == 3
+    assert [v["temperature"] for v in scored] == [0.4] and scored[0]["tokens"] >= 5000
+    assert elapsed < 1
+
+
+def test_variants_only_run_with_the_chain_topology():
+    with pytest.raises(ValueError):
+        build_graph(object(), writer_mode="variants", topology="parallel")
+
+
+def test_guard_checks_the_chosen_variant():
+    with FakeGroqServer(latency=0.01, token_rate=5000) as server:
+        llm = make_router(base_url=server.url, api_key="fake")
+        agent = build_graph(llm, editor_mode="local", writer_mode="variants", guard=GuardPolicy(),
+                            variants=VariantPolicy(n=2))
+        final = agent.invoke(BRIEF)
+    assert [entry["node"] for entry in final["guard"]] == ["Organizer", "Writer"]
+    assert final["Result"]
@@ -0,0 +1,190 @@
+"""Best-of-N drafting: several Writer variants from one plan, the best-reviewed one wins.
+
+With `writer_mode="variants"` the Organizer plans once, then the `Variants`
+node writes `n` drafts concurrently at temperatures spread over
+`temperatures` and has the Reviewer score each one as soon as it is
+written. The best-scoring draft (preferring drafts within
+`length_tolerance` of the target length) goes on to the Editor with its
+review; every variant's score is kept in the `variants` state list. The
+graph's Reviewer only runs again after a revision or a re-run.
+
+The `VariantPolicy` bounds the cost of a run: only as many variants as fit
+`max_tokens` by a pre-call estimate are started, and the ones still running
+are dropped once the finished ones have used `max_tokens` (the Writer's
+reported usage, plus the review) or after `max_seconds`, unless none has
+finished yet. Dropped variants stop spending: their tasks are cancelled on
+the async graph, and on the sync one the Writer streams its draft and
+closes the stream at the next chunk, before any review call.
+
+Every variant is reviewed here, so there is no parallel topology for this
+mode; the guard's `DraftCheck` checks the chosen draft.
+
+    agent = build_graph(llm, writer_mode="variants", variants=VariantPolicy(n=3))
+    final["variants"]  # [{"index": 0, "temperature": 0.4, "score": 4.2, "chosen": True, ...}, ...]
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import closing
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass
+
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from guards import draft_problems
+from nodes import State, writer_prompt
+from prompt_budget import PromptBudget, count_tokens
+from routing import node_llm
+
+# Tokens of a structured review answer, for the cost estimate
+REVIEW_TOKENS = 150
+
+
+@dataclass
+class VariantPolicy:
+    n: int = 3
+    temperatures: tuple = (0.4, 1.0)  # lowest and highest sampling temperature of the variants
+    max_tokens: int = 15000           # writer + reviewer tokens for all the variants of a run
+    max_seconds: float = 90.0         # after this, variants still running are dropped
+    length_tolerance: float = 0.35    # drafts further off `length` only win when none is closer
+
+
+def spread(policy: VariantPolicy, n: int) -> list:
+    low, high = policy.temperatures
+    if n == 1:
+        return [round((low + high) / 2, 2)]
+    return [round(low + (high - low) * i / (n - 1), 2) for i in range(n)]
+
+
+def variant_cost(state: dict, budget: PromptBudget) -> int:
+    """Estimated tokens of one variant: the writer prompt and draft, then the review."""
+    plan = state.get("Plan")
+    plan_tokens = count_tokens(plan.model_dump_json() if isinstance(plan, State) else plan)
+    draft_tokens = int(state.get("length") or 1200) // 4 + 1  # `length` is in characters
+    return plan_tokens + draft_tokens + min(draft_tokens, budget.article_tokens or draft_tokens) + REVIEW_TOKENS
+
+
+def affordable(state: dict, policy: VariantPolicy, budget: PromptBudget) -> int:
+    """Variants to start: those the estimated `variant_cost` fits in `max_tokens`."""
+    return max(1, min(policy.n, policy.max_tokens // variant_cost(state, budget)))
+
+
+def spent(done) -> int:
+    """Tokens the finished variants of `done` used."""
+    return sum(f.result()["tokens"] for f in _succeeded(done))
+
+
+def _enough(done, policy: VariantPolicy, deadline: float) -> bool:
+    # One draft is always waited for; past the budget or the deadline the rest are dropped
+    return bool(_succeeded(done)) and (time.monotonic() >= deadline or spent(done) >= policy.max_tokens)
+
+
+def _wait_time(deadline: float):
+    # Until the deadline, then (with no draft yet) for as long as it takes
+    left = deadline - time.monotonic()
+    return left if left > 0 else None
+
+
+def _variant(index, temperature, draft, review, message, prompt, start, budget) -> dict:
+    usage = getattr(message, "usage_metadata", None)
+    writer_tokens = usage["total_tokens"] if usage else count_tokens(prompt) + count_tokens(draft)
+    return {"index": index, "temperature": temperature, "draft": draft, **review, "chars": len(draft),
+            "tokens": writer_tokens + count_tokens(budget.article(draft)) + REVIEW_TOKENS,
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+def pick(results: list, state: dict, policy: VariantPolicy, dropped=()) -> dict:
+    """Graph update for the best of `results`; `dropped` are the (index, temperature) cut by the budget."""
+    def rank(result):
+        fits = not draft_problems(result["draft"], state.get("length"), policy.length_tolerance)
+        return fits, (result["review"] or {}).get("score", -1)
+
+    results = sorted(results, key=lambda r: r["index"])
+    best = max(results, key=rank)  # ties go to the lowest temperature
+    scores = [
+        {"index": r["index"], "temperature": r["temperature"], "score": (r["review"] or {}).get("score"),
+         "chars": r["chars"], "tokens": r["tokens"], "seconds": r["seconds"], "chosen": r is best}
+        for r in results
+    ]
+    scores += [{"index": i, "temperature": t, "dropped": True} for i, t in dropped]
+    return {"Article": best["draft"], "review": best["review"], "rating": best["rating"], "variants": scores}
+
+
+class VariantDropped(Exception):
+    """Raised inside a sync variant that went past the deadline."""
+
+
+def _succeeded(done) -> list:
+    return [f for f in done if not f.cancelled() and f.exception() is None]
+
+
+def make_variant_nodes(llm, review, policy: VariantPolicy, budget: PromptBudget = None) -> dict:
+    """`review(state)` is the graph's Reviewer node, run on each variant."""
+    budget = budget or PromptBudget()
+
+    def write(state, index, temperature, stop):
+        start = time.perf_counter()
+        prompt = writer_prompt(state, budget)
+        message = None
+        # Threads can't be cancelled: the draft is streamed so a dropped variant can hang up mid-call
+        with closing(iter(node_llm(llm, "Writer").bind(temperature=temperature).stream(prompt))) as chunks:
+            for chunk in chunks:
+                if stop.is_set():
+                    raise VariantDropped(index)
+                message = chunk if message is None else message + chunk
+        if stop.is_set():
+            raise VariantDropped(index)
+        draft = (message.content if message is not None else "").strip()
+        result = review({**state, "Article": draft, "Result": ""})
+        return _variant(index, temperature, draft, result, message, prompt, start, budget)
+
+    def Variants(state: dict) -> dict:
+        temperatures = spread(policy, affordable(state, policy, budget))
+        stop = threading.Event()
+        pool = ContextThreadPoolExecutor(max_workers=len(temperatures), thread_name_prefix="variant")
+        futures = {pool.submit(write, state, i, t, stop): (i, t) for i, t in enumerate(temperatures)}
+        deadline = time.monotonic() + policy.max_seconds
+        done, pending = set(), set(futures)
+        while pending and not _enough(done, policy, deadline):
+            more, pending = wait(pending, timeout=_wait_time(deadline), return_when=FIRST_COMPLETED)
+            done |= more
+        # Late variants are not waited for; they stop at their next chunk
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        results = [f.result() for f in _succeeded(done)]
+        if not results:
+            raise next(iter(done)).exception()
+        return pick(results, state, policy, dropped=[futures[f] for f in pending])
+
+    return {"Variants": Variants}
+
+
+def make_async_variant_nodes(llm, review, policy: VariantPolicy, budget: PromptBudget = None) -> dict:
+    budget = budget or PromptBudget()
+
+    async def write(state, index, temperature):
+        start = time.perf_counter()
+        prompt = writer_prompt(state, budget)
+        message = await node_llm(llm, "Writer").bind(temperature=temperature).ainvoke(prompt)
+        draft = (message.content or "").strip()
+        result = await review({**state, "Article": draft, "Result": ""})
+        return _variant(index, temperature, draft, result, message, prompt, start, budget)
+
+    async def Variants(state: dict) -> dict:
+        temperatures = spread(policy, affordable(state, policy, budget))
+        tasks = {asyncio.ensure_future(write(state, i, t)): (i, t) for i, t in enumerate(temperatures)}
+        deadline = time.monotonic() + policy.max_seconds
+        done, pending = set(), set(tasks)
+        while pending and not _enough(done, policy, deadline):
+            more, pending = await asyncio.wait(pending, timeout=_wait_time(deadline),
+                                               return_when=asyncio.FIRST_COMPLETED)
+            done |= more
+        for task in pending:
+            task.cancel()
+        results = [task.result() for task in _succeeded(done)]
+        if not results:
+            raise next(iter(done)).exception()
+        return pick(results, state, policy, dropped=[tasks[task] for task in pending])
+
+    return {"Variants": Variants}